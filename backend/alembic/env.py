@@ -7,7 +7,7 @@ from alembic import context
 
 # Import all models to be included in migrations
 from database import Base
-from models import Animal, Observation, ObservationEntity, Relation
+from models import Animal, Observation, ObservationEntity, Relation, EntityConfigVersion, DailyAnimalReport
 
 # this is the Alembic Config object
 config = context.config
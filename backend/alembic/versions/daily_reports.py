@@ -0,0 +1,34 @@
+"""daily reports
+
+Revision ID: 4
+Revises: 3
+Create Date: 2026-10-18 16:00:00.000000
+
+Fill the table for existing observations with scripts/backfill_daily_reports.py.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '4'
+down_revision = '3'
+branch_labels = None
+depends_on = None
+
+def upgrade() -> None:
+    # Create daily_reports table; one row per animal and day
+    op.create_table('daily_reports',
+        sa.Column('animal_id', sa.Integer(), nullable=False),
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('observations', sa.Integer(), nullable=False),
+        sa.Column('critical_alerts', sa.Integer(), nullable=False),
+        sa.Column('warnings', sa.Integer(), nullable=False),
+        sa.Column('latest_vitals', sa.JSON(), nullable=True),
+        sa.ForeignKeyConstraint(['animal_id'], ['animals.id'], ),
+        sa.PrimaryKeyConstraint('animal_id', 'day')
+    )
+    op.create_index(op.f('ix_daily_reports_day'), 'daily_reports', ['day'], unique=False)
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_daily_reports_day'), table_name='daily_reports')
+    op.drop_table('daily_reports')
@@ -0,0 +1,29 @@
+"""entity configs
+
+Revision ID: 2
+Revises: 1
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '2'
+down_revision = '1'
+branch_labels = None
+depends_on = None
+
+def upgrade() -> None:
+    # Create entity_configs table; each saved config is a new version
+    op.create_table('entity_configs',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('config', sa.JSON(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_entity_configs_id'), 'entity_configs', ['id'], unique=False)
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_entity_configs_id'), table_name='entity_configs')
+    op.drop_table('entity_configs')
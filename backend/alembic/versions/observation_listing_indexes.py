@@ -0,0 +1,26 @@
+"""observation listing indexes
+
+Revision ID: 3
+Revises: 2
+Create Date: 2026-10-18 14:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '3'
+down_revision = '2'
+branch_labels = None
+depends_on = None
+
+def upgrade() -> None:
+    # Listings filter on animal or watcher (or only dates) and seek newest first on (ts, id)
+    op.create_index('ix_observations_animal_id_ts_id', 'observations', ['animal_id', 'ts', 'id'], unique=False)
+    op.create_index('ix_observations_watcher_id_ts_id', 'observations', ['watcher_id', 'ts', 'id'], unique=False)
+    op.create_index('ix_observations_ts_id', 'observations', ['ts', 'id'], unique=False)
+
+def downgrade() -> None:
+    op.drop_index('ix_observations_ts_id', table_name='observations')
+    op.drop_index('ix_observations_watcher_id_ts_id', table_name='observations')
+    op.drop_index('ix_observations_animal_id_ts_id', table_name='observations')
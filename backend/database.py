@@ -1,4 +1,5 @@
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 import os
@@ -6,9 +7,24 @@ import os
 # Default to SQLite for local development, but allow PostgreSQL for production
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./zoo_keeper_ai.db")
 
+# asyncio drivers the API uses for the same databases
+ASYNC_DRIVERS = {"sqlite": "sqlite+aiosqlite", "postgresql": "postgresql+asyncpg", "postgres": "postgresql+asyncpg"}
+
+def async_database_url(url: str) -> str:
+    """The same database URL with the dialect's asyncio driver"""
+    scheme, separator, rest = url.partition("://")
+    dialect = scheme.split("+")[0]
+    return ASYNC_DRIVERS[dialect] + separator + rest if dialect in ASYNC_DRIVERS else url
+
 engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False} if "sqlite" in DATABASE_URL else {})
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# The API's request path uses the async engine so queries never block the event
+# loop; Celery workers, scripts and migrations keep the sync one
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL", async_database_url(DATABASE_URL))
+async_engine = create_async_engine(ASYNC_DATABASE_URL)
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
 Base = declarative_base()
 
 def get_db():
@@ -16,4 +32,8 @@ def get_db():
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
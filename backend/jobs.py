@@ -0,0 +1,86 @@
+import asyncio
+import json
+import os
+import time
+import uuid
+from typing import Any, AsyncIterator, Dict, Optional
+import numpy as np
+from engine.audio import save_wav
+from schemas import JobStatus
+
+# Where uploads wait for a worker; must be shared with the Celery workers
+UPLOAD_DIR = os.getenv("UPLOAD_DIR", "uploads")
+# Seconds between result backend polls for a job's event stream
+JOB_POLL_SEC = float(os.getenv("JOB_POLL_SEC", "0.5"))
+# Seconds between SSE comments that keep idle proxies from closing the stream
+JOB_HEARTBEAT_SEC = float(os.getenv("JOB_HEARTBEAT_SEC", "15"))
+
+# Celery task states as reported to clients
+JOB_STATES = {"PENDING": "queued", "RECEIVED": "queued", "RETRY": "queued", "STARTED": "processing",
+              "SUCCESS": "done", "FAILURE": "failed", "REVOKED": "failed"}
+FINISHED_STATES = ("done", "failed")
+
+def upload_path(job_id: str) -> str:
+    return os.path.join(UPLOAD_DIR, f"{job_id}.wav")
+
+def keep_failed_upload(file_path: str) -> str:
+    """Move a failed job's upload to failed/ next to it, where it can be re-queued from"""
+    # Left in place it would make the job look queued again once its result expires
+    failed_dir = os.path.join(os.path.dirname(file_path), "failed")
+    os.makedirs(failed_dir, exist_ok=True)
+    failed_path = os.path.join(failed_dir, os.path.basename(file_path))
+    os.replace(file_path, failed_path)
+    return failed_path
+
+async def submit_job(samples: np.ndarray, sample_rate: int, watcher_id: int, metadata: Dict[str, Any]) -> JobStatus:
+    """Store an upload where the workers can read it and queue it for transcription"""
+    # Celery is only imported by the API when jobs are used
+    from worker import process_audio_task
+
+    job_id = uuid.uuid4().hex
+    path = upload_path(job_id)
+    os.makedirs(UPLOAD_DIR, exist_ok=True)
+    await asyncio.to_thread(save_wav, path, samples, sample_rate)
+    try:
+        await asyncio.to_thread(
+            process_audio_task.apply_async, (path, watcher_id, metadata), {"cleanup": True}, task_id=job_id
+        )
+    except Exception:
+        os.remove(path)
+        raise
+    return JobStatus(job_id=job_id, status="queued")
+
+def job_status(job_id: str) -> Optional[JobStatus]:
+    """Current state of a job from the Celery result backend, or None for an unknown id"""
+    from celery.result import AsyncResult
+    from worker import app
+
+    result = AsyncResult(job_id, app=app)
+    status = JOB_STATES.get(result.state, "queued")
+    # The backend reports ids it has never seen as PENDING too; a queued job
+    # still has its upload on disk
+    if status == "queued" and not os.path.exists(upload_path(job_id)):
+        return None
+    if status == "done":
+        return JobStatus(job_id=job_id, status=status, result=result.result)
+    if status == "failed":
+        return JobStatus(job_id=job_id, status=status, error=str(result.result))
+    return JobStatus(job_id=job_id, status=status)
+
+async def job_events(job_id: str, first: JobStatus) -> AsyncIterator[str]:
+    """Server-sent events: the job's status each time it changes, until it finishes"""
+    status, sent_at = first, time.monotonic()
+    yield f"event: status\ndata: {status.model_dump_json()}\n\n"
+    while status.status not in FINISHED_STATES:
+        await asyncio.sleep(JOB_POLL_SEC)
+        # The result backend client blocks, so poll it off the event loop
+        current = await asyncio.to_thread(job_status, job_id)
+        if current is None:
+            yield f"event: error\ndata: {json.dumps({'detail': 'Job result expired'})}\n\n"
+            return
+        if current.status != status.status:
+            status, sent_at = current, time.monotonic()
+            yield f"event: status\ndata: {status.model_dump_json()}\n\n"
+        elif time.monotonic() - sent_at >= JOB_HEARTBEAT_SEC:
+            sent_at = time.monotonic()
+            yield ": keep-alive\n\n"
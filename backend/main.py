@@ -1,6 +1,14 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse
+from engine.asr import preload_models
+from engine.cache import get_transcription_cache
+from engine.metrics import metrics
+from engine.registry import registry
+from database import SessionLocal
+from services import EntityConfigService
 import os
+import threading
 
 app = FastAPI(title="Zoo Keeper AI Assistant API", description="AI assistant for zoo keepers that converts voice observations to structured data")
 
@@ -17,18 +25,110 @@ app.add_middleware(
 from .routers import router
 app.include_router(router)
 
+# Load and warm up models once per process so requests only pay for inference
+_models_ready = threading.Event()
+
+def _warm_models():
+    """Pick up the saved entity config, then load and warm the models"""
+    try:
+        # Streaming sessions use the entity config too, so apply the saved one first
+        db = SessionLocal()
+        try:
+            EntityConfigService(db).sync(force=True)
+        finally:
+            db.close()
+        if os.getenv("PRELOAD_MODELS", "1") == "1":
+            preload_models()
+    finally:
+        _models_ready.set()
+
+@app.on_event("startup")
+async def load_models():
+    # Warm up off the startup path so health checks pass right away; requests
+    # that arrive first load the models they need through the registry
+    threading.Thread(target=_warm_models, name="model-warmup", daemon=True).start()
+
 # Health check endpoint
 @app.get("/api/health")
 async def health_check():
     return {"status": "healthy"}
 
+# Readiness endpoint: 503 until the background warmup has finished
+@app.get("/api/ready")
+async def readiness_check():
+    if not _models_ready.is_set():
+        return JSONResponse({"status": "warming_up"}, status_code=503)
+    return {"status": "ready"}
+
+# Resident models endpoint
+@app.get("/api/models")
+async def get_models():
+    """Report which models are loaded in this process"""
+    return registry.status()
+
+# Transcription cache endpoint
+@app.get("/api/cache")
+async def get_cache_stats():
+    """Report transcription and NER sentence cache hit rates and memory use"""
+    stats = get_transcription_cache().stats()
+    if registry.is_loaded("ner"):
+        stats["ner"] = registry.get("ner").cache_stats()
+    return stats
+
+def _collect_model_metrics():
+    load_time = metrics.gauge("zoo_model_load_seconds", "Time taken to load each resident model", ["model"])
+    loaded = metrics.gauge("zoo_model_loaded", "Whether the model is resident in this process", ["model"])
+    for name, status in registry.status().items():
+        loaded.set(1 if status["loaded"] else 0, model=name)
+        if status["load_time_sec"] is not None:
+            load_time.set(status["load_time_sec"], model=name)
+
+def _collect_cache_metrics():
+    stats = get_transcription_cache().stats()
+    hits = metrics.counter("zoo_transcription_cache_hits_total", "Transcription cache hits", ["tier"])
+    misses = metrics.counter("zoo_transcription_cache_misses_total", "Transcription cache misses", ["tier"])
+    hits.set_total(stats["memory"]["hits"], tier="memory")
+    misses.set_total(stats["memory"]["misses"], tier="memory")
+    if stats["redis"]:
+        hits.set_total(stats["redis"]["hits"], tier="redis")
+        misses.set_total(stats["redis"]["misses"], tier="redis")
+    metrics.gauge("zoo_transcription_cache_bytes", "Bytes held by the in-process cache").set(stats["memory"]["bytes"])
+
+def _collect_ner_cache_metrics():
+    if not registry.is_loaded("ner"):
+        return
+    stats = registry.get("ner").cache_stats()
+    if not stats["enabled"]:
+        return
+    metrics.counter("zoo_ner_cache_hits_total", "NER sentence cache hits").set_total(stats["hits"])
+    metrics.counter("zoo_ner_cache_misses_total", "NER sentence cache misses").set_total(stats["misses"])
+    metrics.gauge("zoo_ner_cache_bytes", "Bytes held by the NER sentence cache").set(stats["bytes"])
+    metrics.gauge("zoo_ner_cache_hit_ratio", "Share of sentences served from the NER cache").set(stats["hit_rate"])
+
+_celery_redis = None
+
+def _collect_queue_metrics():
+    """Pending Celery jobs, read from the broker list the worker consumes"""
+    global _celery_redis
+    if _celery_redis is None:
+        import redis
+        _celery_redis = redis.Redis.from_url(
+            os.getenv("REDIS_URL", "redis://localhost:6379/0"), socket_timeout=0.2, socket_connect_timeout=0.2
+        )
+    depth = _celery_redis.llen("celery")
+    metrics.gauge("zoo_queue_depth", "Items waiting to be processed", ["queue"]).set(depth, queue="celery")
+
+metrics.add_collector(_collect_model_metrics)
+metrics.add_collector(_collect_cache_metrics)
+metrics.add_collector(_collect_ner_cache_metrics)
+metrics.add_collector(_collect_queue_metrics)
+
 # Metrics endpoint
-@app.get("/api/metrics")
-async def get_metrics():
-    """Get performance metrics"""
-    # In a real implementation, we would collect and return actual metrics
-    # For now, we'll return a placeholder response
-    return {"metrics": "Performance metrics placeholder"}
+@app.get("/api/metrics", response_class=PlainTextResponse)
+def get_metrics():
+    """Expose stage latencies, RTF, queue depth, model and cache metrics for Prometheus"""
+    # Sync handler: collectors may touch Redis, so keep them off the event loop
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
 
 if __name__ == "__main__":
     import uvicorn
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Text, JSON
+from sqlalchemy import Column, Integer, String, Float, Date, DateTime, ForeignKey, Text, JSON, Index
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 from datetime import datetime
@@ -27,6 +27,13 @@ class Observation(Base):
     
     animal = relationship("Animal", back_populates="observations")
     entities = relationship("ObservationEntity", back_populates="observation")
+    
+    # Listings filter on animal or watcher and page newest first by (ts, id)
+    __table_args__ = (
+        Index("ix_observations_animal_id_ts_id", "animal_id", "ts", "id"),
+        Index("ix_observations_watcher_id_ts_id", "watcher_id", "ts", "id"),
+        Index("ix_observations_ts_id", "ts", "id"),
+    )
 
 class ObservationEntity(Base):
     __tablename__ = "observation_entities"
@@ -48,4 +55,25 @@ class Relation(Base):
     ts = Column(DateTime, default=datetime.utcnow)
     
     src_animal = relationship("Animal", foreign_keys=[src_animal_id])
-    dst_animal = relationship("Animal", foreign_keys=[dst_animal_id])
\ No newline at end of file
+    dst_animal = relationship("Animal", foreign_keys=[dst_animal_id])
+
+class EntityConfigVersion(Base):
+    __tablename__ = "entity_configs"
+    
+    # Every saved config is a new row; the id is its version
+    id = Column(Integer, primary_key=True, index=True)
+    config = Column(JSON)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+class DailyAnimalReport(Base):
+    __tablename__ = "daily_reports"
+    
+    # One row per animal and (UTC) day, updated in the transaction that inserts
+    # each observation so reports never scan observation payloads
+    animal_id = Column(Integer, ForeignKey("animals.id"), primary_key=True)
+    day = Column(Date, primary_key=True, index=True)
+    observations = Column(Integer, default=0, nullable=False)
+    critical_alerts = Column(Integer, default=0, nullable=False)
+    warnings = Column(Integer, default=0, nullable=False)
+    # Newest value of each vitals field seen that day
+    latest_vitals = Column(JSON)
@@ -1,8 +1,17 @@
-from sqlalchemy.orm import Session
-from models import Animal, Observation, ObservationEntity, Relation
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, selectinload
+from models import Animal, Observation, ObservationEntity, Relation, EntityConfigVersion, DailyAnimalReport
+from sqlalchemy import JSON, cast, delete, func, insert, literal, select, tuple_
+from sqlalchemy.engine import Row
 from schemas import AnimalCreate, ObservationCreate, ObservationEntityCreate
-from typing import List, Optional
-from datetime import datetime
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+from datetime import date, datetime, time, timedelta
+import itertools
+
+# Alert severities counted as critical in daily reports; any other alert is a warning
+CRITICAL_SEVERITIES = ("critical", "high")
+# Vitals fields kept as the latest values in daily reports
+REPORT_VITALS = ("temperature_c", "weight_kg")
 
 class AnimalRepository:
     def __init__(self, db: Session):
@@ -35,12 +44,64 @@ class ObservationRepository:
     def get_observations(self, animal_id: Optional[int] = None, watcher_id: Optional[int] = None, 
                          start_date: Optional[datetime] = None, end_date: Optional[datetime] = None,
                          skip: int = 0, limit: int = 100) -> List[Observation]:
-        query = self.db.query(Observation)
+        query = self._filter(self.db.query(Observation), animal_id, watcher_id, start_date, end_date)
+        return query.offset(skip).limit(limit).all()
+    
+    def get_observations_page(self, animal_id: Optional[int] = None, watcher_id: Optional[int] = None,
+                              start_date: Optional[datetime] = None, end_date: Optional[datetime] = None,
+                              after: Optional[Tuple[datetime, int]] = None, limit: int = 100) -> List[Observation]:
+        """Newest first by (ts, id), starting after the `after` position, with entities loaded
+        
+        Seeking past the cursor instead of OFFSET keeps deep pages as fast as the first,
+        and the entities of the whole page come from one extra query.
+        """
+        return self.db.scalars(self.page_query(animal_id, watcher_id, start_date, end_date, after, limit)).all()
+    
+    @classmethod
+    def page_query(cls, animal_id: Optional[int], watcher_id: Optional[int], start_date: Optional[datetime],
+                   end_date: Optional[datetime], after: Optional[Tuple[datetime, int]], limit: int):
+        query = cls._filter(
+            select(Observation).options(selectinload(Observation.entities)),
+            animal_id, watcher_id, start_date, end_date
+        )
+        if after:
+            query = query.filter(tuple_(Observation.ts, Observation.id) < after)
+        return query.order_by(Observation.ts.desc(), Observation.id.desc()).limit(limit)
+    
+    def stream_observations(self, animal_id: Optional[int] = None, watcher_id: Optional[int] = None,
+                            start_date: Optional[datetime] = None, end_date: Optional[datetime] = None,
+                            batch_size: int = 1000) -> Iterator[Tuple[Row, Dict[str, Any]]]:
+        """Observations in (ts, id) order with their entities, read through a server-side cursor
         
-        if animal_id:
+        Rows are fetched `batch_size` at a time as plain tuples rather than ORM objects,
+        which would pile up in the session, so memory stays flat however many match.
+        """
+        query = self.export_query(animal_id, watcher_id, start_date, end_date)
+        rows = self.db.execute(query, execution_options={"yield_per": batch_size})
+        # The join repeats an observation once per entity, on consecutive rows
+        for _, group in itertools.groupby(rows, key=lambda row: row.id):
+            group = list(group)
+            yield group[0], {row.type: row.payload_json for row in group if row.type is not None}
+    
+    @classmethod
+    def export_query(cls, animal_id: Optional[int], watcher_id: Optional[int],
+                     start_date: Optional[datetime], end_date: Optional[datetime]):
+        return cls._filter(
+            select(
+                Observation.id, Observation.ts, Observation.animal_id, Observation.watcher_id,
+                Observation.raw_text, Observation.confidence, ObservationEntity.type, ObservationEntity.payload_json
+            ).outerjoin(ObservationEntity, ObservationEntity.observation_id == Observation.id),
+            animal_id, watcher_id, start_date, end_date
+        ).order_by(Observation.ts, Observation.id)
+    
+    @staticmethod
+    def _filter(query, animal_id: Optional[int], watcher_id: Optional[int],
+                start_date: Optional[datetime], end_date: Optional[datetime]):
+        """Apply the listing filters to an ORM query or a select()"""
+        if animal_id is not None:
             query = query.filter(Observation.animal_id == animal_id)
         
-        if watcher_id:
+        if watcher_id is not None:
             query = query.filter(Observation.watcher_id == watcher_id)
         
         if start_date:
@@ -49,7 +110,7 @@ class ObservationRepository:
         if end_date:
             query = query.filter(Observation.ts <= end_date)
         
-        return query.offset(skip).limit(limit).all()
+        return query
     
     def create_observation(self, observation: dict) -> Observation:
         # Convert dict to Observation object
@@ -83,6 +144,166 @@ class ObservationEntityRepository:
         self.db.refresh(db_entity)
         return db_entity
 
+class ObservationUnitOfWork:
+    """Observations with their entities, written together in one transaction
+    
+    Rows are inserted with one executemany per table and a single commit; ids
+    come back through RETURNING instead of a refresh per row.
+    """
+    
+    def __init__(self, db: Session):
+        self.db = db
+        self._pending: List[Tuple[dict, Dict[str, Any]]] = []
+    
+    def add(self, observation: dict, entities: Dict[str, Any]):
+        """Queue an observation and its entities, keyed by entity type"""
+        self._pending.append((observation, entities))
+    
+    def commit(self) -> List[int]:
+        """Write everything queued so far and return the observation ids in order"""
+        if not self._pending:
+            return []
+        # Timestamps are set here rather than by the column default so the
+        # daily rollup buckets each observation under the day it is stored with
+        now = datetime.utcnow()
+        rows = [
+            {
+                "ts": observation.get("ts") or now,
+                "animal_id": observation["animal_id"],
+                "watcher_id": observation["watcher_id"],
+                "raw_text": observation["raw_text"],
+                "confidence": observation["confidence"]
+            }
+            for observation, _ in self._pending
+        ]
+        try:
+            observation_ids = self.db.scalars(
+                insert(Observation).returning(Observation.id, sort_by_parameter_order=True), rows
+            ).all()
+            entity_rows = [
+                {"observation_id": observation_id, "type": entity_type, "payload_json": payload}
+                for observation_id, (_, entities) in zip(observation_ids, self._pending)
+                for entity_type, payload in entities.items()
+            ]
+            if entity_rows:
+                self.db.execute(insert(ObservationEntity), entity_rows)
+            DailyReportRepository(self.db).add(daily_rollup(
+                (row["animal_id"], row["ts"], entities) for row, (_, entities) in zip(rows, self._pending)
+            ))
+            self.db.commit()
+        except Exception:
+            self.db.rollback()
+            raise
+        self._pending = []
+        return observation_ids
+
+def daily_rollup(observations: Iterable[Tuple[int, datetime, Dict[str, Any]]]) -> Dict[Tuple[int, date], Dict[str, Any]]:
+    """Daily report increments keyed by (animal_id, day) for (animal_id, ts, entities) in ts order"""
+    rollups = {}
+    for animal_id, ts, entities in observations:
+        if animal_id is None:
+            continue
+        rollup = rollups.setdefault((animal_id, ts.date()), {
+            "observations": 0, "critical_alerts": 0, "warnings": 0, "latest_vitals": {}
+        })
+        rollup["observations"] += 1
+        alert = entities.get("alert")
+        if alert:
+            if str(alert.get("severity", "")).lower() in CRITICAL_SEVERITIES:
+                rollup["critical_alerts"] += 1
+            else:
+                rollup["warnings"] += 1
+        vitals = entities.get("vitals")
+        if vitals:
+            # Later observations overwrite earlier values field by field; mentions
+            # and any other keys of the entity stay out of the report
+            rollup["latest_vitals"].update(
+                {field: vitals[field] for field in REPORT_VITALS if vitals.get(field) is not None}
+            )
+    return rollups
+
+class DailyReportRepository:
+    """Per-animal daily rollups behind /api/reports/daily"""
+    
+    def __init__(self, db: Session):
+        self.db = db
+    
+    def add(self, rollups: Dict[Tuple[int, date], Dict[str, Any]]):
+        """Add increments from daily_rollup() in the caller's transaction
+        
+        Each row is an INSERT ... ON CONFLICT DO UPDATE that adds the counts and
+        merges the vitals inside the database, so concurrent writers never lose
+        each other's updates.
+        """
+        if not rollups:
+            return
+        # The dialect modules (and the asyncpg one they pull in) stay off the API's startup path
+        from sqlalchemy.dialects import postgresql, sqlite
+        dialect = self.db.get_bind().dialect.name
+        table = DailyAnimalReport.__table__.c
+        if dialect == "postgresql":
+            statement = postgresql.insert(DailyAnimalReport)
+            jsonb = postgresql.JSONB
+            vitals = cast(
+                func.coalesce(cast(table.latest_vitals, jsonb), cast(literal("{}"), jsonb))
+                .op("||")(cast(statement.excluded.latest_vitals, jsonb)),
+                JSON
+            )
+        elif dialect == "sqlite":
+            statement = sqlite.insert(DailyAnimalReport)
+            vitals = func.json_patch(func.coalesce(table.latest_vitals, "{}"), statement.excluded.latest_vitals)
+        else:
+            raise ValueError(f"Daily report upserts support postgresql and sqlite, not {dialect}")
+        excluded = statement.excluded
+        statement = statement.on_conflict_do_update(index_elements=["animal_id", "day"], set_={
+            "observations": table.observations + excluded.observations,
+            "critical_alerts": table.critical_alerts + excluded.critical_alerts,
+            "warnings": table.warnings + excluded.warnings,
+            "latest_vitals": vitals
+        })
+        self.db.execute(statement, [
+            {"animal_id": animal_id, "day": day, **rollup} for (animal_id, day), rollup in rollups.items()
+        ])
+    
+    def get_day(self, day: date) -> List[Row]:
+        return self.db.execute(self.day_query(day)).all()
+    
+    @staticmethod
+    def day_query(day: date):
+        """A day's rollups with animal names, read through ix_daily_reports_day"""
+        return select(DailyAnimalReport, Animal.name, Animal.species).outerjoin(
+            Animal, Animal.id == DailyAnimalReport.animal_id
+        ).where(DailyAnimalReport.day == day).order_by(DailyAnimalReport.animal_id)
+    
+    def rebuild(self, start: Optional[date] = None, end: Optional[date] = None) -> int:
+        """Recompute the rollups of every day in [start, end] from the observations
+        
+        Defaults to the whole observation history. Each day is replaced in its own
+        transaction; returns the number of days written.
+        """
+        if start is None or end is None:
+            first, last = self.db.execute(select(func.min(Observation.ts), func.max(Observation.ts))).one()
+            if first is None:
+                return 0
+            start, end = start or first.date(), end or last.date()
+        observation_repo = ObservationRepository(self.db)
+        written, day = 0, start
+        while day <= end:
+            try:
+                self.db.execute(delete(DailyAnimalReport).where(DailyAnimalReport.day == day))
+                rows = observation_repo.stream_observations(
+                    start_date=datetime.combine(day, time.min), end_date=datetime.combine(day, time.max)
+                )
+                rollups = daily_rollup((row.animal_id, row.ts, entities) for row, entities in rows)
+                self.add(rollups)
+                self.db.commit()
+            except Exception:
+                self.db.rollback()
+                raise
+            written += bool(rollups)
+            day += timedelta(days=1)
+        return written
+
 class RelationRepository:
     def __init__(self, db: Session):
         self.db = db
@@ -96,4 +317,93 @@ class RelationRepository:
         self.db.add(db_relation)
         self.db.commit()
         self.db.refresh(db_relation)
-        return db_relation
\ No newline at end of file
+        return db_relation
+
+class EntityConfigRepository:
+    def __init__(self, db: Session):
+        self.db = db
+    
+    def latest_version(self) -> int:
+        """Newest saved version, or 0 when only the built-in config exists"""
+        return self.db.query(func.max(EntityConfigVersion.id)).scalar() or 0
+    
+    def get_config(self, version: int) -> Optional[EntityConfigVersion]:
+        return self.db.query(EntityConfigVersion).filter(EntityConfigVersion.id == version).first()
+    
+    def create_config(self, config: Dict[str, Any]) -> EntityConfigVersion:
+        db_config = EntityConfigVersion(config=config)
+        self.db.add(db_config)
+        self.db.commit()
+        self.db.refresh(db_config)
+        return db_config
+
+# Async counterparts used by the API. Statements are shared with the sync
+# repositories above, which Celery workers and scripts keep using
+
+class AsyncAnimalRepository:
+    def __init__(self, db: AsyncSession):
+        self.db = db
+    
+    async def get_index_rows(self) -> List[Row]:
+        """(id, name, species) of every animal, for the gazetteer"""
+        return (await self.db.execute(select(Animal.id, Animal.name, Animal.species))).all()
+
+class AsyncObservationRepository:
+    def __init__(self, db: AsyncSession):
+        self.db = db
+    
+    async def get_observation(self, observation_id: int) -> Optional[Observation]:
+        """The observation with its entities loaded"""
+        return await self.db.get(Observation, observation_id, options=[selectinload(Observation.entities)])
+    
+    async def get_observations_page(self, animal_id: Optional[int] = None, watcher_id: Optional[int] = None,
+                                    start_date: Optional[datetime] = None, end_date: Optional[datetime] = None,
+                                    after: Optional[Tuple[datetime, int]] = None, limit: int = 100) -> List[Observation]:
+        """See ObservationRepository.get_observations_page"""
+        query = ObservationRepository.page_query(animal_id, watcher_id, start_date, end_date, after, limit)
+        return (await self.db.scalars(query)).all()
+
+class AsyncObservationUnitOfWork:
+    """ObservationUnitOfWork on an AsyncSession"""
+    
+    def __init__(self, db: AsyncSession):
+        self.db = db
+        self._pending: List[Tuple[dict, Dict[str, Any]]] = []
+    
+    def add(self, observation: dict, entities: Dict[str, Any]):
+        self._pending.append((observation, entities))
+    
+    async def commit(self) -> List[int]:
+        pending, self._pending = self._pending, []
+        
+        def write(session: Session) -> List[int]:
+            unit_of_work = ObservationUnitOfWork(session)
+            for observation, entities in pending:
+                unit_of_work.add(observation, entities)
+            return unit_of_work.commit()
+        
+        # The same bulk inserts, run on the async connection
+        return await self.db.run_sync(write)
+
+class AsyncDailyReportRepository:
+    def __init__(self, db: AsyncSession):
+        self.db = db
+    
+    async def get_day(self, day: date) -> List[Row]:
+        return (await self.db.execute(DailyReportRepository.day_query(day))).all()
+
+class AsyncEntityConfigRepository:
+    def __init__(self, db: AsyncSession):
+        self.db = db
+    
+    async def latest_version(self) -> int:
+        return (await self.db.scalar(select(func.max(EntityConfigVersion.id)))) or 0
+    
+    async def get_config(self, version: int) -> Optional[EntityConfigVersion]:
+        return await self.db.get(EntityConfigVersion, version)
+    
+    async def create_config(self, config: Dict[str, Any]) -> EntityConfigVersion:
+        db_config = EntityConfigVersion(config=config)
+        self.db.add(db_config)
+        await self.db.commit()
+        return db_config
@@ -1,91 +1,184 @@
-from fastapi import APIRouter, UploadFile, File, Form, Depends, HTTPException
-from fastapi.responses import JSONResponse
-from services import TranscriptionService
-from database import get_db
-from schemas import TranscriptionResponse, EntityConfig
+from fastapi import APIRouter, UploadFile, File, Form, Depends, HTTPException, Query, WebSocket
+from fastapi.responses import JSONResponse, StreamingResponse
+from jobs import job_events, job_status, submit_job
+from services import (
+    EXPORT_FORMATS, AsyncEntityConfigService, AsyncReportService, AsyncTranscriptionService, TranscriptionService
+)
+from streaming import StreamingTranscriber, stream_format_error
+from database import get_async_db, get_db
+from schemas import DailyReport, JobStatus, TranscriptionResponse, TranscriptionPage, EntityConfig
+from engine.audio import read_wav_upload
+from engine.metrics import stage
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from typing import Optional
+import asyncio
 import os
-import uuid
 
 router = APIRouter()
 
-@router.post("/api/audio/process", response_model=TranscriptionResponse)
+# Largest PCM payload accepted by /api/audio/process (default: 200 MB, ~1h of 16 kHz stereo)
+MAX_UPLOAD_BYTES = int(os.getenv("MAX_UPLOAD_MB", "200")) * 1024 * 1024
+# Largest page served by the listing endpoints
+MAX_PAGE_SIZE = int(os.getenv("MAX_PAGE_SIZE", "500"))
+
+@router.post("/api/audio/process", response_model=TranscriptionResponse, responses={202: {"model": JobStatus}})
 async def process_audio(
     file: UploadFile = File(...), 
     watcher_id: int = Form(1),
     animal_id: Optional[int] = Form(None),
-    db: Session = Depends(get_db)
+    mode: str = Query("sync", pattern="^(sync|async)$"),
+    db: AsyncSession = Depends(get_async_db)
 ):
-    """Process uploaded WAV file"""
+    """Process uploaded WAV file, or with mode=async queue it for a worker and return a job id"""
     # Validate file type
     if not file.content_type.startswith("audio/wav"):
         raise HTTPException(status_code=400, detail="Only WAV files are supported")
     
-    # Save uploaded file temporarily
-    file_id = str(uuid.uuid4())
-    file_path = f"/tmp/{file_id}.wav"
-    
-    with open(file_path, "wb") as buffer:
-        content = await file.read()
-        buffer.write(content)
+    # Decode the upload straight into memory instead of a /tmp round-trip
+    try:
+        with stage("upload_read"):
+            samples, sample_rate = await read_wav_upload(file, MAX_UPLOAD_BYTES)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     
-    # Process the file
-    service = TranscriptionService(db)
     metadata = {}
     if animal_id:
         metadata["animal_id"] = animal_id
     
+    if mode == "async":
+        # The request only pays for ingestion; Celery workers transcribe
+        job = await submit_job(samples, sample_rate, watcher_id, metadata)
+        return JSONResponse(job.model_dump(), status_code=202, headers={"Location": f"/api/jobs/{job.job_id}"})
+    
+    # Process the audio; ASR and NER run in the bounded CPU executor
+    service = AsyncTranscriptionService(db)
     try:
-        result = service.process_wav_file(file_path, watcher_id, metadata)
-        # Clean up temporary file
-        os.remove(file_path)
-        return result
+        return await service.process_audio(samples, sample_rate, watcher_id, metadata)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
-        # Clean up temporary file
-        if os.path.exists(file_path):
-            os.remove(file_path)
         raise HTTPException(status_code=500, detail=str(e))
 
-@router.get("/api/transcriptions", response_model=list[TranscriptionResponse])
+@router.get("/api/jobs/{job_id}", response_model=JobStatus)
+def get_job(job_id: str):
+    """Poll a queued upload; `result` holds the transcription once it is done"""
+    # Sync handler: the Celery result backend client blocks
+    job = job_status(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    return job
+
+@router.get("/api/jobs/{job_id}/events")
+async def get_job_events(job_id: str):
+    """Server-sent events with the job's status on every change, ending once it is done or failed"""
+    job = await asyncio.to_thread(job_status, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    return StreamingResponse(job_events(job_id, job), media_type="text/event-stream", headers={
+        "Cache-Control": "no-cache", "X-Accel-Buffering": "no"
+    })
+
+@router.get("/api/transcriptions", response_model=TranscriptionPage)
 async def list_transcriptions(
     animal_id: Optional[int] = None, 
     watcher_id: Optional[int] = None,
     start_date: Optional[str] = None, 
     end_date: Optional[str] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """List transcriptions newest first with optional filtering; follow next_cursor for more"""
+    service = AsyncTranscriptionService(db)
+    try:
+        return await service.get_transcriptions(animal_id, watcher_id, start_date, end_date, cursor, limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/api/observations/export")
+def export_observations(
+    format: str = "ndjson",
+    animal_id: Optional[int] = None,
+    watcher_id: Optional[int] = None,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
     db: Session = Depends(get_db)
 ):
-    """List transcriptions with optional filtering"""
+    """Stream every matching observation as NDJSON or CSV, without paging"""
+    # Sync on purpose: Starlette iterates the chunks in its threadpool, so the
+    # per-row formatting stays off the event loop
     service = TranscriptionService(db)
-    return service.get_transcriptions(animal_id, watcher_id, start_date, end_date)
+    try:
+        chunks = service.export_observations(format, animal_id, watcher_id, start_date, end_date)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    # No Content-Length, so the body goes out with chunked transfer encoding
+    return StreamingResponse(chunks, media_type=EXPORT_FORMATS[format], headers={
+        "Content-Disposition": f'attachment; filename="observations.{format}"'
+    })
 
 @router.get("/api/transcriptions/{id}", response_model=TranscriptionResponse)
-async def get_transcription(id: int, db: Session = Depends(get_db)):
+async def get_transcription(id: int, db: AsyncSession = Depends(get_async_db)):
     """Get detailed transcription result"""
-    service = TranscriptionService(db)
+    service = AsyncTranscriptionService(db)
     try:
-        return service.get_transcription(id)
+        return await service.get_transcription(id)
     except ValueError as e:
         raise HTTPException(status_code=404, detail=str(e))
 
+@router.get("/api/entities/config", response_model=EntityConfig)
+async def get_entity_config(db: AsyncSession = Depends(get_async_db)):
+    """Get the entity config in effect"""
+    return await AsyncEntityConfigService(db).get_config()
+
 @router.post("/api/entities/config", response_model=EntityConfig)
-async def configure_entities(config: EntityConfig):
-    """Configure entity extraction rules"""
-    # In a real implementation, we would save these rules to a database or file
-    # For now, we'll just return the config as received
-    return config
+async def configure_entities(config: EntityConfig, db: AsyncSession = Depends(get_async_db)):
+    """Save a new entity config version and apply it without a restart"""
+    # Rules and validators are compiled first, so a bad one is rejected with 400
+    try:
+        return await AsyncEntityConfigService(db).save_config(config)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
-@router.get("/api/animals/{id}/log", response_model=list[TranscriptionResponse])
-async def get_animal_log(id: int, db: Session = Depends(get_db)):
-    """Get animal observation log"""
-    service = TranscriptionService(db)
-    return service.get_transcriptions(animal_id=id)
+@router.get("/api/animals/{id}/log", response_model=TranscriptionPage)
+async def get_animal_log(
+    id: int,
+    cursor: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Get animal observation log, newest first; follow next_cursor for more"""
+    service = AsyncTranscriptionService(db)
+    try:
+        return await service.get_transcriptions(animal_id=id, cursor=cursor, limit=limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
-@router.get("/api/reports/daily")
-async def get_daily_report(date: Optional[str] = None, db: Session = Depends(get_db)):
-    """Get daily report"""
-    # In a real implementation, we would aggregate data for the specified date
-    # For now, we'll return a placeholder response
-    return {"date": date or "today", "report": "Daily report placeholder"}
+@router.get("/api/reports/daily", response_model=DailyReport)
+async def get_daily_report(date: Optional[str] = None, db: AsyncSession = Depends(get_async_db)):
+    """Get daily report for a YYYY-MM-DD (UTC) day, today by default"""
+    # One indexed read of the daily rollups; observations are never scanned
+    try:
+        return await AsyncReportService(db).daily_report(date)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
-# WebSocket endpoint would be implemented separately
\ No newline at end of file
+@router.websocket("/ws/transcribe")
+async def transcribe_stream(
+    websocket: WebSocket,
+    lang: str = "ru",
+    session_id: Optional[str] = None,
+    sample_rate: int = 16000,
+    channels: int = 1,
+    entities: bool = True
+):
+    """Stream raw 16-bit PCM and receive partial/final transcripts and live entities"""
+    await websocket.accept()
+    # Reject formats the converter cannot handle before a recognizer is taken
+    error = stream_format_error(sample_rate, channels)
+    if error:
+        await websocket.send_json({"event": "error", "message": error})
+        await websocket.close(code=1003)
+        return
+    await StreamingTranscriber(websocket, sample_rate, channels, entities).run()
\ No newline at end of file
@@ -12,6 +12,9 @@ class EntityField(BaseModel):
 class EntityConfig(BaseModel):
     entities: List[EntityField]
     rules: Dict[str, str]
+    # Extra lookup tables per "entity.field", e.g. {"animal.species": {"зебра": "zebra"}}
+    normalization: Optional[Dict[str, Dict[str, str]]] = {}
+    version: Optional[int] = None
 
 # Response schemas
 class TranscriptionResponse(BaseModel):
@@ -23,6 +26,36 @@ class TranscriptionResponse(BaseModel):
     entities: Dict[str, Dict[str, Any]]
     timeline: List[Dict[str, Any]]
 
+class JobStatus(BaseModel):
+    job_id: str
+    # queued, processing, done or failed
+    status: str
+    result: Optional[TranscriptionResponse] = None
+    error: Optional[str] = None
+
+class TranscriptionPage(BaseModel):
+    items: List[TranscriptionResponse]
+    # Pass back as `cursor` for the next page; null on the last page
+    next_cursor: Optional[str] = None
+
+class DailyAnimalSummary(BaseModel):
+    id: int
+    name: Optional[str] = None
+    species: Optional[str] = None
+    observations: int
+    alerts: int
+    latest_vitals: Dict[str, Any] = {}
+
+class DailyReportSummary(BaseModel):
+    total_observations: int
+    critical_alerts: int
+    warnings: int
+
+class DailyReport(BaseModel):
+    date: str
+    animals: List[DailyAnimalSummary]
+    summary: DailyReportSummary
+
 class WebSocketStats(BaseModel):
     rtf: float
     cpu_load: float
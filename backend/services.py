@@ -1,68 +1,281 @@
-from repositories import AnimalRepository, ObservationRepository, ObservationEntityRepository
-from engine.asr import VoskASR, WhisperASR
-from engine.ner import EntityExtractor
-from engine.normalization import EntityNormalizer
-from models import Observation
-from schemas import TranscriptionResponse
+from repositories import (
+    AnimalRepository, ObservationRepository, ObservationEntityRepository, ObservationUnitOfWork, EntityConfigRepository,
+    AsyncAnimalRepository, AsyncObservationRepository, AsyncObservationUnitOfWork, AsyncEntityConfigRepository,
+    AsyncDailyReportRepository, REPORT_VITALS
+)
+from engine.audio import load_wav
+from engine.cache import get_transcription_cache
+from engine.entity_config import CompiledEntityConfig
+from engine.metrics import stage
+from engine.registry import registry
+from models import Animal, Observation
+from schemas import (
+    TranscriptionResponse, TranscriptionPage, EntityConfig, DailyReport, DailyAnimalSummary, DailyReportSummary
+)
+import numpy as np
+from datetime import date, datetime
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Any, Iterator, List, Optional, Tuple
+import asyncio
+import base64
+import csv
+import io
+import json
+import logging
 import os
-import uuid
-from typing import Dict, Any, List
 import time
-from sqlalchemy.orm import Session
+from sqlalchemy import event
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, object_session
 
-class TranscriptionService:
+logger = logging.getLogger(__name__)
+
+# Seconds between re-reading the animals table into the gazetteer; changes made
+# through this process are applied immediately by the listeners below
+GAZETTEER_SYNC_SEC = float(os.getenv("GAZETTEER_SYNC_SEC", "60"))
+_gazetteer_synced_at = float("-inf")
+
+# Export formats and their media types
+EXPORT_FORMATS = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+EXPORT_CSV_COLUMNS = ["id", "ts", "animal_id", "watcher_id", "confidence", "text", "entities"]
+# Characters of output collected before a chunk is sent
+EXPORT_CHUNK_CHARS = 64 * 1024
+
+# Seconds between checks for an entity config saved by another process
+ENTITY_CONFIG_SYNC_SEC = float(os.getenv("ENTITY_CONFIG_SYNC_SEC", "5"))
+_entity_config_checked_at = float("-inf")
+
+# Threads running ASR, NER and other CPU-bound stages for API requests. Bounded so
+# a burst of uploads queues here instead of taking the event loop's CPU time
+API_CPU_WORKERS = int(os.getenv("API_CPU_WORKERS", "2"))
+cpu_executor = ThreadPoolExecutor(max_workers=API_CPU_WORKERS, thread_name_prefix="api-cpu")
+
+async def run_cpu(func: Callable, *args):
+    """Run a CPU-bound call in the bounded executor so the event loop keeps serving"""
+    return await asyncio.get_running_loop().run_in_executor(cpu_executor, func, *args)
+
+# Animal changes reach the gazetteer once their transaction commits; flushes
+# only record them on the session, so a rollback never leaves a stale entry
+@event.listens_for(Animal, "after_insert")
+@event.listens_for(Animal, "after_update")
+def _index_animal(mapper, connection, animal):
+    object_session(animal).info.setdefault("gazetteer_changes", {})[animal.id] = (animal.name, animal.species)
+
+@event.listens_for(Animal, "after_delete")
+def _unindex_animal(mapper, connection, animal):
+    object_session(animal).info.setdefault("gazetteer_changes", {})[animal.id] = None
+
+@event.listens_for(Session, "after_commit")
+def _apply_gazetteer_changes(session):
+    changes = session.info.pop("gazetteer_changes", None)
+    if not changes or not registry.is_loaded("gazetteer"):
+        return
+    gazetteer = registry.get("gazetteer")
+    for animal_id, animal in changes.items():
+        if animal is None:
+            gazetteer.remove_animal(animal_id)
+        else:
+            gazetteer.set_animal(animal_id, *animal)
+
+@event.listens_for(Session, "after_rollback")
+def _discard_gazetteer_changes(session):
+    session.info.pop("gazetteer_changes", None)
+
+def encode_cursor(observation: Observation) -> str:
+    """Opaque listing position just after `observation`"""
+    position = f"{observation.ts.isoformat()}|{observation.id}"
+    return base64.urlsafe_b64encode(position.encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    try:
+        position = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        ts, observation_id = position.split("|")
+        return datetime.fromisoformat(ts), int(observation_id)
+    except ValueError:
+        raise ValueError(f"Invalid cursor '{cursor}'")
+
+def parse_dates(start_date: Optional[str], end_date: Optional[str]) -> Tuple[Optional[datetime], Optional[datetime]]:
+    return (
+        datetime.fromisoformat(start_date) if start_date else None,
+        datetime.fromisoformat(end_date) if end_date else None,
+    )
+
+def listing_item(observation: Observation) -> TranscriptionResponse:
+    """An observation with its loaded entities as returned by listings"""
+    return TranscriptionResponse(
+        id=f"obs_{observation.id}",
+        status="done",
+        duration_sec=0.0,  # Not applicable for listing
+        text=observation.raw_text,
+        entities={e.type: e.payload_json for e in observation.entities},
+        timeline=[]
+    )
+
+def compile_entity_config(config: EntityConfig) -> CompiledEntityConfig:
+    # Compiling first rejects bad patterns and validators before anything is stored
+    return CompiledEntityConfig([entity.dict() for entity in config.entities], config.rules, config.normalization)
+
+def _entity_config_check_due(force: bool) -> bool:
+    global _entity_config_checked_at
+    if not force and time.monotonic() - _entity_config_checked_at < ENTITY_CONFIG_SYNC_SEC:
+        return False
+    _entity_config_checked_at = time.monotonic()
+    return True
+
+def _gazetteer_sync_due() -> bool:
+    global _gazetteer_synced_at
+    if time.monotonic() - _gazetteer_synced_at < GAZETTEER_SYNC_SEC:
+        return False
+    _gazetteer_synced_at = time.monotonic()
+    return True
+
+def apply_entity_config(config: CompiledEntityConfig):
+    """Switch this process's models to a compiled entity config"""
+    normalizer = registry.get("normalizer")
+    previous = normalizer.tables()
+    normalizer.apply_config(config)
+    if registry.is_loaded("gazetteer"):
+        # Re-index only the lookup tables that changed
+        gazetteer = registry.get("gazetteer")
+        for (entity, field), table in normalizer.tables().items():
+            if previous.get((entity, field)) != table:
+                gazetteer.remove_source(f"{entity}.{field}")
+                gazetteer.add_map(table, entity, field)
+    if registry.is_loaded("ner"):
+        # Swap between extractions, so none of them mixes two config versions
+        with registry.acquire("ner") as extractor:
+            extractor.apply_config(config)
+
+class EntityConfigService:
+    """Entity configs persisted as versions and compiled once per process"""
+    
     def __init__(self, db: Session):
         self.db = db
-        self.animal_repo = AnimalRepository(db)
-        self.observation_repo = ObservationRepository(db)
-        self.entity_repo = ObservationEntityRepository(db)
-        
-        # Initialize ASR models
-        vosk_model_path = os.getenv("VOSK_MODEL_PATH", "models/vosk-model-small-ru-0.22")
-        self.vosk_asr = VoskASR(vosk_model_path)
-        whisper_model_size = os.getenv("WHISPER_MODEL_SIZE", "base")
-        self.whisper_asr = WhisperASR(whisper_model_size)
-        
-        # Initialize NER and normalization
-        self.entity_extractor = EntityExtractor()
-        self.entity_normalizer = EntityNormalizer()
+        self.config_repo = EntityConfigRepository(db)
     
-    def process_wav_file(self, file_path: str, watcher_id: int, metadata: Dict[Any, Any] = {}) -> TranscriptionResponse:
-        """Process WAV file with Whisper ASR and extract entities"""
+    def get_config(self) -> EntityConfig:
+        self.sync(force=True)
+        return EntityConfig(**registry.get("normalizer").config.to_dict())
+    
+    def save_config(self, config: EntityConfig) -> EntityConfig:
+        """Compile, persist and apply a config; other processes pick it up on their next sync"""
+        compiled = compile_entity_config(config)
+        data = compiled.to_dict()
+        del data["version"]
+        compiled.version = self.config_repo.create_config(data).id
+        apply_entity_config(compiled)
+        return EntityConfig(**compiled.to_dict())
+    
+    def sync(self, force: bool = False):
+        """Apply the newest saved config if this process runs an older one"""
+        if not _entity_config_check_due(force):
+            return
+        try:
+            version = self.config_repo.latest_version()
+            if version == registry.get("normalizer").config.version:
+                return
+            row = self.config_repo.get_config(version)
+        except SQLAlchemyError as e:
+            # Keep the current config (e.g. before migrations have run)
+            self.db.rollback()
+            logger.warning("Could not check for a new entity config: %s", e)
+            return
+        apply_entity_config(CompiledEntityConfig.from_dict(row.config, row.id))
+
+class AsyncEntityConfigService:
+    """EntityConfigService on an AsyncSession, for the API"""
+    
+    def __init__(self, db: AsyncSession):
+        self.db = db
+        self.config_repo = AsyncEntityConfigRepository(db)
+    
+    async def get_config(self) -> EntityConfig:
+        await self.sync(force=True)
+        return EntityConfig(**registry.get("normalizer").config.to_dict())
+    
+    async def save_config(self, config: EntityConfig) -> EntityConfig:
+        compiled = compile_entity_config(config)
+        data = compiled.to_dict()
+        del data["version"]
+        compiled.version = (await self.config_repo.create_config(data)).id
+        # Re-indexing changed gazetteer tables is CPU work
+        await run_cpu(apply_entity_config, compiled)
+        return EntityConfig(**compiled.to_dict())
+    
+    async def sync(self, force: bool = False):
+        if not _entity_config_check_due(force):
+            return
+        try:
+            version = await self.config_repo.latest_version()
+            if version == registry.get("normalizer").config.version:
+                return
+            row = await self.config_repo.get_config(version)
+        except SQLAlchemyError as e:
+            await self.db.rollback()
+            logger.warning("Could not check for a new entity config: %s", e)
+            return
+        await run_cpu(apply_entity_config, CompiledEntityConfig.from_dict(row.config, row.id))
+
+class TranscriptionPipeline:
+    """The database-free stages of processing an upload: ASR, NER and the response
+    
+    Shared by the sync service (Celery) and the async one (API), which runs these
+    CPU-bound calls in the bounded executor.
+    """
+    
+    def __init__(self):
+        # ASR, NER and normalization models are shared process-wide
+        # and only loaded on first use
+        self.models = registry
+        self.cache = get_transcription_cache()
+    
+    def transcribe(self, samples: np.ndarray, sample_rate: int) -> Tuple[dict, float]:
+        """Transcription result and the seconds it took"""
         start_time = time.time()
         
-        # Transcribe with Whisper
-        transcription_result = self.whisper_asr.transcribe_file(file_path)
-        duration = time.time() - start_time
-        
-        # Extract text and confidence
-        text = transcription_result["text"]
-        confidence = 0.0  # Whisper doesn't provide segment-level confidence in this simple implementation
+        # Duplicate uploads and task retries are answered from the cache
+        asr = self.models.get("asr")
+        cache_key = self.cache.make_key(samples, sample_rate, asr.name, "ru", asr.settings)
+        transcription_result = self.cache.get(cache_key)
+        if transcription_result is None:
+            # Transcribe with the configured batch backend (ASR_BACKEND)
+            with self.models.acquire("asr") as asr:
+                transcription_result = asr.transcribe_audio(samples, sample_rate)
+            self.cache.put(cache_key, transcription_result)
+        return transcription_result, time.time() - start_time
+    
+    def analyze(self, transcription_result: dict) -> Tuple[str, Dict[str, Any]]:
+        """Text of a transcription and its normalized, validated entities"""
+        text = transcription_result["text"].strip()
         
         # Extract entities
-        entities = self.entity_extractor.extract_entities(text)
+        with self.models.acquire("ner") as entity_extractor:
+            entities = entity_extractor.extract_entities(text)
         
         # Normalize entities
-        normalized_entities = self.entity_normalizer.normalize_entities(entities)
-        validated_entities = self.entity_normalizer.validate_entities(normalized_entities)
-        
-        # Create observation in database
-        animal_id = metadata.get("animal_id", 1)  # Default to 1 if not provided
-        observation = self.observation_repo.create_observation({
+        entity_normalizer = self.models.get("normalizer")
+        with stage("normalization"):
+            normalized_entities = entity_normalizer.normalize_entities(entities)
+            validated_entities = entity_normalizer.validate_entities(normalized_entities)
+        return text, validated_entities
+    
+    def sync_animals(self, rows: List[Any]):
+        self.models.get("gazetteer").sync_animals(rows)
+    
+    def observation(self, text: str, entities: Dict[str, Any], watcher_id: int, metadata: Dict[Any, Any]) -> dict:
+        """Observation row for a processed upload"""
+        # Fall back to the animal the gazetteer resolved, then to 1
+        animal_id = metadata.get("animal_id") or entities.get("animal", {}).get("id", 1)
+        return {
             "animal_id": animal_id,
             "watcher_id": watcher_id,
             "raw_text": text,
-            "confidence": confidence
-        })
-        
-        # Create observation entities in database
-        for entity_type, entity_data in validated_entities.items():
-            self.entity_repo.create_observation_entity({
-                "observation_id": observation.id,
-                "type": entity_type,
-                "payload_json": entity_data
-            })
-        
+            "confidence": 0.0  # Whisper doesn't provide segment-level confidence in this simple implementation
+        }
+    
+    def response(self, observation_id: int, transcription_result: dict, text: str, entities: Dict[str, Any],
+                 duration: float, metadata: Dict[Any, Any]) -> TranscriptionResponse:
         # Calculate WER if reference text is provided (simplified)
         wer = 0.0
         if "reference_text" in metadata:
@@ -71,14 +284,20 @@ class TranscriptionService:
             reference = metadata["reference_text"]
             wer = self._calculate_wer(reference, text)
         
+        # Speech segments carry file-relative offsets from the VAD stage
+        timeline = [
+            {"t": segment["start"], "end": segment["end"], "text": segment["text"].strip()}
+            for segment in transcription_result.get("segments", [])
+        ]
+        
         return TranscriptionResponse(
-            id=f"obs_{observation.id}",
+            id=f"obs_{observation_id}",
             status="done",
             duration_sec=duration,
             wer=wer,
             text=text,
-            entities=validated_entities,
-            timeline=[]
+            entities=entities,
+            timeline=timeline
         )
     
     def _calculate_wer(self, reference: str, hypothesis: str) -> float:
@@ -97,37 +316,113 @@ class TranscriptionService:
         wer = word_diff / len(reference_words)
         
         return min(wer, 1.0)  # Cap at 1.0
+
+class TranscriptionService:
+    def __init__(self, db: Session):
+        self.db = db
+        self.animal_repo = AnimalRepository(db)
+        self.observation_repo = ObservationRepository(db)
+        self.entity_repo = ObservationEntityRepository(db)
+        self.entity_configs = EntityConfigService(db)
+        self.pipeline = TranscriptionPipeline()
+    
+    def process_wav_file(self, file_path: str, watcher_id: int, metadata: Dict[Any, Any] = {}) -> TranscriptionResponse:
+        """Process WAV file with the batch ASR backend and extract entities"""
+        with stage("audio_decode"):
+            samples, sample_rate = load_wav(file_path)
+        return self.process_audio(samples, sample_rate, watcher_id, metadata)
+    
+    def process_audio(self, samples: np.ndarray, sample_rate: int, watcher_id: int,
+                      metadata: Dict[Any, Any] = {}) -> TranscriptionResponse:
+        """Process PCM audio that was decoded in memory, without a temporary file"""
+        transcription_result, duration = self.pipeline.transcribe(samples, sample_rate)
+        return self._store_transcription(transcription_result, duration, watcher_id, metadata)
+    
+    def _store_transcription(self, transcription_result: dict, duration: float, watcher_id: int,
+                             metadata: Dict[Any, Any]) -> TranscriptionResponse:
+        """Extract entities from a transcription and persist the observation"""
+        self.entity_configs.sync()
+        self._sync_gazetteer()
+        text, entities = self.pipeline.analyze(transcription_result)
+        
+        # The observation and its entities go in with a single commit
+        with stage("db_write"):
+            unit_of_work = ObservationUnitOfWork(self.db)
+            unit_of_work.add(self.pipeline.observation(text, entities, watcher_id, metadata), entities)
+            observation_id, = unit_of_work.commit()
+        
+        return self.pipeline.response(observation_id, transcription_result, text, entities, duration, metadata)
+    
+    def _sync_gazetteer(self):
+        """Pick up animals added by other processes; only changed rows are re-indexed"""
+        if _gazetteer_sync_due():
+            self.pipeline.sync_animals(self.db.query(Animal.id, Animal.name, Animal.species).all())
     
-    def get_transcriptions(self, animal_id: int = None, watcher_id: int = None, 
-                          start_date: str = None, end_date: str = None) -> List[TranscriptionResponse]:
-        """Get list of transcriptions with optional filtering"""
-        # Convert string dates to datetime objects if provided
-        from datetime import datetime
-        start_dt = datetime.fromisoformat(start_date) if start_date else None
-        end_dt = datetime.fromisoformat(end_date) if end_date else None
+    def get_transcriptions(self, animal_id: int = None, watcher_id: int = None,
+                          start_date: str = None, end_date: str = None,
+                          cursor: Optional[str] = None, limit: int = 100) -> TranscriptionPage:
+        """Get one page of transcriptions, newest first, with optional filtering"""
+        start_dt, end_dt = parse_dates(start_date, end_date)
         
-        observations = self.observation_repo.get_observations(
+        # One row past the page tells whether there is a next one
+        observations = self.observation_repo.get_observations_page(
             animal_id=animal_id,
             watcher_id=watcher_id,
             start_date=start_dt,
-            end_date=end_dt
+            end_date=end_dt,
+            after=decode_cursor(cursor) if cursor else None,
+            limit=limit + 1
         )
+        return self._page(observations, limit)
+    
+    @staticmethod
+    def _page(observations: List[Observation], limit: int) -> TranscriptionPage:
+        next_cursor = encode_cursor(observations[limit - 1]) if len(observations) > limit else None
+        return TranscriptionPage(items=[listing_item(obs) for obs in observations[:limit]], next_cursor=next_cursor)
+    
+    def export_observations(self, format: str, animal_id: int = None, watcher_id: int = None,
+                            start_date: str = None, end_date: str = None) -> Iterator[str]:
+        """Stream observations and their entities as NDJSON lines or CSV rows, oldest first"""
+        if format not in EXPORT_FORMATS:
+            raise ValueError(f"Unknown export format '{format}', use one of {', '.join(EXPORT_FORMATS)}")
+        # Parsed here so bad dates fail before the response starts
+        start_dt, end_dt = parse_dates(start_date, end_date)
         
-        transcriptions = []
-        for obs in observations:
-            entities = self.entity_repo.get_entities_by_observation(obs.id)
-            entity_dict = {e.type: e.payload_json for e in entities}
-            
-            transcriptions.append(TranscriptionResponse(
-                id=f"obs_{obs.id}",
-                status="done",
-                duration_sec=0.0,  # Not applicable for listing
-                text=obs.raw_text,
-                entities=entity_dict,
-                timeline=[]
-            ))
+        rows = self.observation_repo.stream_observations(animal_id, watcher_id, start_dt, end_dt)
+        return self._export_chunks(rows, format)
+    
+    def _export_chunks(self, rows: Iterator, format: str) -> Iterator[str]:
+        buffer = io.StringIO()
+        writer = csv.writer(buffer) if format == "csv" else None
+        if writer:
+            writer.writerow(EXPORT_CSV_COLUMNS)
+        
+        for obs, entities in rows:
+            ts = obs.ts.isoformat() if obs.ts else None
+            if writer:
+                writer.writerow([
+                    f"obs_{obs.id}", ts, obs.animal_id, obs.watcher_id, obs.confidence, obs.raw_text,
+                    json.dumps(entities, ensure_ascii=False)
+                ])
+            else:
+                buffer.write(json.dumps({
+                    "id": f"obs_{obs.id}",
+                    "ts": ts,
+                    "animal_id": obs.animal_id,
+                    "watcher_id": obs.watcher_id,
+                    "confidence": obs.confidence,
+                    "text": obs.raw_text,
+                    "entities": entities
+                }, ensure_ascii=False))
+                buffer.write("\n")
             
-        return transcriptions
+            if buffer.tell() >= EXPORT_CHUNK_CHARS:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+        
+        if buffer.tell():
+            yield buffer.getvalue()
     
     def get_transcription(self, observation_id: int) -> TranscriptionResponse:
         """Get detailed transcription result"""
@@ -139,10 +434,94 @@ class TranscriptionService:
         entity_dict = {e.type: e.payload_json for e in entities}
         
         return TranscriptionResponse(
-            id=f"obs_{observation.id}",
+            id=f"obs_{observation_id}",
             status="done",
             duration_sec=0.0,
             text=observation.raw_text,
             entities=entity_dict,
             timeline=[]
-        )
\ No newline at end of file
+        )
+
+class AsyncTranscriptionService:
+    """The API's request path: queries on an AsyncSession, CPU-bound stages in the bounded executor"""
+    
+    def __init__(self, db: AsyncSession):
+        self.db = db
+        self.animal_repo = AsyncAnimalRepository(db)
+        self.observation_repo = AsyncObservationRepository(db)
+        self.entity_configs = AsyncEntityConfigService(db)
+        self.pipeline = TranscriptionPipeline()
+    
+    async def process_audio(self, samples: np.ndarray, sample_rate: int, watcher_id: int,
+                            metadata: Dict[Any, Any] = {}) -> TranscriptionResponse:
+        """Process PCM audio without blocking the event loop"""
+        transcription_result, duration = await run_cpu(self.pipeline.transcribe, samples, sample_rate)
+        
+        await self.entity_configs.sync()
+        if _gazetteer_sync_due():
+            await run_cpu(self.pipeline.sync_animals, await self.animal_repo.get_index_rows())
+        text, entities = await run_cpu(self.pipeline.analyze, transcription_result)
+        
+        # The observation and its entities go in with a single commit
+        with stage("db_write"):
+            unit_of_work = AsyncObservationUnitOfWork(self.db)
+            unit_of_work.add(self.pipeline.observation(text, entities, watcher_id, metadata), entities)
+            observation_id, = await unit_of_work.commit()
+        
+        return self.pipeline.response(observation_id, transcription_result, text, entities, duration, metadata)
+    
+    async def get_transcriptions(self, animal_id: int = None, watcher_id: int = None,
+                                 start_date: str = None, end_date: str = None,
+                                 cursor: Optional[str] = None, limit: int = 100) -> TranscriptionPage:
+        """See TranscriptionService.get_transcriptions"""
+        start_dt, end_dt = parse_dates(start_date, end_date)
+        observations = await self.observation_repo.get_observations_page(
+            animal_id=animal_id,
+            watcher_id=watcher_id,
+            start_date=start_dt,
+            end_date=end_dt,
+            after=decode_cursor(cursor) if cursor else None,
+            limit=limit + 1
+        )
+        return TranscriptionService._page(observations, limit)
+    
+    async def get_transcription(self, observation_id: int) -> TranscriptionResponse:
+        """Get detailed transcription result"""
+        observation = await self.observation_repo.get_observation(observation_id)
+        if not observation:
+            raise ValueError(f"Observation with id {observation_id} not found")
+        return listing_item(observation)
+
+class AsyncReportService:
+    """Reports read from the rollups the unit of work maintains"""
+    
+    def __init__(self, db: AsyncSession):
+        self.report_repo = AsyncDailyReportRepository(db)
+    
+    async def daily_report(self, day: Optional[str] = None) -> DailyReport:
+        """Per-animal counts and latest vitals for a UTC day, today by default"""
+        report_day = date.fromisoformat(day) if day else datetime.utcnow().date()
+        rows = await self.report_repo.get_day(report_day)
+        animals = [
+            DailyAnimalSummary(
+                id=report.animal_id,
+                name=name,
+                species=species,
+                observations=report.observations,
+                alerts=report.critical_alerts + report.warnings,
+                # Rows written before the vitals whitelist may still hold other keys
+                latest_vitals={
+                    field: value for field, value in (report.latest_vitals or {}).items() if field in REPORT_VITALS
+                }
+            )
+            for report, name, species in rows
+        ]
+        return DailyReport(
+            date=report_day.isoformat(),
+            animals=animals,
+            summary=DailyReportSummary(
+                total_observations=sum(report.observations for report, _, _ in rows),
+                critical_alerts=sum(report.critical_alerts for report, _, _ in rows),
+                warnings=sum(report.warnings for report, _, _ in rows)
+            )
+        )
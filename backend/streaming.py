@@ -0,0 +1,177 @@
+import asyncio
+import json
+import os
+import time
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+from fastapi import WebSocket, WebSocketDisconnect
+from engine.metrics import metrics
+from engine.registry import registry
+from schemas import WebSocketStats
+
+# Recognition runs on a bounded pool so the event loop only shuffles bytes
+STREAM_WORKERS = int(os.getenv("STREAM_WORKERS", str(os.cpu_count() or 1)))
+# Chunks buffered per session before we stop reading from the socket
+STREAM_QUEUE_CHUNKS = int(os.getenv("STREAM_QUEUE_CHUNKS", "32"))
+# Seconds to wait for a free recognizer before refusing a session
+STREAM_ACQUIRE_TIMEOUT = float(os.getenv("STREAM_ACQUIRE_TIMEOUT", "5"))
+STATS_INTERVAL_SEC = float(os.getenv("STREAM_STATS_INTERVAL", "5"))
+# PCM formats a client may declare for a stream
+STREAM_SAMPLE_RATES = (8000, 192000)
+STREAM_MAX_CHANNELS = 8
+
+stream_executor = ThreadPoolExecutor(max_workers=STREAM_WORKERS, thread_name_prefix="vosk-stream")
+
+# Live sessions, read at scrape time instead of counting every chunk
+_active_sessions = weakref.WeakSet()
+
+def _collect_stream_metrics():
+    sessions = list(_active_sessions)
+    metrics.gauge("zoo_stream_sessions_active", "Open WebSocket transcription sessions").set(len(sessions))
+    metrics.gauge("zoo_queue_depth", "Items waiting to be processed", ["queue"]).set(
+        sum(session.chunks.qsize() for session in sessions), queue="stream"
+    )
+
+metrics.add_collector(_collect_stream_metrics)
+
+def cpu_load() -> float:
+    """One-minute load average per core"""
+    try:
+        return os.getloadavg()[0] / (os.cpu_count() or 1)
+    except OSError:
+        return 0.0
+
+def stream_format_error(sample_rate: int, channels: int) -> Optional[str]:
+    """Why a declared PCM format cannot be streamed, or None when it can"""
+    low, high = STREAM_SAMPLE_RATES
+    if not low <= sample_rate <= high:
+        return f"sample_rate must be between {low} and {high}, got {sample_rate}"
+    if not 1 <= channels <= STREAM_MAX_CHANNELS:
+        return f"channels must be between 1 and {STREAM_MAX_CHANNELS}, got {channels}"
+    return None
+
+def _is_end_message(text: str) -> bool:
+    """Clients finish a stream with "end" or {"event": "end"}"""
+    if text.strip() == "end":
+        return True
+    try:
+        return json.loads(text).get("event") == "end"
+    except (ValueError, AttributeError):
+        return False
+
+class StreamingTranscriber:
+    """Bridge one WebSocket to a pooled Vosk session"""
+
+    def __init__(self, websocket: WebSocket, sample_rate: int = 16000, channels: int = 1,
+                 entities: bool = True):
+        self.websocket = websocket
+        self.with_entities = entities
+        self.sample_rate = sample_rate
+        self.channels = channels
+        # Bounded queue: when recognition falls behind, receive() blocks and
+        # TCP flow control pushes back on the client
+        self.chunks: asyncio.Queue = asyncio.Queue(maxsize=STREAM_QUEUE_CHUNKS)
+        self.session = None
+        self.entities = None
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        try:
+            vosk_asr = await loop.run_in_executor(stream_executor, registry.get, "vosk")
+            self.session = await loop.run_in_executor(
+                stream_executor, vosk_asr.open_session, self.sample_rate, self.channels, STREAM_ACQUIRE_TIMEOUT
+            )
+            if self.with_entities:
+                # Natasha is only imported once a session needs it
+                from engine.ner import IncrementalExtractor
+                extractor = await loop.run_in_executor(stream_executor, registry.get, "ner")
+                self.entities = IncrementalExtractor(extractor)
+        except (FileNotFoundError, TimeoutError) as e:
+            await self.websocket.send_json({"event": "error", "message": str(e)})
+            await self.websocket.close(code=1013)
+            return
+
+        _active_sessions.add(self)
+        receiver = asyncio.create_task(self._receive())
+        try:
+            await self._process()
+        finally:
+            _active_sessions.discard(self)
+            receiver.cancel()
+            if self.session is not None and not self.session.closed:
+                # Reset and return the recognizer without blocking the loop
+                await loop.run_in_executor(stream_executor, self.session.close)
+
+    async def _receive(self):
+        """Read audio frames until the client ends the stream or disconnects"""
+        try:
+            while True:
+                message = await self.websocket.receive()
+                if message["type"] == "websocket.disconnect":
+                    break
+                if message.get("bytes"):
+                    await self.chunks.put(message["bytes"])
+                elif message.get("text") is not None and _is_end_message(message["text"]):
+                    break
+        finally:
+            await self.chunks.put(None)
+
+    async def _process(self):
+        loop = asyncio.get_running_loop()
+        last_stats = time.monotonic()
+        finished = False
+
+        while not finished:
+            chunk = await self.chunks.get()
+            if chunk is None:
+                break
+
+            # Coalesce whatever else is already queued into one executor call
+            parts = [chunk]
+            while not self.chunks.empty():
+                chunk = self.chunks.get_nowait()
+                if chunk is None:
+                    finished = True
+                    break
+                parts.append(chunk)
+
+            events = await loop.run_in_executor(stream_executor, self._accept, b"".join(parts))
+            if not await self._send(events):
+                return
+
+            if time.monotonic() - last_stats >= STATS_INTERVAL_SEC:
+                last_stats = time.monotonic()
+                if not await self._send([self._stats_event()]):
+                    return
+
+        events = await loop.run_in_executor(stream_executor, self._finish)
+        events.append(self._stats_event())
+        if await self._send(events):
+            await self.websocket.close()
+
+    def _accept(self, chunk: bytes) -> list:
+        """Recognize a chunk and extract entities from newly finalized utterances"""
+        return self._annotate(self.session.accept(chunk))
+
+    def _finish(self) -> list:
+        return self._annotate(self.session.finish())
+
+    def _annotate(self, events: list) -> list:
+        if self.entities is None or not events:
+            return events
+        # The extractor is shared with batch analysis, so hold its inference lock
+        with registry.acquire("ner"):
+            return self.entities.annotate(events)
+
+    async def _send(self, events) -> bool:
+        try:
+            for event in events:
+                await self.websocket.send_json(event)
+        except (WebSocketDisconnect, RuntimeError):
+            return False
+        return True
+
+    def _stats_event(self) -> dict:
+        stats = WebSocketStats(rtf=round(self.session.rtf, 3), cpu_load=round(cpu_load(), 3))
+        return {"event": "stats", "stats": stats.dict()}
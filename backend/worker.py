@@ -1,23 +1,71 @@
+import gc
 import os
-import redis
+import threading
 from celery import Celery
+from celery.signals import worker_init, worker_process_init
 from database import SessionLocal
+from jobs import keep_failed_upload
 from services import TranscriptionService
 
 # Initialize Celery
 redis_url = os.getenv("REDIS_URL", "redis://localhost:6379/0")
 app = Celery("zoo_keeper_ai", broker=redis_url, backend=redis_url)
 
-@app.task
-def process_audio_task(file_path: str, watcher_id: int, metadata: dict = {}):
-    """Celery task for processing audio files"""
+# Where the pool's models are loaded:
+#   fork  - once in the parent before the pool forks; children share the pages copy-on-write
+#   child - once per child, in the background after it starts
+#   0     - lazily, on each child's first task
+WORKER_PRELOAD = os.getenv("WORKER_PRELOAD", "fork")
+# Models the tasks use; Vosk only serves the API's live streams
+WORKER_MODELS = ["asr", "normalizer", "gazetteer", "ner"]
+
+@worker_init.connect
+def preload_in_parent(**kwargs):
+    """Load the models before the prefork pool starts so every child inherits them"""
+    if WORKER_PRELOAD != "fork":
+        return
+    from engine.asr import preload_models
+    # Load only: running inference here would start torch/OpenMP thread pools,
+    # which do not survive fork. The children warm up instead
+    preload_models(WORKER_MODELS, warmup=False)
+    # Move everything allocated so far out of the collector's reach, so gc passes
+    # in the children do not write to (and copy) every inherited page
+    gc.freeze()
+
+@worker_process_init.connect
+def warm_models(**kwargs):
+    """Warm up (or load) models in the background so the child starts consuming right away"""
+    if WORKER_PRELOAD == "fork":
+        from engine.registry import registry
+        target = registry.warmup
+    elif WORKER_PRELOAD == "child":
+        from engine.asr import preload_models
+        target = preload_models
+    else:
+        return
+    threading.Thread(target=target, args=(WORKER_MODELS,), name="model-warmup", daemon=True).start()
+
+# Named explicitly: the API imports this module as `worker`, the worker CLI as `backend.worker`
+@app.task(name="process_audio_task")
+def process_audio_task(file_path: str, watcher_id: int, metadata: dict = {}, cleanup: bool = False):
+    """Celery task for processing audio files
+    
+    With `cleanup` (uploads queued by the API) the file is removed once the
+    observation is stored, and kept under failed/ when the task fails.
+    """
     db = SessionLocal()
     try:
         service = TranscriptionService(db)
         result = service.process_wav_file(file_path, watcher_id, metadata)
-        return result.dict()
+    except Exception:
+        if cleanup and os.path.exists(file_path):
+            keep_failed_upload(file_path)
+        raise
     finally:
         db.close()
+    if cleanup:
+        os.remove(file_path)
+    return result.dict()
 
 # Configure Celery
 app.conf.update(
@@ -28,4 +76,6 @@ app.conf.update(
     enable_utc=True,
     worker_concurrency=int(os.getenv("WORKER_CONCURRENCY", "1")),
     worker_prefetch_multiplier=1,
+    # Lets API clients tell a queued job from one being transcribed
+    task_track_started=True,
 )
\ No newline at end of file
@@ -1,61 +1,391 @@
-import vosk
-import whisper
-import webrtcvad
 import numpy as np
 import os
-from typing import Generator, Tuple
-import wave
+import json
+import queue
+import threading
+import time
+from typing import Generator, List, Optional, Tuple
+from engine.audio import TARGET_SAMPLE_RATE, StreamingAudioConverter, load_wav, normalize_audio, pcm_to_float32
+from engine.metrics import ASR_RTF, AUDIO_SECONDS, stage
+from engine.vad import SpeechBlock, SpeechSegmenter, StreamingVADGate
+from engine.parallel import can_start_pool, merge_region_segments, pack_windows, split_regions, transcribe_parallel
+
+# vosk, whisper (torch) and webrtcvad are imported where models are built, so
+# importing this module (and the API that uses it) stays cheap
+
+class RecognizerPool:
+    """Bounded pool of reusable KaldiRecognizer instances for one Vosk model"""
+
+    def __init__(self, model, size: int, sample_rate: int = 16000):
+        self.model = model
+        self.size = size
+        self.sample_rate = sample_rate
+        self._idle = queue.LifoQueue()
+        self._created = 0
+        self._lock = threading.Lock()
+
+    def acquire(self, timeout: float = None):
+        """Take an idle recognizer, creating one while under the size limit"""
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        
+        with self._lock:
+            if self._created < self.size:
+                self._created += 1
+                return self._create()
+        
+        try:
+            return self._idle.get(timeout=timeout)
+        except queue.Empty:
+            raise TimeoutError("No free speech recognizer; too many concurrent streams")
+
+    def _create(self):
+        import vosk
+        return vosk.KaldiRecognizer(self.model, self.sample_rate)
+
+    def release(self, rec):
+        """Reset a recognizer and make it available to the next session"""
+        rec.Reset()
+        self._idle.put(rec)
+
+    def stats(self) -> dict:
+        return {"size": self.size, "created": self._created, "idle": self._idle.qsize()}
+
+class VoskStreamSession:
+    """Recognition state for one audio stream on a pooled recognizer"""
+
+    def __init__(self, asr: "VoskASR", sample_rate: int = 16000, channels: int = 1, timeout: float = None):
+        import webrtcvad
+        
+        self.asr = asr
+        self.rec = asr.recognizers.acquire(timeout)
+        self.converter = StreamingAudioConverter(sample_rate, channels)
+        # webrtcvad keeps adaptive state, so every stream gets its own instance
+        self.gate = StreamingVADGate(webrtcvad.Vad(asr.vad_mode))
+        self.partial_interval_sec = asr.partial_interval_sec
+        self.audio_sec = 0.0
+        self.processing_sec = 0.0
+        self.closed = False
+        
+        self._segment_start = None
+        self._fed_until = 0.0
+        self._last_partial = ""
+        self._last_partial_at = float("-inf")
+
+    def accept(self, chunk: bytes) -> List[dict]:
+        """Feed raw PCM and return the partial/final events it produced"""
+        start_time = time.perf_counter()
+        # Recorders send 44.1/48 kHz stereo; convert to 16 kHz mono on the fly
+        pcm = self.converter.convert(chunk)
+        events = self._recognize(self.gate.push(pcm.tobytes()))
+        self.audio_sec += len(pcm) / TARGET_SAMPLE_RATE
+        self.processing_sec += time.perf_counter() - start_time
+        return events
+
+    def finish(self) -> List[dict]:
+        """Flush buffered audio, emit the last final result and release the recognizer"""
+        start_time = time.perf_counter()
+        # Drain the resampler and the VAD gate before the final result
+        blocks = self.gate.push(self.converter.flush().tobytes()) + self.gate.flush()
+        events = self._recognize(blocks)
+        if self._segment_start is not None:
+            self._append_final(events, self.rec.FinalResult())
+        self.processing_sec += time.perf_counter() - start_time
+        self.close()
+        if self.audio_sec > 0:
+            ASR_RTF.observe(self.rtf, mode="stream", model="vosk")
+            AUDIO_SECONDS.inc(self.audio_sec, mode="stream")
+        return events
+
+    def close(self):
+        if not self.closed:
+            self.closed = True
+            self.asr.recognizers.release(self.rec)
+
+    @property
+    def rtf(self) -> float:
+        return self.processing_sec / self.audio_sec if self.audio_sec else 0.0
+
+    def _recognize(self, blocks: List[SpeechBlock]) -> List[dict]:
+        events = []
+        for block in blocks:
+            if self._segment_start is None:
+                self._segment_start = block.start_sec
+            self._fed_until = block.start_sec + len(block.pcm) / (2 * TARGET_SAMPLE_RATE)
+            
+            if self.rec.AcceptWaveform(block.pcm):
+                self._append_final(events, self.rec.Result())
+            elif block.utterance_end:
+                # Silence never reaches the recognizer, so close the utterance here
+                self._append_final(events, self.rec.FinalResult())
+            elif self._fed_until - self._last_partial_at >= self.partial_interval_sec:
+                # Partial decoding is costly; poll it at most once per interval
+                # and only send it on when the text actually changed
+                self._last_partial_at = self._fed_until
+                partial = json.loads(self.rec.PartialResult()).get("partial", "")
+                if partial and partial != self._last_partial:
+                    self._last_partial = partial
+                    events.append({"event": "partial", "text": partial})
+        return events
+
+    def _append_final(self, events: List[dict], result: str):
+        text = json.loads(result).get("text", "")
+        if text:
+            # Segment times are on the stream clock, including skipped silence
+            events.append({
+                "event": "final",
+                "text": text,
+                "segment": {"start": round(self._segment_start, 2), "end": round(self._fed_until, 2)}
+            })
+        self._segment_start = None
+        self._last_partial = ""
 
 class VoskASR:
-    def __init__(self, model_path: str = "models/vosk-model-small-ru-0.22"):
+    def __init__(self, model_path: str = "models/vosk-model-small-ru-0.22", pool_size: int = None):
         """Initialize Vosk ASR model for streaming recognition"""
         if not os.path.exists(model_path):
             raise FileNotFoundError(f"Vosk model not found at {model_path}. Please download it first.")
+        import vosk
+        import webrtcvad
         
         self.model = vosk.Model(model_path)
-        self.vad = webrtcvad.Vad(2)  # Aggressiveness mode 2
-        
-    def transcribe_stream(self, audio_chunks: Generator[Tuple[bytes, float], None, None]) -> Generator[dict, None, None]:
-        """Transcribe streaming audio chunks"""
-        rec = vosk.KaldiRecognizer(self.model, 16000)
-        
-        for chunk, timestamp in audio_chunks:
-            # Check if chunk contains speech
-            if self.vad.is_speech(chunk, 16000):
-                if rec.AcceptWaveform(chunk):
-                    result = rec.Result()
-                    yield {"event": "final", "text": result, "timestamp": timestamp}
-                else:
-                    partial = rec.PartialResult()
-                    yield {"event": "partial", "text": partial, "timestamp": timestamp}
-        
-        # Get final result
-        final_result = rec.FinalResult()
-        yield {"event": "final", "text": final_result, "timestamp": "end"}
-
-class WhisperASR:
-    def __init__(self, model_size: str = "base"):
-        """Initialize Whisper ASR model for batch processing"""
-        self.model = whisper.load_model(model_size)
+        self.vad_mode = 2  # Aggressiveness mode 2
+        self.vad = webrtcvad.Vad(self.vad_mode)
+        self.partial_interval_sec = int(os.getenv("VOSK_PARTIAL_INTERVAL_MS", "300")) / 1000.0
+        
+        # Recognizers are expensive to build, so streaming sessions share a pool
+        if pool_size is None:
+            pool_size = int(os.getenv("VOSK_POOL_SIZE", "32"))
+        self.recognizers = RecognizerPool(self.model, pool_size)
+        
+    def open_session(self, sample_rate: int = 16000, channels: int = 1, timeout: float = None) -> VoskStreamSession:
+        """Start a streaming session on a pooled recognizer"""
+        return VoskStreamSession(self, sample_rate, channels, timeout)
+        
+    def transcribe_stream(self, audio_chunks: Generator[Tuple[bytes, float], None, None],
+                          sample_rate: int = 16000, channels: int = 1,
+                          extractor=None) -> Generator[dict, None, None]:
+        """Transcribe streaming audio chunks
+        
+        With the registry's EntityExtractor, final results are followed by
+        entity_update events and partial results carry rule-only entity
+        previews; extraction holds the extractor's inference lock.
+        """
+        session = self.open_session(sample_rate, channels)
+        annotate = list
+        if extractor is not None:
+            from engine.ner import IncrementalExtractor
+            from engine.registry import registry
+            incremental = IncrementalExtractor(extractor)
+            
+            def annotate(events):
+                with registry.acquire("ner"):
+                    return incremental.annotate(events)
+        try:
+            for chunk, timestamp in audio_chunks:
+                for event in annotate(session.accept(chunk)):
+                    yield dict(event, timestamp=timestamp)
+            
+            # Get final result
+            for event in annotate(session.finish()):
+                yield dict(event, timestamp="end")
+        finally:
+            session.close()
+
+    def warmup(self):
+        """Push a short block of silence through a pooled recognizer"""
+        rec = self.recognizers.acquire()
+        try:
+            rec.AcceptWaveform(b"\x00\x00" * 1600)
+            rec.FinalResult()
+        finally:
+            self.recognizers.release(rec)
+
+class ASRBackend:
+    """Batch ASR backend: VAD segmentation, chunking and merging around a decoder
+
+    Subclasses load a model and implement `_decode` for one float32 16 kHz
+    region. `name` identifies the model in caches and reports.
+    """
+
+    name = "asr"
+    backend = "asr"
+    # Whisper pads every decode call to a 30 s window, so shorter regions
+    # are packed together instead of being decoded one by one
+    window_sec = 30.0
+
+    def __init__(self, model_size: str = "base", use_vad: bool = None, workers: int = None,
+                 chunk_sec: float = None, overlap_sec: float = None, threads: int = None):
+        self.model_size = model_size
+        self.threads = threads if threads is not None else int(os.getenv("ASR_THREADS", "0")) or None
+        
+        if use_vad is None:
+            use_vad = os.getenv("WHISPER_VAD", "1") == "1"
+        self.segmenter = SpeechSegmenter() if use_vad else None
+        
+        # Long recordings are split into chunks and spread over a process pool
+        self.workers = workers if workers is not None else int(os.getenv("WHISPER_WORKERS", "1"))
+        self.chunk_sec = chunk_sec if chunk_sec is not None else float(os.getenv("WHISPER_CHUNK_SEC", "120"))
+        self.overlap_sec = overlap_sec if overlap_sec is not None else float(os.getenv("WHISPER_OVERLAP_SEC", "1.0"))
+        
+    @property
+    def settings(self) -> str:
+        """VAD and chunking settings, which shape the transcript as much as the model"""
+        vad = "off"
+        if self.segmenter is not None:
+            segmenter = self.segmenter
+            vad = (f"{segmenter.aggressiveness}/{segmenter.frame_ms}/{segmenter.padding_ms}/"
+                   f"{segmenter.min_silence_ms}/{segmenter.min_speech_ms}")
+        return f"vad={vad};chunk={self.chunk_sec};overlap={self.overlap_sec};window={self.window_sec}"
         
     def transcribe_file(self, file_path: str) -> dict:
         """Transcribe entire WAV file"""
-        # Whisper expects 16kHz audio, resample if needed
-        with wave.open(file_path, 'rb') as wf:
-            if wf.getframerate() != 16000:
-                # Would need to resample here - for now assuming correct format
-                pass
+        samples, sample_rate = load_wav(file_path)
+        return self.transcribe_audio(samples, sample_rate)
+
+    def transcribe_audio(self, samples: np.ndarray, sample_rate: int) -> dict:
+        """Transcribe int16 PCM already in memory (or memory-mapped)"""
+        start_time = time.perf_counter()
+        # 16 kHz mono input passes through as a view; anything else is down-mixed and resampled
+        with stage("audio_decode"):
+            pcm = normalize_audio(samples, sample_rate)
+        sample_rate = TARGET_SAMPLE_RATE
+        
+        # Regions are converted to float32 one at a time, never the whole file
+        with stage("vad"):
+            if self.segmenter is None:
+                regions = [(0.0, len(pcm) / sample_rate)]
+            else:
+                regions = self.segmenter.segments(pcm, sample_rate)
         
-        result = self.model.transcribe(file_path, language="ru", task="transcribe")
+        with stage("asr"):
+            result = self.transcribe_regions(pcm, regions, sample_rate)
+        
+        if result["audio_sec"] > 0:
+            ASR_RTF.observe((time.perf_counter() - start_time) / result["audio_sec"], mode="batch", model=self.name)
+            AUDIO_SECONDS.inc(result["audio_sec"], mode="batch")
         return result
 
+    def transcribe_regions(self, audio: np.ndarray, regions: List[Tuple[float, float]],
+                           sample_rate: int = 16000) -> dict:
+        """Transcribe only the given speech regions, keeping file-relative timestamps"""
+        # Sequential and parallel modes cut identical pieces, so their output matches
+        regions = split_regions(regions, self.chunk_sec, self.overlap_sec)
+        windows = pack_windows(regions, self.window_sec)
+        audio_sec = len(audio) / sample_rate
+        
+        # Celery prefork children cannot start a pool, so they decode in-process
+        if self.workers > 1 and audio_sec > self.chunk_sec and can_start_pool():
+            window_segments = transcribe_parallel(
+                audio, windows, sample_rate, type(self), self.model_size, self.workers, self.chunk_sec
+            )
+        else:
+            window_segments = [self.transcribe_region(audio, start, end, sample_rate) for start, end in windows]
+        
+        segments = merge_region_segments(window_segments, windows)
+        return {
+            "text": " ".join(segment["text"] for segment in segments),
+            "segments": segments,
+            "language": "ru",
+            "model": self.name,
+            "speech_sec": sum(end - start for start, end in regions),
+            "audio_sec": audio_sec
+        }
+
+    def transcribe_region(self, audio: np.ndarray, start: float, end: float, sample_rate: int = 16000,
+                          base_sample: int = 0) -> List[dict]:
+        """Transcribe one region; audio may be a slice beginning at base_sample"""
+        chunk = audio[int(start * sample_rate) - base_sample:int(end * sample_rate) - base_sample]
+        if chunk.dtype != np.float32:
+            chunk = pcm_to_float32(chunk)
+        
+        segments = []
+        for segment in self._decode(chunk):
+            text = segment["text"].strip()
+            if text:
+                segments.append({
+                    "start": round(start + segment["start"], 2),
+                    "end": round(start + segment["end"], 2),
+                    "text": text
+                })
+        return segments
+
+    def warmup(self):
+        """Decode one second of silence so the first request skips lazy init"""
+        self._decode(np.zeros(16000, dtype=np.float32))
+
+    def _decode(self, audio: np.ndarray) -> List[dict]:
+        raise NotImplementedError
+
+class WhisperASR(ASRBackend):
+    """OpenAI Whisper in full fp32"""
+
+    backend = "whisper"
+
+    def __init__(self, model_size: str = "base", **kwargs):
+        """Initialize Whisper ASR model for batch processing"""
+        super().__init__(model_size, **kwargs)
+        if self.threads:
+            import torch
+            torch.set_num_threads(self.threads)
+        self.model = self._load_model(model_size)
+        self.name = f"{self.backend}-{model_size}"
+
+    def _load_model(self, model_size: str):
+        import whisper
+        
+        return whisper.load_model(model_size)
+
+    def _decode(self, audio: np.ndarray) -> List[dict]:
+        return self.model.transcribe(audio, language="ru", task="transcribe", fp16=False)["segments"]
+
+class QuantizedWhisperASR(WhisperASR):
+    """Whisper with its Linear layers dynamically quantized to int8 for CPU inference"""
+
+    backend = "whisper-int8"
+
+    def _load_model(self, model_size: str):
+        import whisper
+        
+        return quantize_linear_layers(whisper.load_model(model_size, device="cpu"))
+
+def quantize_linear_layers(model):
+    """Dynamically quantize every Linear layer of a torch model to int8, subclasses included"""
+    import torch
+    
+    # quantize_dynamic only swaps exact nn.Linear types; Whisper's Linear
+    # subclass differs only in dtype casting, which int8 kernels handle
+    for module in model.modules():
+        if isinstance(module, torch.nn.Linear):
+            module.__class__ = torch.nn.Linear
+    return torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+# Batch backends selectable with ASR_BACKEND
+ASR_BACKENDS = {
+    WhisperASR.backend: WhisperASR,
+    QuantizedWhisperASR.backend: QuantizedWhisperASR,
+}
+
+def create_asr_backend(backend: str = None, model_size: str = None, **kwargs) -> ASRBackend:
+    """Build the batch ASR backend chosen by argument or ASR_BACKEND/WHISPER_MODEL_SIZE"""
+    backend = backend or os.getenv("ASR_BACKEND", "whisper")
+    model_size = model_size or os.getenv("WHISPER_MODEL_SIZE", "base")
+    if backend not in ASR_BACKENDS:
+        raise ValueError(f"Unknown ASR backend '{backend}'. Available: {', '.join(ASR_BACKENDS)}")
+    return ASR_BACKENDS[backend](model_size, **kwargs)
+
 # Model preloading implementation
-def preload_models():
-    """Preload ASR models at startup for better performance"""
+def preload_models(names=None, warmup: bool = True, ignore_errors: bool = True) -> dict:
+    """Preload models into the shared registry at startup for better performance"""
+    from engine.registry import registry
+
     # Set CPU optimization flags
-    os.environ["OMP_NUM_THREADS"] = str(os.cpu_count())
-    os.environ["MKL_NUM_THREADS"] = str(os.cpu_count())
-    
-    # Preload models here if needed
-    # For now, models are loaded on demand in the classes above
-    pass
\ No newline at end of file
+    os.environ.setdefault("OMP_NUM_THREADS", str(os.cpu_count()))
+    os.environ.setdefault("MKL_NUM_THREADS", str(os.cpu_count()))
+
+    registry.preload(names, ignore_errors=ignore_errors)
+    if warmup:
+        registry.warmup(names)
+    return registry.status()
\ No newline at end of file
@@ -0,0 +1,319 @@
+import struct
+import numpy as np
+from math import gcd
+from numpy.lib.stride_tricks import sliding_window_view
+from typing import NamedTuple, Optional, Tuple
+
+WAVE_FORMAT_PCM = 0x0001
+WAVE_FORMAT_EXTENSIBLE = 0xFFFE
+
+# Uploads are read in blocks of this size straight into the PCM buffer
+READ_CHUNK_SIZE = 1 << 20
+
+# Both ASR engines run on 16 kHz mono
+TARGET_SAMPLE_RATE = 16000
+
+class WavFormat(NamedTuple):
+    channels: int
+    sample_rate: int
+    bits_per_sample: int
+    data_offset: int
+    data_size: Optional[int]
+
+    @property
+    def frame_size(self) -> int:
+        return self.channels * self.bits_per_sample // 8
+
+def parse_wav_header(header: bytes) -> Optional[WavFormat]:
+    """Parse RIFF/WAVE chunks up to the start of the data chunk.
+
+    Returns None when more bytes are needed to reach the data chunk.
+    """
+    if len(header) < 12:
+        return None
+    if header[:4] != b"RIFF" or header[8:12] != b"WAVE":
+        raise ValueError("Not a RIFF/WAVE file")
+
+    fmt = None
+    offset = 12
+    while offset + 8 <= len(header):
+        chunk_id = header[offset:offset + 4]
+        chunk_size = struct.unpack_from("<I", header, offset + 4)[0]
+        body = offset + 8
+
+        if chunk_id == b"data":
+            if fmt is None:
+                raise ValueError("WAV data chunk precedes fmt chunk")
+            # Streaming writers leave the size at 0 or 0xFFFFFFFF when unknown
+            data_size = chunk_size if 0 < chunk_size < 0xFFFFFFFF else None
+            return WavFormat(fmt[0], fmt[1], fmt[2], body, data_size)
+
+        if chunk_id == b"fmt ":
+            if body + 16 > len(header):
+                return None
+            format_tag, channels, sample_rate, _, _, bits = struct.unpack_from("<HHIIHH", header, body)
+            if format_tag not in (WAVE_FORMAT_PCM, WAVE_FORMAT_EXTENSIBLE) or bits != 16:
+                raise ValueError(f"Only 16-bit PCM WAV is supported, got format {format_tag:#x}/{bits}-bit")
+            if channels < 1:
+                raise ValueError("WAV file has no channels")
+            fmt = (channels, sample_rate, bits)
+
+        # Chunks are word-aligned
+        offset = body + chunk_size + (chunk_size & 1)
+    return None
+
+def load_wav(file_path: str, mmap: bool = True) -> Tuple[np.ndarray, int]:
+    """Map a 16-bit PCM WAV file as an int16 array of shape (frames, channels)
+
+    With mmap the samples are paged in from the file on demand instead of
+    being read into memory up front.
+    """
+    with open(file_path, 'rb') as f:
+        header = b""
+        wav_format = None
+        while wav_format is None:
+            block = f.read(4096)
+            if not block:
+                raise ValueError("WAV file has no data chunk")
+            header += block
+            wav_format = parse_wav_header(header)
+        f.seek(0, 2)
+        file_size = f.tell()
+
+    data_size = file_size - wav_format.data_offset
+    if wav_format.data_size is not None:
+        data_size = min(data_size, wav_format.data_size)
+    frames = data_size // wav_format.frame_size
+    shape = (frames, wav_format.channels)
+
+    if frames == 0:
+        return np.zeros(shape, dtype='<i2'), wav_format.sample_rate
+    if mmap:
+        samples = np.memmap(file_path, dtype='<i2', mode='r', offset=wav_format.data_offset, shape=shape)
+    else:
+        samples = np.fromfile(file_path, dtype='<i2', count=frames * wav_format.channels,
+                              offset=wav_format.data_offset).reshape(shape)
+    return samples, wav_format.sample_rate
+
+def save_wav(file_path: str, samples: np.ndarray, sample_rate: int):
+    """Write int16 PCM of shape (frames, channels) as a WAV file that load_wav can map"""
+    samples = samples.reshape(len(samples), -1)
+    channels = samples.shape[1]
+    data_size = samples.size * 2
+    with open(file_path, 'wb') as f:
+        f.write(b"RIFF" + struct.pack("<I", 36 + data_size) + b"WAVE")
+        f.write(b"fmt " + struct.pack("<IHHIIHH", 16, WAVE_FORMAT_PCM, channels, sample_rate,
+                                       sample_rate * channels * 2, channels * 2, 16))
+        f.write(b"data" + struct.pack("<I", data_size))
+        samples.astype('<i2', copy=False).tofile(f)
+
+async def read_wav_upload(upload, max_bytes: int, chunk_size: int = READ_CHUNK_SIZE) -> Tuple[np.ndarray, int]:
+    """Stream a WAV upload into a single preallocated PCM buffer
+
+    `upload` is anything with an async `read(size)` (e.g. FastAPI's UploadFile).
+    Memory use is bounded by max_bytes plus one read chunk, and the returned
+    int16 array is a view over the buffer the chunks were written into.
+    """
+    header = b""
+    wav_format = None
+    while wav_format is None:
+        block = await upload.read(chunk_size)
+        if not block:
+            raise ValueError("WAV file has no data chunk")
+        header += block
+        if len(header) > max(chunk_size, 1 << 16) * 2:
+            raise ValueError("WAV header is too large")
+        wav_format = parse_wav_header(header)
+
+    if wav_format.data_size is not None and wav_format.data_size > max_bytes:
+        raise ValueError(f"Audio data exceeds the {max_bytes} byte upload limit")
+
+    capacity = wav_format.data_size if wav_format.data_size is not None else min(max_bytes, 4 * chunk_size)
+    buffer = bytearray(capacity)
+    view = memoryview(buffer)
+
+    def write(block: bytes, filled: int) -> int:
+        nonlocal buffer, view
+        if wav_format.data_size is not None:
+            # Ignore trailing chunks (LIST, id3) after the declared data
+            block = block[:max(0, capacity - filled)]
+        elif filled + len(block) > len(buffer):
+            if filled + len(block) > max_bytes:
+                raise ValueError(f"Audio data exceeds the {max_bytes} byte upload limit")
+            view.release()
+            buffer.extend(bytes(max(len(buffer), len(block))))
+            view = memoryview(buffer)
+        view[filled:filled + len(block)] = block
+        return filled + len(block)
+
+    filled = write(header[wav_format.data_offset:], 0)
+    while True:
+        block = await upload.read(chunk_size)
+        if not block:
+            break
+        filled = write(block, filled)
+    view.release()
+
+    frames = filled // wav_format.frame_size
+    samples = np.frombuffer(buffer, dtype='<i2', count=frames * wav_format.channels)
+    return samples.reshape(frames, wav_format.channels), wav_format.sample_rate
+
+def pcm_to_float32(samples: np.ndarray) -> np.ndarray:
+    """Convert int16 PCM to float32 in [-1, 1) as expected by Whisper"""
+    return np.multiply(samples, 1.0 / 32768.0, dtype=np.float32)
+
+
+def float_to_pcm16(audio: np.ndarray) -> np.ndarray:
+    """Convert float32 audio in [-1, 1] back to int16 PCM with clipping"""
+    return np.clip(np.rint(audio * 32768.0), -32768, 32767).astype(np.int16)
+
+def downmix(samples: np.ndarray) -> np.ndarray:
+    """Average interleaved channels of int16 PCM into float32 mono"""
+    if samples.ndim == 1:
+        return pcm_to_float32(samples)
+    if samples.shape[1] == 1:
+        return pcm_to_float32(samples[:, 0])
+    return np.multiply(samples.sum(axis=1, dtype=np.int32), 1.0 / (32768.0 * samples.shape[1]), dtype=np.float32)
+
+class Resampler:
+    """Polyphase FIR resampler that keeps its state across chunks
+
+    The anti-aliasing filter is a Kaiser-windowed sinc designed the same way
+    as scipy.signal.resample_poly. Output samples sharing a filter phase form
+    a strided sliding window over the input, so each phase is a single
+    matrix-vector product instead of a Python loop over samples.
+    """
+
+    def __init__(self, src_rate: int, dst_rate: int = TARGET_SAMPLE_RATE, half_width: int = 10):
+        divisor = gcd(src_rate, dst_rate)
+        self.up = dst_rate // divisor
+        self.down = src_rate // divisor
+
+        max_rate = max(self.up, self.down)
+        self.delay = half_width * max_rate
+        n_taps = 2 * self.delay + 1
+        cutoff = 1.0 / max_rate
+        t = np.arange(n_taps) - self.delay
+        taps = cutoff * np.sinc(cutoff * t) * np.kaiser(n_taps, 5.0) * self.up
+
+        # phases[p, k] = taps[p + k * up]; stored reversed to dot with input windows
+        self.width = -(-n_taps // self.up)
+        taps = np.pad(taps, (0, self.width * self.up - n_taps))
+        self._phases = np.ascontiguousarray(taps.reshape(self.width, self.up).T[:, ::-1], dtype=np.float32)
+        self.reset()
+
+    def reset(self):
+        # Input before the first sample is treated as silence
+        self._history = np.zeros(self.width, dtype=np.float32)
+        self._history_start = -self.width
+        self._consumed = 0
+        self._produced = 0
+
+    def _input_index(self, n: int) -> int:
+        return (n * self.down + self.delay) // self.up
+
+    def process(self, audio: np.ndarray) -> np.ndarray:
+        """Resample the next chunk of float32 mono audio"""
+        if self.up == self.down:
+            return audio.astype(np.float32, copy=False)
+
+        buffer = np.concatenate((self._history, audio.astype(np.float32, copy=False)))
+        buffer_start = self._history_start
+        self._consumed += len(audio)
+
+        # Outputs whose filter window ends inside the input received so far
+        last = self._consumed * self.up - 1 - self.delay
+        n_end = max(self._produced, last // self.down + 1 if last >= 0 else 0)
+        out = self._compute(buffer, buffer_start, self._produced, n_end)
+        self._produced = n_end
+
+        keep_from = min(self._input_index(self._produced) - self.width + 1, self._consumed)
+        self._history = buffer[keep_from - buffer_start:].copy()
+        self._history_start = keep_from
+        return out
+
+    def flush(self) -> np.ndarray:
+        """Emit the remaining output, padding the input with silence"""
+        if self.up == self.down:
+            return np.zeros(0, dtype=np.float32)
+
+        total = -(-self._consumed * self.up // self.down)
+        if total <= self._produced:
+            return np.zeros(0, dtype=np.float32)
+        padding = self._input_index(total - 1) - self._consumed + 1
+        out = self.process(np.zeros(max(padding, 0), dtype=np.float32))
+        # The silence padding may yield outputs past the end of the real input
+        out = out[:len(out) - max(0, self._produced - total)]
+        self.reset()
+        return out
+
+    def _compute(self, buffer: np.ndarray, buffer_start: int, n_start: int, n_end: int) -> np.ndarray:
+        count = n_end - n_start
+        out = np.empty(count, dtype=np.float32)
+        if count <= 0:
+            return out
+
+        if count < 8 * self.up:
+            # Small streaming chunks: gather every window at once
+            position = np.arange(n_start, n_end, dtype=np.int64) * self.down + self.delay
+            first = position // self.up - self.width + 1 - buffer_start
+            windows = buffer[first[:, None] + np.arange(self.width)]
+            return np.einsum('ij,ij->i', windows, self._phases[position % self.up]).astype(np.float32, copy=False)
+
+        windows = sliding_window_view(buffer, self.width)
+        for residue in range(min(self.up, count)):
+            n = n_start + residue
+            position = n * self.down + self.delay
+            phase = position % self.up
+            first = position // self.up - self.width + 1 - buffer_start
+            outputs = len(range(residue, count, self.up))
+            out[residue::self.up] = windows[first:first + (outputs - 1) * self.down + 1:self.down] @ self._phases[phase]
+        return out
+
+def resample(audio: np.ndarray, src_rate: int, dst_rate: int = TARGET_SAMPLE_RATE) -> np.ndarray:
+    """Resample a whole float32 mono buffer"""
+    if src_rate == dst_rate:
+        return audio.astype(np.float32, copy=False)
+    resampler = Resampler(src_rate, dst_rate)
+    return np.concatenate((resampler.process(audio), resampler.flush()))
+
+def normalize_audio(samples: np.ndarray, sample_rate: int, target_rate: int = TARGET_SAMPLE_RATE) -> np.ndarray:
+    """Down-mix and resample int16 PCM to the int16 mono stream the ASR engines expect
+
+    Audio that is already in the target format is returned as a view.
+    """
+    if samples.ndim == 2 and samples.shape[1] == 1 and sample_rate == target_rate:
+        return samples[:, 0]
+    if samples.ndim == 1 and sample_rate == target_rate:
+        return samples
+    return float_to_pcm16(resample(downmix(samples), sample_rate, target_rate))
+
+class StreamingAudioConverter:
+    """Convert interleaved int16 PCM chunks of any rate/channel count to 16 kHz mono"""
+
+    def __init__(self, sample_rate: int, channels: int = 1, target_rate: int = TARGET_SAMPLE_RATE):
+        self.channels = channels
+        self.frame_size = 2 * channels
+        self.passthrough = channels == 1 and sample_rate == target_rate
+        self.resampler = None if sample_rate == target_rate else Resampler(sample_rate, target_rate)
+        self._remainder = b""
+
+    def convert(self, chunk: bytes) -> np.ndarray:
+        """Return the int16 mono samples that can be produced from this chunk"""
+        data = self._remainder + chunk if self._remainder else chunk
+        usable = len(data) - len(data) % self.frame_size
+        self._remainder = bytes(data[usable:])
+        samples = np.frombuffer(data, dtype='<i2', count=usable // 2)
+        if self.passthrough:
+            return samples
+
+        audio = downmix(samples.reshape(-1, self.channels))
+        if self.resampler is not None:
+            audio = self.resampler.process(audio)
+        return float_to_pcm16(audio)
+
+    def flush(self) -> np.ndarray:
+        self._remainder = b""
+        if self.resampler is None:
+            return np.zeros(0, dtype=np.int16)
+        return float_to_pcm16(self.resampler.flush())
@@ -0,0 +1,178 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+class LRUCache:
+    """In-process LRU keyed by string, evicting by total payload size"""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, bytes]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: str, value: bytes):
+        size = len(value)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= len(previous)
+            self._entries[key] = value
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= len(evicted)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "max_bytes": self.max_bytes,
+        }
+
+class RedisTier:
+    """Shared Redis tier; failures degrade to a miss instead of failing the request"""
+
+    # After a connection error, skip Redis for this many seconds
+    RETRY_AFTER_SEC = 30.0
+
+    def __init__(self, url: str, ttl_sec: int, prefix: str = "zoo:asr:"):
+        import redis
+
+        self.client = redis.Redis.from_url(url, socket_timeout=0.5, socket_connect_timeout=0.5)
+        self.ttl_sec = ttl_sec
+        self.prefix = prefix
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+        self._down_until = 0.0
+
+    def get(self, key: str) -> Optional[bytes]:
+        if time.monotonic() < self._down_until:
+            return None
+        try:
+            value = self.client.get(self.prefix + key)
+        except Exception as e:
+            self._failed(e)
+            return None
+        if value is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return value
+
+    def put(self, key: str, value: bytes):
+        if time.monotonic() < self._down_until:
+            return
+        try:
+            self.client.set(self.prefix + key, value, ex=self.ttl_sec)
+        except Exception as e:
+            self._failed(e)
+
+    def _failed(self, error: Exception):
+        self.errors += 1
+        self._down_until = time.monotonic() + self.RETRY_AFTER_SEC
+        logger.warning("Transcription cache Redis tier unavailable: %s", error)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"hits": self.hits, "misses": self.misses, "errors": self.errors, "ttl_sec": self.ttl_sec}
+
+class TranscriptionCache:
+    """Content-addressed cache of ASR results with memory and Redis tiers"""
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024, redis_url: Optional[str] = None,
+                 ttl_sec: int = 7 * 24 * 3600):
+        self.memory = LRUCache(max_bytes)
+        self.redis = RedisTier(redis_url, ttl_sec) if redis_url else None
+
+    @classmethod
+    def from_env(cls) -> "TranscriptionCache":
+        if os.getenv("TRANSCRIPTION_CACHE", "1") != "1":
+            return cls(max_bytes=0)
+        return cls(
+            max_bytes=int(os.getenv("TRANSCRIPTION_CACHE_MB", "64")) * 1024 * 1024,
+            redis_url=os.getenv("REDIS_URL"),
+            ttl_sec=int(os.getenv("TRANSCRIPTION_CACHE_TTL", str(7 * 24 * 3600)))
+        )
+
+    @staticmethod
+    def make_key(samples: np.ndarray, sample_rate: int, model: str, language: str = "ru",
+                 settings: str = "") -> str:
+        """Hash the decoded PCM together with everything that affects the transcript
+        
+        settings describes the backend's VAD and chunking (ASRBackend.settings).
+        """
+        digest = hashlib.blake2b(digest_size=20)
+        digest.update(f"{model}|{language}|{settings}|{sample_rate}|{samples.shape}|".encode("utf-8"))
+        digest.update(np.ascontiguousarray(samples).data)
+        return digest.hexdigest()
+
+    def get(self, key: str) -> Optional[dict]:
+        value = self.memory.get(key)
+        if value is None and self.redis is not None:
+            value = self.redis.get(key)
+            if value is not None:
+                # Promote shared hits into this process
+                self.memory.put(key, value)
+        # Every hit returns a fresh dict so callers may mutate it
+        return json.loads(value) if value is not None else None
+
+    def put(self, key: str, result: dict):
+        value = json.dumps(result, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        self.memory.put(key, value)
+        if self.redis is not None:
+            self.redis.put(key, value)
+
+    def stats(self) -> Dict[str, Any]:
+        memory = self.memory.stats()
+        lookups = memory["hits"] + memory["misses"]
+        hits = memory["hits"] + (self.redis.hits if self.redis else 0)
+        return {
+            "hit_rate": hits / lookups if lookups else 0.0,
+            "memory": memory,
+            "redis": self.redis.stats() if self.redis else None,
+        }
+
+_cache: Optional[TranscriptionCache] = None
+_cache_lock = threading.Lock()
+
+def get_transcription_cache() -> TranscriptionCache:
+    """Process-wide cache instance, configured from the environment on first use"""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = TranscriptionCache.from_env()
+    return _cache
@@ -0,0 +1,116 @@
+import operator
+import re
+from functools import partial
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from engine.rules import RuleEngine
+
+# Entity types and fields extracted when no config has been posted. The vitals
+# bounds are the ones EntityNormalizer used to hard-code
+DEFAULT_ENTITIES = [
+    {"name": "animal", "fields": ["species", "name", "id"]},
+    {"name": "behavior", "fields": ["type", "intensity", "duration_sec"]},
+    {"name": "vitals", "fields": ["temperature_c", "weight_kg"],
+     "validators": {"temperature_c": ">= 30 & <= 45", "weight_kg": ">= 0.1 & <= 10000"}},
+    {"name": "feeding", "fields": ["food", "amount_g", "time"]},
+    {"name": "relations", "fields": ["animal_id", "relation_type"]},
+    {"name": "location", "fields": ["enclosure", "zone"]},
+    {"name": "alert", "fields": ["severity", "message"]},
+    {"name": "observation", "fields": ["date"]},
+]
+
+# How out-of-range values are described in alerts
+ALERT_LABELS = {"temperature_c": ("temperature", "°C"), "weight_kg": ("weight", "kg")}
+
+# Reflected so that partial(operator, bound)(value) reads "value <op> bound"
+_REFLECTED_OPERATORS = {"<=": operator.ge, ">=": operator.le, "<": operator.gt, ">": operator.lt,
+                        "==": operator.eq, "!=": operator.ne}
+_COMPARISON = re.compile(r"\s*(<=|>=|==|!=|<|>)\s*(-?\d+(?:[.,]\d+)?)\s*")
+
+class Validator:
+    """One compiled field check; alerts are raised when the predicate is false"""
+
+    __slots__ = ("entity", "field", "expression", "check", "message")
+
+    def __init__(self, entity: str, field: str, expression: str):
+        self.entity = entity
+        self.field = field
+        self.expression = expression
+        self.check = compile_validator(expression)
+        label, unit = ALERT_LABELS.get(field, (field, ""))
+        self.message = f"Abnormal {label}: {{}}{unit}"
+
+def compile_validator(expression: str) -> Callable[[float], bool]:
+    """Compile ">= 25 & <= 45" into a predicate; `&` binds tighter than `|`"""
+    alternatives = []
+    for alternative in expression.split("|"):
+        checks = []
+        for term in alternative.split("&"):
+            match = _COMPARISON.fullmatch(term)
+            if not match:
+                raise ValueError(
+                    f"Invalid validator '{expression}': use comparisons like '>= 25 & <= 45'"
+                )
+            bound = float(match.group(2).replace(',', '.'))
+            checks.append(partial(_REFLECTED_OPERATORS[match.group(1)], bound))
+        alternatives.append(tuple(checks))
+    
+    def check(value: float) -> bool:
+        for checks in alternatives:
+            for predicate in checks:
+                if not predicate(value):
+                    break
+            else:
+                return True
+        return False
+    
+    return check
+
+def _split_key(key: str) -> Tuple[str, str]:
+    entity, _, field = key.partition(".")
+    if not entity or not field:
+        raise ValueError(f"Normalization tables are keyed as 'entity.field', got '{key}'")
+    return entity, field
+
+class CompiledEntityConfig:
+    """EntityConfig compiled once per version into a rule scanner, validators and lookup tables
+
+    Instances are never modified; processes switch versions by replacing the
+    reference, so a request sees either the old config or the new one.
+    """
+
+    def __init__(self, entities: Optional[List[Dict[str, Any]]] = None, rules: Optional[Dict[str, str]] = None,
+                 normalization: Optional[Dict[str, Dict[str, str]]] = None, version: int = 0):
+        self.version = version
+        self.entities = [dict(entity) for entity in (entities or DEFAULT_ENTITIES)]
+        self.rules = dict(rules or {})
+        self.normalization = {key: dict(table) for key, table in (normalization or {}).items()}
+
+        self.rule_engine = RuleEngine.from_config(self.rules)
+        self.entity_types = {entity["name"]: list(entity.get("fields") or []) for entity in self.entities}
+        self.validators = tuple(
+            Validator(entity["name"], field, expression)
+            for entity in self.entities
+            for field, expression in (entity.get("validators") or {}).items()
+        )
+        # Grouped per entity type so validation does one lookup per type
+        grouped: Dict[str, list] = {}
+        for validator in self.validators:
+            grouped.setdefault(validator.entity, []).append((validator.field, validator.check, validator.message))
+        self.checks = tuple((entity, tuple(checks)) for entity, checks in grouped.items())
+        # Lower-cased once here so normalization is a single dict lookup
+        self.tables = {
+            _split_key(key): {phrase.lower(): value for phrase, value in table.items()}
+            for key, table in self.normalization.items()
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any], version: int = 0) -> "CompiledEntityConfig":
+        return cls(data.get("entities"), data.get("rules"), data.get("normalization"), version)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "entities": self.entities,
+            "rules": self.rules,
+            "normalization": self.normalization,
+            "version": self.version,
+        }
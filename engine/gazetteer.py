@@ -0,0 +1,219 @@
+import re
+import threading
+from collections import deque
+from typing import Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+class GazetteerEntry(NamedTuple):
+    entity: str
+    field: str
+    value: str
+    animal_id: Optional[int] = None
+
+class GazetteerMatch(NamedTuple):
+    entity: str
+    field: str
+    value: str
+    animal_id: Optional[int]
+    start: int
+    end: int
+    text: str
+
+_TOKEN = re.compile(r"\w+")
+
+# Latin animal names come back from Russian ASR in Cyrillic ("Sonya" -> "Соня")
+_TRANSLIT_DIGRAPHS = [
+    ("shch", "щ"), ("sch", "щ"), ("zh", "ж"), ("kh", "х"), ("ts", "ц"), ("ch", "ч"), ("sh", "ш"),
+    ("yu", "ю"), ("ya", "я"), ("yo", "ё"), ("ye", "е"),
+]
+_TRANSLIT_LETTERS = str.maketrans({
+    "a": "а", "b": "б", "c": "к", "d": "д", "e": "е", "f": "ф", "g": "г", "h": "х", "i": "и",
+    "j": "й", "k": "к", "l": "л", "m": "м", "n": "н", "o": "о", "p": "п", "q": "к", "r": "р",
+    "s": "с", "t": "т", "u": "у", "v": "в", "w": "в", "x": "кс", "y": "ы", "z": "з",
+})
+
+def cyrillic_variant(word: str) -> Optional[str]:
+    """Rough Latin-to-Cyrillic transliteration of a name, or None if nothing to do"""
+    word = word.lower()
+    if not re.fullmatch(r"[a-z]+", word):
+        return None
+    for latin, cyrillic in _TRANSLIT_DIGRAPHS:
+        word = word.replace(latin, cyrillic)
+    return word.translate(_TRANSLIT_LETTERS)
+
+def _normal_word(word: str) -> str:
+    return word.lower().replace("ё", "е")
+
+class Gazetteer:
+    """Aho-Corasick matcher over lemmatized tokens for known names, species, foods and behaviours
+
+    Text tokens are reduced to the first pymorphy lemma. Because pymorphy
+    guesses differently for unknown words such as pet names, every phrase is
+    indexed under the lemmas of all its inflected forms, so one linear pass
+    finds "Жужу", "Жуже" and "Жужа" alike.
+    """
+
+    def __init__(self, morph_vocab=None):
+        if morph_vocab is None:
+            from natasha import MorphVocab
+            morph_vocab = MorphVocab()
+        self.morph_vocab = morph_vocab
+        self._lock = threading.RLock()
+        # Trie as parallel lists: children, failure link, entries ending here
+        self._children: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._outputs: List[List[Tuple[int, GazetteerEntry]]] = [[]]
+        # Nearest node on the failure chain that has outputs
+        self._output_link: List[int] = [0]
+        self._dirty = False
+        # Terminal nodes per source so entries can be removed without a rebuild
+        self._sources: Dict[str, List[Tuple[int, GazetteerEntry]]] = {}
+        self._animals: Dict[int, Tuple[str, str]] = {}
+        # Bumped on every change; caches of extraction results key on it
+        self.version = 0
+
+    def lemma(self, word: str) -> str:
+        word = _normal_word(word)
+        if word.isdigit():
+            return word
+        return _normal_word(self.morph_vocab.parse(word)[0].normal)
+
+    def _word_lemmas(self, word: str) -> Set[str]:
+        """Every lemma a text token of this word may be reduced to"""
+        word = _normal_word(word)
+        lemmas = {self.lemma(word)}
+        for form in self.morph_vocab.parse(word):
+            for inflected in form.lexeme:
+                lemmas.add(self.lemma(inflected.word))
+        return lemmas
+
+    def add(self, phrase: str, entry: GazetteerEntry, source: str = "static"):
+        """Index a phrase; source groups entries that are replaced together"""
+        words = _TOKEN.findall(phrase)
+        if not words:
+            return
+        with self._lock:
+            paths = [()]
+            for word in words:
+                paths = [path + (lemma,) for path in paths for lemma in self._word_lemmas(word)]
+            for path in paths:
+                node = 0
+                for lemma in path:
+                    child = self._children[node].get(lemma)
+                    if child is None:
+                        child = len(self._children)
+                        self._children[node][lemma] = child
+                        self._children.append({})
+                        self._fail.append(0)
+                        self._outputs.append([])
+                        self._output_link.append(0)
+                    node = child
+                output = (len(path), entry)
+                if output not in self._outputs[node]:
+                    self._outputs[node].append(output)
+                    self._sources.setdefault(source, []).append((node, output))
+            self._dirty = True
+            self.version += 1
+
+    def remove_source(self, source: str):
+        """Drop every entry added under a source; trie nodes are kept for reuse"""
+        with self._lock:
+            for node, output in self._sources.pop(source, []):
+                if output in self._outputs[node]:
+                    self._outputs[node].remove(output)
+            self._dirty = True
+            self.version += 1
+
+    def add_map(self, mapping: Iterable[str], entity: str, field: str):
+        """Index the keys of a normalization map (e.g. EntityNormalizer.species_map)"""
+        for phrase in mapping:
+            self.add(phrase, GazetteerEntry(entity, field, phrase), source=f"{entity}.{field}")
+
+    def set_animal(self, animal_id: int, name: Optional[str], species: Optional[str]):
+        """Add or update one animal; only its own entries are touched"""
+        with self._lock:
+            if self._animals.get(animal_id) == (name, species):
+                return
+            self.remove_animal(animal_id)
+            self._animals[animal_id] = (name, species)
+            source = f"animal:{animal_id}"
+            if name:
+                entry = GazetteerEntry("animal", "name", name, animal_id)
+                self.add(name, entry, source)
+                variant = cyrillic_variant(name)
+                if variant:
+                    self.add(variant, entry, source)
+
+    def remove_animal(self, animal_id: int):
+        with self._lock:
+            if self._animals.pop(animal_id, None) is not None:
+                self.remove_source(f"animal:{animal_id}")
+
+    def sync_animals(self, rows: Iterable[Tuple[int, str, str]]) -> int:
+        """Apply the difference between the animals table and the indexed animals"""
+        with self._lock:
+            before = self.version
+            seen = set()
+            for animal_id, name, species in rows:
+                seen.add(animal_id)
+                self.set_animal(animal_id, name, species)
+            for animal_id in set(self._animals) - seen:
+                self.remove_animal(animal_id)
+            return self.version - before
+
+    def animal_species(self, animal_id: int) -> Optional[str]:
+        animal = self._animals.get(animal_id)
+        return animal[1] if animal else None
+
+    def _build(self):
+        """Recompute failure links breadth-first; linear in the trie size"""
+        queue = deque()
+        for child in self._children[0].values():
+            self._fail[child] = 0
+            self._output_link[child] = 0
+            queue.append(child)
+        while queue:
+            node = queue.popleft()
+            for lemma, child in self._children[node].items():
+                fail = self._fail[node]
+                while fail and lemma not in self._children[fail]:
+                    fail = self._fail[fail]
+                fail = self._children[fail].get(lemma, 0)
+                self._fail[child] = fail if fail != child else 0
+                self._output_link[child] = fail if self._outputs[fail] else self._output_link[fail]
+                queue.append(child)
+        self._dirty = False
+
+    def match(self, text: str) -> List[GazetteerMatch]:
+        """Find all indexed phrases in text in one pass over its tokens"""
+        tokens = [(token.start(), token.end(), self.lemma(token.group())) for token in _TOKEN.finditer(text)]
+        matches = []
+        with self._lock:
+            if self._dirty:
+                self._build()
+            children, fail, outputs, output_link = self._children, self._fail, self._outputs, self._output_link
+            node = 0
+            for index, (_, end, lemma) in enumerate(tokens):
+                while node and lemma not in children[node]:
+                    node = fail[node]
+                node = children[node].get(lemma, 0)
+                hit = node if outputs[node] else output_link[node]
+                while hit:
+                    for length, entry in outputs[hit]:
+                        start = tokens[index - length + 1][0]
+                        matches.append(GazetteerMatch(
+                            entry.entity, entry.field, entry.value, entry.animal_id, start, end, text[start:end]
+                        ))
+                    hit = output_link[hit]
+        # Leftmost first, longer phrases before their own suffixes
+        matches.sort(key=lambda match: (match.start, -match.end))
+        return matches
+
+def build_gazetteer(normalizer=None, morph_vocab=None) -> Gazetteer:
+    """Gazetteer seeded with the lookup tables of the normalizer (species, foods, behaviours)"""
+    if normalizer is None:
+        from engine.normalization import EntityNormalizer
+        normalizer = EntityNormalizer()
+    gazetteer = Gazetteer(morph_vocab)
+    for (entity, field), table in normalizer.tables().items():
+        gazetteer.add_map(table, entity, field)
+    return gazetteer
@@ -1,4 +1,10 @@
+import bisect
+import itertools
+import json
+import os
 import re
+import threading
+import numpy as np
 from natasha import (
     Segmenter,
     MorphVocab,
@@ -7,137 +13,526 @@ from natasha import (
     NewsSyntaxParser,
     NewsNERTagger,
     PER,
-    NamesExtractor,
     Doc
 )
-import spacy
-from typing import Dict, List, Any
-from datetime import datetime
+from natasha.data import NEWS_EMBEDDING
+from natasha.doc import adapt_spans, inject_morph
+from navec import Navec
+from navec.meta import Meta
+from navec.navec import META, PQ_, VOCAB
+from navec.pq import PQ
+from navec.tar import Tar
+from navec.vocab import Vocab
+from typing import Dict, Iterable, Iterator, List, Any, Optional
+from engine.cache import LRUCache
+from engine.entity_config import DEFAULT_ENTITIES, CompiledEntityConfig
+from engine.gazetteer import Gazetteer, GazetteerMatch, build_gazetteer
+from engine.metrics import stage
+from engine.rules import RuleEngine, RuleMatch
+
+# Pipeline stages run by each profile (NER_PROFILE). Only PER spans are read, and
+# their normalization needs morphology but never the dependency parse:
+#   fast    - segmentation + NER; names are kept as spoken, without lemmatization
+#   default - adds morphology, only when the note mentions a name; names stay
+#             Natasha's normalized (nominative) form
+#   full    - everything the original pipeline ran, including the spaCy pass,
+#             whose PER spans replace names with the text as spoken
+NER_PROFILES = {
+    "fast": {"morph": False, "syntax": False, "lemmas": False, "spacy": False},
+    "default": {"morph": True, "syntax": False, "lemmas": False, "spacy": False},
+    "full": {"morph": True, "syntax": True, "lemmas": True, "spacy": True},
+}
+
+# Documents per batch in extract_entities_batch; tagger batches are sized to match
+NER_BATCH_SIZE = int(os.getenv("NER_BATCH_SIZE", "64"))
+# spaCy worker processes for batch extraction (full profile only)
+NER_N_PROCESS = int(os.getenv("NER_N_PROCESS", "1"))
+
+# Joins documents for the batch regex pass; matches crossing it are re-scanned per document
+DOC_SEPARATOR = "\n\x00\n"
+
+# Memory for per-sentence extraction results; 0 turns the cache off
+NER_CACHE_MB = float(os.getenv("NER_CACHE_MB", "16"))
+
+# Map the Natasha embedding from disk instead of reading it into private memory
+NER_MMAP_EMBEDDING = os.getenv("NER_MMAP_EMBEDDING", "1") == "1"
+
+# Sentence boundaries: whitespace after terminal punctuation, or a line break
+_SENTENCE_BREAK = re.compile(r"(?<=[.!?…])\s+|\n+")
+
+# spaCy components the PER pass does not read
+SPACY_UNUSED_COMPONENTS = ["morphologizer", "parser", "attribute_ruler", "lemmatizer", "senter"]
+
+class MappedPQ(PQ):
+    """Quantized vectors whose arrays are read-only views of the embedding archive"""
+    
+    def precompute(self):
+        # The norms and the centroid product table (~27 MB) only serve sim();
+        # the taggers index codes directly
+        self.qdims = np.arange(self.qdim)
+
+def load_news_embedding(path: str = NEWS_EMBEDDING) -> Navec:
+    """NewsEmbedding with its quantized vectors memory-mapped from the archive
+    
+    The archive is an uncompressed tar, so pq.bin is mapped in place and every
+    process on the host shares the same page cache instead of a private copy.
+    """
+    with Tar(path) as tar:
+        meta = Meta.from_file(tar.load(META))
+        Meta.check_protocol(meta.protocol)
+        vocab = Vocab.from_file(tar.load(VOCAB))
+        offset = tar.tar.getmember(PQ_).offset_data
+    
+    vectors, dim, qdim, centroids = (int(value) for value in np.memmap(path, np.uint32, "r", offset, (4,)))
+    offset += 4 * 4
+    indexes = np.memmap(path, np.uint8, "r", offset, (vectors, qdim))
+    offset += vectors * qdim
+    codes = np.memmap(path, np.float32, "r", offset, (qdim, centroids, dim // qdim))
+    return Navec(meta, vocab, MappedPQ(vectors, dim, qdim, centroids, indexes, codes))
+
+def _has_known_name(entity: Dict[str, Any]) -> bool:
+    """Whether the name came from the gazetteer rather than the taggers"""
+    return any(mention["field"] == "name" for mention in entity.get("mentions", ()))
+
+def merge_fragment(entities: Dict[str, Any], fragment: Dict[str, Any], offset: int = 0) -> Dict[str, Any]:
+    """Merge the entities of one sentence into those of the text around it
+    
+    The first sentence that fills a field wins, as with the gazetteer and the
+    rules over a whole text. Animal names follow whole-text precedence: an
+    animal resolved against the animals table beats a name found by the
+    gazetteer, which beats a name guessed by the taggers, and among guessed
+    names the last one wins. Mention offsets are shifted by offset. Returns
+    what changed: new or replaced fields and the new mentions, per entity type.
+    """
+    delta = {}
+    for entity_type, values in fragment.items():
+        entity = entities.setdefault(entity_type, {})
+        changed = {}
+        if entity_type == "animal" and "id" in values and "id" not in entity:
+            for field in ("id", "name"):
+                if field in values and entity.get(field) != values[field]:
+                    entity[field] = changed[field] = values[field]
+        elif entity_type == "animal" and "name" in values and "id" not in entity and not _has_known_name(entity):
+            # The taggers overwrite names span by span, so a later name replaces a guess
+            if entity.get("name") != values["name"]:
+                entity["name"] = changed["name"] = values["name"]
+        for field, value in values.items():
+            if field == "mentions":
+                mentions = [
+                    dict(mention, start=mention["start"] + offset, end=mention["end"] + offset)
+                    for mention in value
+                ]
+                entity.setdefault("mentions", []).extend(mentions)
+                changed["mentions"] = mentions
+            elif field not in entity:
+                entity[field] = changed[field] = value
+        if changed:
+            delta[entity_type] = changed
+    return delta
 
 class EntityExtractor:
-    def __init__(self):
+    def __init__(self, profile: str = None, enabled_types: Optional[Iterable[str]] = None,
+                 rules: Optional[Dict[str, str]] = None, gazetteer: Optional[Gazetteer] = None,
+                 cache_bytes: int = None):
         """Initialize NER models and rules"""
-        # Natasha initialization
+        self.profile = profile or os.getenv("NER_PROFILE", "default")
+        if self.profile not in NER_PROFILES:
+            raise ValueError(f"Unknown NER profile '{self.profile}'. Available: {', '.join(NER_PROFILES)}")
+        self.stages = dict(NER_PROFILES[self.profile])
+        if os.getenv("NER_SPACY") is not None:
+            self.stages["spacy"] = os.getenv("NER_SPACY") == "1"
+        
+        # Entity types we're interested in
+        self.entity_types = {entity["name"]: list(entity["fields"]) for entity in DEFAULT_ENTITIES}
+        # None extracts everything; otherwise stages feeding disabled types are skipped
+        self.enabled_types = set(enabled_types) if enabled_types is not None else None
+        self.use_names = self._is_enabled("animal")
+        
+        # Natasha initialization; embeddings are only loaded when names are extracted
         self.segmenter = Segmenter()
         self.morph_vocab = MorphVocab()
+        if self.use_names:
+            self.emb = load_news_embedding() if NER_MMAP_EMBEDDING else NewsEmbedding()
+            self.ner_tagger = NewsNERTagger(self.emb)
+            self.morph_tagger = NewsMorphTagger(self.emb) if self.stages["morph"] else None
+            self.syntax_parser = NewsSyntaxParser(self.emb) if self.stages["syntax"] else None
+            # Sentences or documents sent through one forward pass in batch mode
+            self.ner_tagger.batch_size = NER_BATCH_SIZE
+            if self.morph_tagger is not None:
+                self.morph_tagger.batch_size = NER_BATCH_SIZE
         
-        self.emb = NewsEmbedding()
-        self.morph_tagger = NewsMorphTagger(self.emb)
-        self.syntax_parser = NewsSyntaxParser(self.emb)
-        self.ner_tagger = NewsNERTagger(self.emb)
+        # spaCy is optional and only loaded with the components the pass reads
+        self.nlp = None
+        if self.use_names and self.stages["spacy"]:
+            import spacy
+            self.nlp = spacy.load("ru_core_news_sm", disable=SPACY_UNUSED_COMPONENTS)
         
-        self.names_extractor = NamesExtractor(self.emb)
+        # Custom regex rules (built-ins, optionally overridden by EntityConfig.rules)
+        self.rule_engine = RuleEngine.from_config(rules)
         
-        # spaCy initialization
-        self.nlp = spacy.load("ru_core_news_sm")
+        # Known animals, species, foods and behaviours; the shared instance is
+        # kept in sync with the animals table by the backend
+        self.gazetteer = gazetteer if gazetteer is not None else build_gazetteer(morph_vocab=self.morph_vocab)
         
-        # Custom regex rules
-        self.rules = {
-            "temperature": r"(?i)(температура|температура тела)\s*(\d+[,\.]?\d*)\s*(°?[cс])",
-            "weight": r"(?i)(вес|масса)\s*(\d+[,\.]?\d*)\s*(кг|kg)",
-            "food_amount": r"(?i)(\d+[,\.]?\d*)\s*(грамм|г|kg|кг)",
-            "date": r"(?i)(\d{1,2}[.\-]\d{1,2}[.\-]\d{4}|\d{1,2}[.\-]\d{1,2})"
-        }
+        # Per-sentence results; keeper notes repeat the same phrases all day
+        if cache_bytes is None:
+            cache_bytes = int(NER_CACHE_MB * 1024 * 1024)
+        self.sentence_cache = LRUCache(cache_bytes) if cache_bytes > 0 else None
+        self._cache_lock = threading.Lock()
+        self._cache_generation = None
+        self.cache_invalidations = 0
         
-        # Entity types we're interested in
-        self.entity_types = {
-            "animal": ["species", "name", "id"],
-            "behavior": ["type", "intensity", "duration_sec"],
-            "vitals": ["temperature_c", "weight_kg"],
-            "feeding": ["food", "amount_g", "time"],
-            "relations": ["animal_id", "relation_type"],
-            "location": ["enclosure", "zone"],
-            "alert": ["severity", "message"]
-        }
+    def _is_enabled(self, entity_type: str) -> bool:
+        return self.enabled_types is None or entity_type in self.enabled_types
+    
+    def apply_config(self, config: CompiledEntityConfig):
+        """Extract the entity types and apply the rules of a compiled entity config
+        
+        Name models are only loaded at construction, so enabling "animal" on an
+        extractor built without it leaves names to the gazetteer.
+        """
+        self.entity_types = config.entity_types
+        self.enabled_types = set(config.entity_types)
+        self.rule_engine = config.rule_engine
         
     def extract_entities(self, text: str) -> Dict[str, Any]:
-        """Extract all entities from text"""
-        entities = {}
+        """Extract all entities from text, reusing cached results for sentences seen before"""
+        if self.sentence_cache is None:
+            return self._extract_text(text)
+        self._check_cache_generation()
+        
+        fragments = []
+        for start, sentence in self._sentences(text):
+            # Length-preserving normalization keeps cached offsets valid
+            key = re.sub(r"\s", " ", sentence)
+            cached = self.sentence_cache.get(key)
+            if cached is not None:
+                fragments.append((start, json.loads(cached)))
+                continue
+            entities = self._extract_text(sentence)
+            self.sentence_cache.put(key, json.dumps(entities, ensure_ascii=False).encode("utf-8"))
+            fragments.append((start, entities))
+        return self._merge_fragments(fragments)
+    
+    def _extract_text(self, text: str) -> Dict[str, Any]:
+        """Run every extraction stage over text without the cache"""
+        # Known names and vocabulary first; most notes need nothing else
+        with stage("gazetteer"):
+            known = self.gazetteer.match(text)
+        needs_ner = self._needs_ner(known)
         
         # Use Natasha for general NER
-        doc = Doc(text)
-        doc.segment(self.segmenter)
-        doc.tag_morph(self.morph_tagger)
-        doc.parse_syntax(self.syntax_parser)
-        doc.tag_ner(self.ner_tagger)
+        doc = None
+        if needs_ner:
+            with stage("natasha"):
+                doc = self._natasha_docs([text])[0]
         
-        # Normalize morphological tags
-        for token in doc.tokens:
-            token.lemmatize(self.morph_vocab)
+        # Use spaCy for additional processing
+        spacy_doc = None
+        if needs_ner and self.nlp is not None:
+            with stage("spacy"):
+                spacy_doc = self.nlp(text)
         
-        # Normalize NER spans
-        for span in doc.spans:
-            span.normalize(self.morph_vocab)
+        # Apply regex rules
+        with stage("rules"):
+            rule_entities = self._apply_regex_rules(text)
         
-        # Extract named entities
-        for span in doc.spans:
-            if span.type == "PER":  # Person names might be animal names
-                if "animal" not in entities:
-                    entities["animal"] = {}
-                entities["animal"]["name"] = span.normal
+        return self._collect_entities(known, doc, spacy_doc, rule_entities)
+    
+    def extract_entities_batch(self, texts: Iterable[str], batch_size: int = None,
+                               n_process: int = None) -> Iterator[Dict[str, Any]]:
+        """Lazily extract entities from many texts, yielding results in input order
         
-        # Use spaCy for additional processing
-        spacy_doc = self.nlp(text)
+        Texts are read batch_size at a time, so a generator over a large table
+        is never materialized. Each batch goes through the Natasha taggers in
+        one forward pass, spaCy's nlp.pipe and a single regex pass.
+        """
+        batch_size = batch_size or NER_BATCH_SIZE
+        texts = iter(texts)
+        
+        spacy_docs = None
+        if self.nlp is not None:
+            # tee only buffers the batch currently in flight
+            texts, spacy_texts = itertools.tee(texts)
+            spacy_docs = self.nlp.pipe(spacy_texts, batch_size=batch_size, n_process=n_process or NER_N_PROCESS)
+        
+        while True:
+            batch = list(itertools.islice(texts, batch_size))
+            if not batch:
+                return
+            
+            with stage("gazetteer_batch"):
+                batch_known = [self.gazetteer.match(text) for text in batch]
+            
+            # Only notes without a known animal name go through the taggers
+            docs = [None] * len(batch)
+            pending = [index for index, known in enumerate(batch_known) if self._needs_ner(known)]
+            if pending:
+                with stage("natasha_batch"):
+                    for index, doc in zip(pending, self._natasha_docs([batch[index] for index in pending])):
+                        docs[index] = doc
+            
+            batch_spacy_docs = [None] * len(batch)
+            if spacy_docs is not None:
+                with stage("spacy_batch"):
+                    # nlp.pipe streams every text; results for resolved notes are dropped
+                    batch_spacy_docs = [
+                        spacy_doc if docs[index] is not None else None
+                        for index, spacy_doc in enumerate(itertools.islice(spacy_docs, len(batch)))
+                    ]
+            
+            with stage("rules_batch"):
+                batch_rules = self._apply_regex_rules_batch(batch)
+            
+            for known, doc, spacy_doc, rule_entities in zip(batch_known, docs, batch_spacy_docs, batch_rules):
+                yield self._collect_entities(known, doc, spacy_doc, rule_entities)
+    
+    @staticmethod
+    def _sentences(text: str) -> Iterator[tuple]:
+        """Yield (offset, sentence) pairs; blank text yields nothing"""
+        start = 0
+        for match in itertools.chain(_SENTENCE_BREAK.finditer(text), [None]):
+            end = match.start() if match is not None else len(text)
+            sentence = text[start:end]
+            stripped = sentence.lstrip()
+            if stripped.strip():
+                yield start + len(sentence) - len(stripped), stripped.rstrip()
+            if match is not None:
+                start = match.end()
+    
+    def _merge_fragments(self, fragments: List[tuple]) -> Dict[str, Any]:
+        """Combine per-sentence results as if the text had been processed whole"""
+        entities = {}
+        for offset, fragment in fragments:
+            merge_fragment(entities, fragment, offset)
+        return entities
+    
+    def _check_cache_generation(self):
+        """Drop cached sentences once the gazetteer or the rules have changed"""
+        enabled = frozenset(self.enabled_types) if self.enabled_types is not None else None
+        generation = (self.gazetteer.version, self.rule_engine, enabled)
+        with self._cache_lock:
+            if self._cache_generation is not None and generation != self._cache_generation:
+                self.sentence_cache.clear()
+                self.cache_invalidations += 1
+            self._cache_generation = generation
+    
+    def cache_stats(self) -> Dict[str, Any]:
+        """Hit ratio and memory use of the sentence cache"""
+        if self.sentence_cache is None:
+            return {"enabled": False}
+        stats = self.sentence_cache.stats()
+        lookups = stats["hits"] + stats["misses"]
+        return {
+            "enabled": True,
+            "hit_rate": stats["hits"] / lookups if lookups else 0.0,
+            "invalidations": self.cache_invalidations,
+            **stats
+        }
+    
+    def _needs_ner(self, known: List[GazetteerMatch]) -> bool:
+        """Neural NER only runs when the gazetteer did not resolve an animal name"""
+        return self.use_names and self._is_enabled("animal") and not any(match.field == "name" for match in known)
+    
+    def _collect_entities(self, known: List[GazetteerMatch], doc: Optional[Doc], spacy_doc,
+                          rule_entities: Dict[str, Any]) -> Dict[str, Any]:
+        """Combine gazetteer, Natasha, spaCy and rule results for one text"""
+        entities = {}
+        
+        # Gazetteer hits keep the first value per field, like the rules
+        for match in known:
+            if not self._is_enabled(match.entity):
+                continue
+            entity = entities.setdefault(match.entity, {})
+            entity.setdefault(match.field, match.value)
+            if match.animal_id is not None:
+                entity.setdefault("id", match.animal_id)
+            entity.setdefault("mentions", []).append({
+                "field": match.field,
+                "value": match.value,
+                "start": match.start,
+                "end": match.end,
+                "text": match.text
+            })
+        
+        # Resolved animals bring their species along when it was not said
+        animal = entities.get("animal")
+        if animal and "id" in animal and "species" not in animal:
+            species = self.gazetteer.animal_species(animal["id"])
+            if species:
+                animal["species"] = species
+        
+        # Extract named entities
+        if doc is not None:
+            for span in doc.spans:
+                if span.type == PER:  # Person names might be animal names
+                    if "animal" not in entities:
+                        entities["animal"] = {}
+                    entities["animal"]["name"] = span.normal
         
         # Extract entities with spaCy
-        for ent in spacy_doc.ents:
-            if ent.label_ == "PERSON":  # Might be animal names
-                if "animal" not in entities:
-                    entities["animal"] = {}
-                entities["animal"]["name"] = ent.text
+        if spacy_doc is not None:
+            for ent in spacy_doc.ents:
+                # ru_core_news_sm tags people PER, like Natasha
+                if ent.label_ == PER:  # Might be animal names
+                    if "animal" not in entities:
+                        entities["animal"] = {}
+                    entities["animal"]["name"] = ent.text
         
-        # Apply regex rules
-        entities.update(self._apply_regex_rules(text))
+        for entity_type, values in rule_entities.items():
+            if not self._is_enabled(entity_type):
+                continue
+            entity = entities.setdefault(entity_type, {})
+            mentions = entity.get("mentions", []) + values.get("mentions", [])
+            entity.update(values)
+            entity["mentions"] = sorted(mentions, key=lambda mention: mention["start"])
         
         return entities
     
+    def _natasha_docs(self, texts: List[str]) -> List[Doc]:
+        """Run the Natasha stages enabled by the profile over a batch of texts
+        
+        Equivalent to Doc.segment/tag_ner/tag_morph per text, but every tagger
+        sees the whole batch at once.
+        """
+        docs = [Doc(text) for text in texts]
+        for doc in docs:
+            doc.segment(self.segmenter)
+            doc.spans = []
+        
+        tagged = [doc for doc in docs if doc.text.strip()]
+        for doc, markup in zip(tagged, self.ner_tagger.map([doc.text for doc in tagged])):
+            doc.spans = list(adapt_spans(doc, markup.spans))
+            doc.envelop_span_tokens()
+            doc.envelop_sent_spans()
+        
+        # Morphology only affects how spans are normalized, so skip it for texts
+        # without names (unless the profile wants every lemma)
+        if self.morph_tagger is not None:
+            sents = [
+                sent for doc in docs
+                if self.stages["lemmas"] or any(span.type == PER for span in doc.spans)
+                for sent in doc.sents
+            ]
+            markups = self.morph_tagger.map([[token.text for token in sent.tokens] for sent in sents])
+            for sent, markup in zip(sents, markups):
+                inject_morph(sent.tokens, markup.tokens)
+        
+        for doc in docs:
+            if self.syntax_parser is not None:
+                doc.parse_syntax(self.syntax_parser)
+            
+            names = [span for span in doc.spans if span.type == PER]
+            if self.stages["lemmas"]:
+                # Normalize morphological tags
+                for token in doc.tokens:
+                    token.lemmatize(self.morph_vocab)
+                names = doc.spans
+            
+            # Normalize NER spans
+            for span in names:
+                span.normalize(self.morph_vocab)
+        return docs
+    
+    def warmup(self):
+        """Run the full pipeline once on a short phrase"""
+        self.extract_entities("Жираф Жужа ела 700 грамм люцерны, температура 37.8")
+
     def _apply_regex_rules(self, text: str) -> Dict[str, Any]:
         """Apply custom regex rules to extract entities"""
+        return self._rule_entities(self.rule_engine.scan(text))
+
+    def _apply_regex_rules_batch(self, texts: List[str]) -> List[Dict[str, Any]]:
+        """Scan all documents joined together in one pass"""
+        starts = []
+        offset = 0
+        for text in texts:
+            starts.append(offset)
+            offset += len(text) + len(DOC_SEPARATOR)
+        
+        doc_matches: List[List[RuleMatch]] = [[] for _ in texts]
+        rescan = set()
+        for match in self.rule_engine.scan(DOC_SEPARATOR.join(texts)):
+            index = bisect.bisect_right(starts, match.start) - 1
+            start = match.start - starts[index]
+            if start >= len(texts[index]) or match.end - starts[index] > len(texts[index]):
+                # A permissive custom rule ran across the separator; it may have
+                # swallowed matches in the following documents too
+                last = bisect.bisect_right(starts, match.end - 1) - 1
+                rescan.update(range(index, last + 1))
+                continue
+            doc_matches[index].append(match._replace(start=start, end=match.end - starts[index]))
+        for index in rescan:
+            doc_matches[index] = self.rule_engine.scan(texts[index])
+        return [self._rule_entities(matches) for matches in doc_matches]
+
+    def _rule_entities(self, matches: List[RuleMatch]) -> Dict[str, Any]:
+        """Group rule matches by entity type
+        
+        The first value of each field is kept as the field itself, and every
+        match is listed under "mentions" with its character offsets.
+        """
         entities = {}
+        for match in matches:
+            entity = entities.setdefault(match.entity, {})
+            entity.setdefault(match.field, match.value)
+            entity.setdefault("mentions", []).append({
+                "field": match.field,
+                "value": match.value,
+                "start": match.start,
+                "end": match.end,
+                "text": match.text
+            })
+        return entities
+
+class IncrementalExtractor:
+    """Running entities of one live transcript, fed one finalized utterance at a time
+    
+    Only the new utterance goes through the extractor, so an update costs the
+    same however long the session runs. Utterances are merged like the
+    sentences of one note, as if the final texts were joined by newlines;
+    mention offsets point into that transcript.
+    """
+    
+    def __init__(self, extractor: EntityExtractor):
+        self.extractor = extractor
+        self.entities: Dict[str, Any] = {}
+        self.length = 0
+    
+    def add_final(self, text: str) -> Dict[str, Any]:
+        """Extract a final utterance, merge it into the state and return the delta"""
+        text = text.strip()
+        if not text:
+            return {}
+        offset = self.length + 1 if self.length else 0
+        self.length = offset + len(text)
+        return merge_fragment(self.entities, self.extractor.extract_entities(text), offset)
+    
+    def preview(self, text: str) -> Dict[str, Any]:
+        """Rule-only entities of a partial result; the state is left alone"""
+        with stage("rules"):
+            entities = self.extractor._apply_regex_rules(text)
+        return {
+            entity_type: values for entity_type, values in entities.items()
+            if self.extractor._is_enabled(entity_type)
+        }
+    
+    def annotate(self, events: Iterable[dict]) -> List[dict]:
+        """Add entities to a batch of stream events
         
-        # Temperature extraction
-        temp_match = re.search(self.rules["temperature"], text)
-        if temp_match:
-            if "vitals" not in entities:
-                entities["vitals"] = {}
-            # Replace comma with dot for proper float conversion
-            temp_value = temp_match.group(2).replace(',', '.')
-            entities["vitals"]["temperature_c"] = float(temp_value)
-        
-        # Weight extraction
-        weight_match = re.search(self.rules["weight"], text)
-        if weight_match:
-            if "vitals" not in entities:
-                entities["vitals"] = {}
-            weight_value = weight_match.group(2).replace(',', '.')
-            entities["vitals"]["weight_kg"] = float(weight_value)
-        
-        # Food amount extraction
-        food_match = re.search(self.rules["food_amount"], text)
-        if food_match:
-            if "feeding" not in entities:
-                entities["feeding"] = {}
-            amount_value = food_match.group(1).replace(',', '.')
-            entities["feeding"]["amount_g"] = float(amount_value)
-        
-        # Date extraction
-        date_match = re.search(self.rules["date"], text)
-        if date_match:
-            try:
-                # Try to parse the date
-                date_str = date_match.group(1)
-                if len(date_str.split('.')) == 3 or len(date_str.split('-')) == 3:
-                    # Full date with year
-                    date_obj = datetime.strptime(date_str, "%d.%m.%Y") if '.' in date_str else datetime.strptime(date_str, "%d-%m-%Y")
-                else:
-                    # Date without year
-                    date_obj = datetime.strptime(date_str, "%d.%m") if '.' in date_str else datetime.strptime(date_str, "%d-%m")
-                
-                if "observation" not in entities:
-                    entities["observation"] = {}
-                entities["observation"]["date"] = date_obj.isoformat()
-            except ValueError:
-                # If we can't parse the date, skip it
-                pass
-        
-        return entities
\ No newline at end of file
+        Each final event is followed by an entity_update event carrying the
+        delta (if any); partial events get a rule-only "entities" preview.
+        """
+        annotated = []
+        for event in events:
+            if event.get("event") == "final":
+                annotated.append(event)
+                delta = self.add_final(event["text"])
+                if delta:
+                    annotated.append({"event": "entity_update", "entities": delta})
+            elif event.get("event") == "partial":
+                preview = self.preview(event["text"])
+                annotated.append(dict(event, entities=preview) if preview else event)
+            else:
+                annotated.append(event)
+        return annotated
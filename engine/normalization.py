@@ -1,5 +1,10 @@
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Tuple
 import re
+from engine.entity_config import CompiledEntityConfig
+
+# Fields dictated as numbers; strings are converted to float
+NUMERIC_FIELDS = (("vitals", "temperature_c"), ("vitals", "weight_kg"), ("feeding", "amount_g"))
+NUMBER_TYPES = (int, float)
 
 class EntityNormalizer:
     """Normalize extracted entities to standard formats"""
@@ -37,70 +42,65 @@ class EntityNormalizer:
             # Add more as needed
         }
         
+        self.apply_config(CompiledEntityConfig())
+    
+    def apply_config(self, config: CompiledEntityConfig):
+        """Switch to a compiled entity config; custom tables extend the built-in maps"""
+        tables = {
+            ("animal", "species"): self.species_map,
+            ("feeding", "food"): self.food_map,
+            ("behavior", "type"): self.behavior_map,
+        }
+        for key, table in config.tables.items():
+            tables[key] = {**tables.get(key, {}), **table}
+        # One reference swap, so concurrent requests never mix two versions
+        self._compiled = (config, tuple((entity, field, table) for (entity, field), table in tables.items()))
+    
+    @property
+    def config(self) -> CompiledEntityConfig:
+        return self._compiled[0]
+    
+    def tables(self) -> Dict[Tuple[str, str], Dict[str, str]]:
+        """Lookup tables in effect, keyed by (entity, field)"""
+        return {(entity, field): table for entity, field, table in self._compiled[1]}
+    
     def normalize_entities(self, entities: Dict[str, Any]) -> Dict[str, Any]:
         """Normalize all entities to standard formats"""
         normalized = entities.copy()
         
-        # Normalize animal species
-        if "animal" in normalized and "species" in normalized["animal"]:
-            species = normalized["animal"]["species"].lower()
-            if species in self.species_map:
-                normalized["animal"]["species"] = self.species_map[species]
+        # Map species, foods, behaviours and configured fields to their canonical names
+        for entity_type, field, table in self._compiled[1]:
+            values = normalized.get(entity_type)
+            if values:
+                value = values.get(field)
+                if value.__class__ is str:
+                    values[field] = table.get(value.lower(), value)
         
-        # Normalize food names
-        if "feeding" in normalized and "food" in normalized["feeding"]:
-            food = normalized["feeding"]["food"].lower()
-            if food in self.food_map:
-                normalized["feeding"]["food"] = self.food_map[food]
-        
-        # Normalize behavior types
-        if "behavior" in normalized and "type" in normalized["behavior"]:
-            behavior = normalized["behavior"]["type"].lower()
-            if behavior in self.behavior_map:
-                normalized["behavior"]["type"] = self.behavior_map[behavior]
-        
-        # Convert temperature from string to float if needed
-        if "vitals" in normalized and "temperature_c" in normalized["vitals"]:
-            temp = normalized["vitals"]["temperature_c"]
-            if isinstance(temp, str):
-                normalized["vitals"]["temperature_c"] = float(temp.replace(',', '.'))
-        
-        # Convert weight from string to float if needed
-        if "vitals" in normalized and "weight_kg" in normalized["vitals"]:
-            weight = normalized["vitals"]["weight_kg"]
-            if isinstance(weight, str):
-                normalized["vitals"]["weight_kg"] = float(weight.replace(',', '.'))
-        
-        # Convert feeding amount from string to float if needed
-        if "feeding" in normalized and "amount_g" in normalized["feeding"]:
-            amount = normalized["feeding"]["amount_g"]
-            if isinstance(amount, str):
-                normalized["feeding"]["amount_g"] = float(amount.replace(',', '.'))
+        # Convert numbers from string to float if needed
+        for entity_type, field in NUMERIC_FIELDS:
+            values = normalized.get(entity_type)
+            if values:
+                value = values.get(field)
+                if value.__class__ is str:
+                    values[field] = float(value.replace(',', '.'))
         
         return normalized
     
     def validate_entities(self, entities: Dict[str, Any]) -> Dict[str, Any]:
-        """Validate entities against defined rules"""
+        """Validate entities against the compiled validators of the entity config"""
         validated = entities.copy()
         
-        # Validate temperature range (normal for mammals is 35-40°C)
-        if "vitals" in validated and "temperature_c" in validated["vitals"]:
-            temp = validated["vitals"]["temperature_c"]
-            if temp < 30 or temp > 45:
-                # Temperature outside normal range, add alert
-                if "alert" not in validated:
-                    validated["alert"] = {}
-                validated["alert"]["severity"] = "warning"
-                validated["alert"]["message"] = f"Abnormal temperature: {temp}°C"
-        
-        # Validate weight (assuming reasonable range for zoo animals)
-        if "vitals" in validated and "weight_kg" in validated["vitals"]:
-            weight = validated["vitals"]["weight_kg"]
-            if weight < 0.1 or weight > 10000:
-                # Weight outside reasonable range, add alert
-                if "alert" not in validated:
-                    validated["alert"] = {}
-                validated["alert"]["severity"] = "warning"
-                validated["alert"]["message"] = f"Abnormal weight: {weight}kg"
+        for entity_type, checks in self._compiled[0].checks:
+            values = validated.get(entity_type)
+            if not values:
+                continue
+            for field, check, message in checks:
+                value = values.get(field)
+                if value.__class__ in NUMBER_TYPES and not check(value):
+                    # Value outside the configured range, add alert
+                    if "alert" not in validated:
+                        validated["alert"] = {}
+                    validated["alert"]["severity"] = "warning"
+                    validated["alert"]["message"] = message.format(value)
         
-        return validated
\ No newline at end of file
+        return validated
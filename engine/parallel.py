@@ -0,0 +1,138 @@
+import re
+import multiprocessing
+import threading
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Tuple
+
+# ASR backend held by each pool worker for the life of the process
+_worker_asr = None
+
+_pools: Dict[Tuple[type, str, int], ProcessPoolExecutor] = {}
+_pools_lock = threading.Lock()
+
+def split_regions(regions: List[Tuple[float, float]], max_sec: float,
+                  overlap_sec: float = 1.0) -> List[Tuple[float, float]]:
+    """Cut regions longer than max_sec into overlapping pieces"""
+    pieces = []
+    step = max(max_sec - overlap_sec, 1.0)
+    for start, end in regions:
+        while end - start > max_sec:
+            pieces.append((start, round(start + max_sec, 3)))
+            start = round(start + step, 3)
+        pieces.append((start, end))
+    return pieces
+
+def plan_chunks(regions: List[Tuple[float, float]], chunk_sec: float) -> List[List[int]]:
+    """Group consecutive regions into jobs spanning at most chunk_sec of audio"""
+    chunks: List[List[int]] = []
+    for index, (start, end) in enumerate(regions):
+        if chunks and end - regions[chunks[-1][0]][0] <= chunk_sec:
+            chunks[-1].append(index)
+        else:
+            chunks.append([index])
+    return chunks
+
+def pack_windows(regions: List[Tuple[float, float]], window_sec: float) -> List[Tuple[float, float]]:
+    """Join consecutive regions into decode windows spanning at most window_sec
+
+    The silence between joined regions stays in the window, so segment
+    offsets map back to the file by adding the window start.
+    """
+    return [
+        (regions[chunk[0]][0], max(regions[index][1] for index in chunk))
+        for chunk in plan_chunks(regions, window_sec)
+    ]
+
+def _words(text: str) -> List[str]:
+    return re.findall(r"\w+", text.lower())
+
+def _drop_leading_words(segments: List[dict], count: int) -> List[dict]:
+    """Remove the first count words from a list of segments"""
+    trimmed = []
+    for segment in segments:
+        if count > 0:
+            words = segment["text"].split()
+            # Punctuation-only tokens do not count as words
+            while words and count > 0:
+                if _words(words[0]):
+                    count -= 1
+                words.pop(0)
+            if not words:
+                continue
+            segment = dict(segment, text=" ".join(words))
+        trimmed.append(segment)
+    return trimmed
+
+def merge_region_segments(region_segments: List[List[dict]], regions: List[Tuple[float, float]],
+                          max_overlap_words: int = 20) -> List[dict]:
+    """Concatenate per-region segments in order, de-duplicating words in overlaps"""
+    merged: List[dict] = []
+    for index, segments in enumerate(region_segments):
+        if index > 0 and merged and regions[index][0] < regions[index - 1][1]:
+            previous = _words(" ".join(segment["text"] for segment in merged[-4:]))[-max_overlap_words:]
+            current = _words(" ".join(segment["text"] for segment in segments))[:max_overlap_words]
+            overlap = 0
+            for size in range(min(len(previous), len(current)), 0, -1):
+                if previous[-size:] == current[:size]:
+                    overlap = size
+                    break
+            segments = _drop_leading_words(segments, overlap)
+        merged.extend(segments)
+    return merged
+
+def _init_worker(backend_class: type, model_size: str, threads: int):
+    global _worker_asr
+    _worker_asr = backend_class(model_size, use_vad=False, workers=1, threads=threads)
+
+def _transcribe_chunk(audio: np.ndarray, regions: List[Tuple[float, float]], base_sample: int,
+                      sample_rate: int) -> List[List[dict]]:
+    return [
+        _worker_asr.transcribe_region(audio, start, end, sample_rate, base_sample=base_sample)
+        for start, end in regions
+    ]
+
+def can_start_pool() -> bool:
+    """Daemonic processes, such as Celery prefork children, may not have children of their own"""
+    return not multiprocessing.current_process().daemon
+
+def get_pool(backend_class: type, model_size: str, workers: int) -> ProcessPoolExecutor:
+    """Return the shared pool for a backend class and model size, starting it on first use"""
+    with _pools_lock:
+        pool = _pools.get((backend_class, model_size, workers))
+        if pool is None:
+            # Spawned workers avoid inheriting torch/OpenMP thread state from the parent
+            threads = max(1, multiprocessing.cpu_count() // workers)
+            pool = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(backend_class, model_size, threads)
+            )
+            _pools[(backend_class, model_size, workers)] = pool
+        return pool
+
+def shutdown_pools():
+    with _pools_lock:
+        for pool in _pools.values():
+            pool.shutdown(cancel_futures=True)
+        _pools.clear()
+
+def transcribe_parallel(audio: np.ndarray, regions: List[Tuple[float, float]], sample_rate: int,
+                        backend_class: type, model_size: str, workers: int, chunk_sec: float) -> List[List[dict]]:
+    """Transcribe regions on a process pool and return per-region segments in order"""
+    pool = get_pool(backend_class, model_size, workers)
+    futures = []
+    for chunk in plan_chunks(regions, chunk_sec):
+        chunk_regions = [regions[index] for index in chunk]
+        base_sample = int(chunk_regions[0][0] * sample_rate)
+        end_sample = int(max(end for _, end in chunk_regions) * sample_rate)
+        futures.append(pool.submit(
+            _transcribe_chunk, audio[base_sample:end_sample], chunk_regions, base_sample, sample_rate
+        ))
+
+    # Collect in submission order so the merge is deterministic
+    region_segments: List[List[dict]] = []
+    for future in futures:
+        region_segments.extend(future.result())
+    return region_segments
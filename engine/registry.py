@@ -0,0 +1,138 @@
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterable, Optional
+
+
+class ModelRegistry:
+    """Process-wide registry that loads each model once and shares it"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._factories: Dict[str, Callable[[], Any]] = {}
+        self._models: Dict[str, Any] = {}
+        self._load_locks: Dict[str, threading.Lock] = {}
+        self._use_locks: Dict[str, threading.RLock] = {}
+        self._load_times: Dict[str, float] = {}
+        self._warm: Dict[str, bool] = {}
+        self._errors: Dict[str, str] = {}
+
+    def register(self, name: str, factory: Callable[[], Any]):
+        """Register a factory that builds the model on first use"""
+        with self._lock:
+            self._factories[name] = factory
+            self._load_locks.setdefault(name, threading.Lock())
+            self._use_locks.setdefault(name, threading.RLock())
+
+    def get(self, name: str) -> Any:
+        """Return the shared model instance, loading it on first access"""
+        model = self._models.get(name)
+        if model is not None:
+            return model
+
+        if name not in self._factories:
+            raise KeyError(f"Model '{name}' is not registered")
+
+        # Double-checked locking so concurrent first requests load only once
+        with self._load_locks[name]:
+            model = self._models.get(name)
+            if model is None:
+                start_time = time.time()
+                try:
+                    model = self._factories[name]()
+                except Exception as e:
+                    self._errors[name] = str(e)
+                    raise
+                self._load_times[name] = time.time() - start_time
+                self._errors.pop(name, None)
+                self._models[name] = model
+        return model
+
+    @contextmanager
+    def acquire(self, name: str):
+        """Yield the shared model while holding its inference lock"""
+        model = self.get(name)
+        with self._use_locks[name]:
+            yield model
+
+    def is_loaded(self, name: str) -> bool:
+        return name in self._models
+
+    def preload(self, names: Optional[Iterable[str]] = None, ignore_errors: bool = False):
+        """Eagerly load the given models (all registered ones by default)"""
+        for name in (names or list(self._factories)):
+            try:
+                self.get(name)
+            except Exception:
+                # A missing optional model (e.g. no Vosk download) should not
+                # stop the others from loading; the error shows up in status()
+                if not ignore_errors:
+                    raise
+
+    def warmup(self, names: Optional[Iterable[str]] = None):
+        """Run a tiny inference through each loaded model to prime caches"""
+        for name in (names or list(self._models)):
+            if name not in self._models:
+                continue
+            with self.acquire(name) as model:
+                warmup = getattr(model, "warmup", None)
+                if warmup is not None:
+                    warmup()
+            self._warm[name] = True
+
+    def unload(self, name: str):
+        """Drop a resident model so the next access reloads it"""
+        with self._load_locks[name]:
+            self._models.pop(name, None)
+            self._load_times.pop(name, None)
+            self._warm.pop(name, None)
+
+    def status(self) -> Dict[str, Dict[str, Any]]:
+        """Report which models are resident, their load time and warmup state"""
+        return {
+            name: {
+                "loaded": name in self._models,
+                "warm": self._warm.get(name, False),
+                "load_time_sec": self._load_times.get(name),
+                "error": self._errors.get(name),
+            }
+            for name in self._factories
+        }
+
+
+def _load_vosk():
+    from engine.asr import VoskASR
+    return VoskASR(os.getenv("VOSK_MODEL_PATH", "models/vosk-model-small-ru-0.22"))
+
+
+def _load_asr_backend():
+    from engine.asr import create_asr_backend
+    return create_asr_backend()
+
+
+def _load_gazetteer():
+    from engine.gazetteer import build_gazetteer
+    return build_gazetteer(registry.get("normalizer"))
+
+
+def _load_entity_extractor():
+    from engine.ner import EntityExtractor
+    extractor = EntityExtractor(gazetteer=registry.get("gazetteer"))
+    # The normalizer holds the entity config currently in effect in this process
+    extractor.apply_config(registry.get("normalizer").config)
+    return extractor
+
+
+def _load_entity_normalizer():
+    from engine.normalization import EntityNormalizer
+    return EntityNormalizer()
+
+
+# Default registry shared by the API, Celery workers and scripts
+registry = ModelRegistry()
+registry.register("vosk", _load_vosk)
+registry.register("asr", _load_asr_backend)
+registry.register("normalizer", _load_entity_normalizer)
+registry.register("gazetteer", _load_gazetteer)
+registry.register("ner", _load_entity_extractor)
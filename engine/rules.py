@@ -0,0 +1,169 @@
+import calendar
+import re
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional
+
+class Rule(NamedTuple):
+    """One extraction rule; the value comes from the `value` group or the whole match"""
+    name: str
+    pattern: str
+    entity: str
+    field: str
+    parser: str = "text"
+
+class RuleMatch(NamedTuple):
+    rule: str
+    entity: str
+    field: str
+    value: Any
+    start: int
+    end: int
+    text: str
+
+# Built-in rules, in priority order for matches starting at the same position
+DEFAULT_RULES = [
+    Rule("temperature", r"температур[аеуы](?:\s+тела)?\s*(?P<value>\d+(?:[.,]\d+)?)(?:\s*°?\s*[cс](?!\w))?",
+         "vitals", "temperature_c", "number"),
+    # Covers "весил около 4000 кг" and "масса тела 200 кг" too, so such kilograms are
+    # never left for food_amount to read as food
+    Rule("weight", r"(?:вес(?:ил[аио]?|ит|ом|[аеу])?|масс(?:ой|[аеуы]))(?:\s+тела)?"
+                   r"(?:\s+(?:был[аио]?|составил[аио]?|составляет|около|примерно|почти|уже))*"
+                   r"\s*(?P<value>\d+(?:[.,]\d+)?)\s*(?P<unit>кг|kg)(?!\w)",
+         "vitals", "weight_kg", "number"),
+    Rule("food_amount", r"(?<![\d.,])(?P<value>\d+(?:[.,]\d+)?)\s*(?P<unit>грамм\w*|г|кг|kg)(?!\w)",
+         "feeding", "amount_g", "grams"),
+    Rule("date", r"(?<![\d.,])(?P<day>\d{1,2})(?P<sep>[.\-])(?P<month>\d{1,2})(?:(?P=sep)(?P<year>\d{4}))?(?![\d])",
+         "observation", "date", "date"),
+]
+
+_NUMBER = re.compile(r"\d+(?:[.,]\d+)?")
+_DATE = re.compile(r"(?P<day>\d{1,2})[.\-/](?P<month>\d{1,2})(?:[.\-/](?P<year>\d{4}))?")
+_LEADING_FLAGS = re.compile(r"^\(\?([aiLmsux]+)\)")
+_GROUP_NAME = re.compile(r"\(\?P([<=])(\w+)")
+_NUMERIC_BACKREF = re.compile(r"\\[1-9]")
+
+# Field suffixes that config rules parse as numbers
+_NUMBER_SUFFIXES = ("_c", "_kg", "_sec", "_min", "_m", "_cm", "_l", "_ml", "_pct", "_count")
+
+def parser_for_field(field: str) -> str:
+    if "date" in field:
+        return "date"
+    if field.endswith("_g"):
+        return "grams"
+    if field.endswith(_NUMBER_SUFFIXES):
+        return "number"
+    return "text"
+
+def parse_number(text: str) -> Optional[float]:
+    if not _NUMBER.fullmatch(text):
+        return None
+    return float(text.replace(",", "."))
+
+def parse_date(day: str, month: str, year: Optional[str]) -> Optional[str]:
+    """Validate day and month up front instead of trying strptime formats"""
+    # Dates without a year keep strptime's default year, as before
+    year_value = int(year) if year else 1900
+    month_value = int(month)
+    if not 1 <= month_value <= 12:
+        return None
+    day_value = int(day)
+    if not 1 <= day_value <= calendar.monthrange(year_value, month_value)[1]:
+        return None
+    return datetime(year_value, month_value, day_value).isoformat()
+
+def _scope_pattern(pattern: str, prefix: str) -> str:
+    """Make a rule safe to embed in the combined scanner"""
+    if _NUMERIC_BACKREF.search(pattern):
+        raise ValueError("Rules must use named groups instead of numeric backreferences")
+    # Global flags are only allowed at the very start, so turn them into a scoped group
+    flags = _LEADING_FLAGS.match(pattern)
+    if flags:
+        pattern = f"(?{flags.group(1)}:{pattern[flags.end():]})"
+    # Group names must be unique across the whole scanner
+    return _GROUP_NAME.sub(lambda m: f"(?P{m.group(1)}{prefix}{m.group(2)}", pattern)
+
+class RuleEngine:
+    """All rules compiled into one alternation and applied in a single finditer pass"""
+
+    def __init__(self, rules: Iterable[Rule] = DEFAULT_RULES):
+        self.rules = list(rules)
+        parts = []
+        for index, rule in enumerate(self.rules):
+            try:
+                re.compile(rule.pattern)
+            except re.error as e:
+                raise ValueError(f"Invalid pattern for rule '{rule.name}': {e}")
+            parts.append(f"(?P<r{index}>{_scope_pattern(rule.pattern, f'r{index}_')})")
+        # Keeper notes are dictated, so letter case never matters
+        self.scanner = re.compile("|".join(parts), re.IGNORECASE) if parts else None
+        
+        # Resolve group numbers once so scan() never builds a groupdict
+        self._groups = {}
+        if self.scanner is not None:
+            index = self.scanner.groupindex
+            for number, rule in enumerate(self.rules):
+                prefix = f"r{number}_"
+                self._groups[index[f"r{number}"]] = (rule, index[f"r{number}"]) + tuple(
+                    index.get(prefix + name) for name in ("value", "unit", "day", "month", "year")
+                )
+
+    @classmethod
+    def from_config(cls, rules: Optional[Dict[str, str]]) -> "RuleEngine":
+        """Build from the `rules` section of EntityConfig
+
+        Keys naming a built-in rule (e.g. "temperature") replace its pattern;
+        keys of the form "entity.field" add a rule for that field.
+        """
+        builtin = {rule.name: rule for rule in DEFAULT_RULES}
+        overrides = dict(rules or {})
+        result = []
+        for rule in DEFAULT_RULES:
+            if rule.name in overrides:
+                rule = rule._replace(pattern=overrides.pop(rule.name))
+            result.append(rule)
+        for name, pattern in overrides.items():
+            entity, _, field = name.partition(".")
+            if not entity or not field or name in builtin:
+                raise ValueError(
+                    f"Unknown rule '{name}'. Use one of {', '.join(builtin)} or 'entity.field'"
+                )
+            result.append(Rule(name, pattern, entity, field, parser_for_field(field)))
+        return cls(result)
+
+    def scan(self, text: str) -> List[RuleMatch]:
+        """Return every rule match in text order, with character offsets"""
+        if self.scanner is None:
+            return []
+        matches = []
+        for match in self.scanner.finditer(text):
+            # The rule's outer group closes last, so it is always lastindex
+            groups = self._groups[match.lastindex]
+            rule = groups[0]
+            value = self._parse(rule, match, groups)
+            if value is not None:
+                matches.append(RuleMatch(
+                    rule.name, rule.entity, rule.field, value, match.start(), match.end(), match.group()
+                ))
+        return matches
+
+    @staticmethod
+    def _parse(rule: Rule, match: "re.Match", groups: tuple) -> Any:
+        _, whole, value, unit, day, month, year = groups
+        raw = match.group(value) if value is not None else None
+        if raw is None:
+            raw = match.group(whole)
+
+        if rule.parser == "number":
+            return parse_number(raw)
+        if rule.parser == "grams":
+            amount = parse_number(raw)
+            unit_text = (match.group(unit) or "").lower() if unit is not None else ""
+            if amount is not None and unit_text in ("кг", "kg"):
+                amount *= 1000
+            return amount
+        if rule.parser == "date":
+            if day is not None and match.group(day) is not None:
+                return parse_date(match.group(day), match.group(month), match.group(year) if year else None)
+            date = _DATE.search(raw)
+            return parse_date(date.group("day"), date.group("month"), date.group("year")) if date else None
+        return raw.strip() or None
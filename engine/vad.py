@@ -0,0 +1,164 @@
+import numpy as np
+from collections import deque
+from typing import List, NamedTuple, Tuple
+
+# webrtcvad only accepts 10, 20 or 30 ms frames at these sample rates
+VAD_SAMPLE_RATES = (8000, 16000, 32000, 48000)
+VAD_FRAME_MS = (10, 20, 30)
+
+class SpeechSegmenter:
+    """Find speech regions in a PCM buffer so silence can be skipped"""
+
+    def __init__(self, aggressiveness: int = 2, frame_ms: int = 30, padding_ms: int = 300,
+                 min_silence_ms: int = 500, min_speech_ms: int = 250):
+        if frame_ms not in VAD_FRAME_MS:
+            raise ValueError(f"VAD frame size must be one of {VAD_FRAME_MS} ms, got {frame_ms}")
+
+        # Imported here: webrtcvad pulls in pkg_resources, which is slow to import
+        import webrtcvad
+        self.vad = webrtcvad.Vad(aggressiveness)
+        self.aggressiveness = aggressiveness
+        self.frame_ms = frame_ms
+        self.padding_ms = padding_ms
+        self.min_silence_ms = min_silence_ms
+        self.min_speech_ms = min_speech_ms
+
+    def speech_frames(self, pcm: np.ndarray, sample_rate: int) -> np.ndarray:
+        """Classify each fixed-size frame of mono int16 audio as speech or not"""
+        if sample_rate not in VAD_SAMPLE_RATES:
+            raise ValueError(f"VAD supports {VAD_SAMPLE_RATES} Hz audio, got {sample_rate}")
+
+        frame_len = sample_rate * self.frame_ms // 1000
+        n_frames = len(pcm) // frame_len
+        frames = np.ascontiguousarray(pcm[:n_frames * frame_len], dtype=np.int16).reshape(n_frames, frame_len)
+
+        flags = np.zeros(n_frames, dtype=bool)
+        for i in range(n_frames):
+            flags[i] = self.vad.is_speech(frames[i].tobytes(), sample_rate)
+        return flags
+
+    def segments(self, pcm: np.ndarray, sample_rate: int) -> List[Tuple[float, float]]:
+        """Return padded and merged (start_sec, end_sec) speech regions"""
+        flags = self.speech_frames(pcm, sample_rate)
+        frame_sec = self.frame_ms / 1000.0
+        duration = len(pcm) / sample_rate
+
+        # Runs of consecutive speech frames
+        edges = np.diff(np.concatenate(([0], flags.astype(np.int8), [0])))
+        starts = np.flatnonzero(edges == 1) * frame_sec
+        ends = np.flatnonzero(edges == -1) * frame_sec
+
+        padding = self.padding_ms / 1000.0
+        min_gap = self.min_silence_ms / 1000.0
+        min_speech = self.min_speech_ms / 1000.0
+        merged: List[List[float]] = []
+        for start, end in zip(starts, ends):
+            # Isolated clicks and bumps shorter than a syllable are not speech
+            if end - start < min_speech:
+                continue
+            start = max(0.0, start - padding)
+            end = min(duration, end + padding)
+            if merged and start - merged[-1][1] < min_gap:
+                merged[-1][1] = max(merged[-1][1], end)
+            else:
+                merged.append([start, end])
+
+        return [(round(start, 3), round(end, 3)) for start, end in merged]
+
+class SpeechBlock(NamedTuple):
+    pcm: bytes
+    start_sec: float
+    utterance_end: bool
+
+class StreamingVADGate:
+    """Re-frame streamed PCM for webrtcvad and pass through only speech
+
+    Incoming bytes are cut into exact VAD frames. A pre-roll ring buffer
+    keeps the frames just before speech is detected so word onsets are not
+    clipped, and a hangover keeps the gate open through short pauses. Speech
+    is released in blocks of block_ms so the recognizer is called far less
+    often than once per network chunk.
+    """
+
+    def __init__(self, vad: "webrtcvad.Vad", sample_rate: int = 16000, frame_ms: int = 30,
+                 preroll_ms: int = 300, hangover_ms: int = 600, trigger_frames: int = 2,
+                 block_ms: int = 240):
+        if frame_ms not in VAD_FRAME_MS:
+            raise ValueError(f"VAD frame size must be one of {VAD_FRAME_MS} ms, got {frame_ms}")
+        if sample_rate not in VAD_SAMPLE_RATES:
+            raise ValueError(f"VAD supports {VAD_SAMPLE_RATES} Hz audio, got {sample_rate}")
+
+        self.vad = vad
+        self.sample_rate = sample_rate
+        self.frame_sec = frame_ms / 1000.0
+        self.frame_bytes = sample_rate * frame_ms // 1000 * 2
+        self.hangover_frames = max(1, hangover_ms // frame_ms)
+        self.trigger_frames = trigger_frames
+        self.block_frames = max(1, block_ms // frame_ms)
+
+        self._pending = bytearray()
+        self._preroll = deque(maxlen=max(trigger_frames, preroll_ms // frame_ms))
+        self._frame_index = 0
+        self._triggered = False
+        self._voiced_run = 0
+        self._silent_run = 0
+        self._block = bytearray()
+        self._block_start = 0
+
+    def push(self, pcm: bytes) -> List[SpeechBlock]:
+        """Consume 16-bit mono PCM and return the speech blocks it completes"""
+        self._pending += pcm
+        blocks: List[SpeechBlock] = []
+        usable = len(self._pending) - len(self._pending) % self.frame_bytes
+        for offset in range(0, usable, self.frame_bytes):
+            self._push_frame(bytes(self._pending[offset:offset + self.frame_bytes]), blocks)
+        del self._pending[:usable]
+        return blocks
+
+    def flush(self) -> List[SpeechBlock]:
+        """Release any open utterance at the end of the stream"""
+        blocks: List[SpeechBlock] = []
+        if self._triggered:
+            # A trailing partial frame is still audio the recognizer should hear
+            self._block += self._pending
+            self._emit(blocks, utterance_end=True)
+        self._pending.clear()
+        self._preroll.clear()
+        self._triggered = False
+        self._voiced_run = 0
+        return blocks
+
+    @property
+    def position_sec(self) -> float:
+        return self._frame_index * self.frame_sec
+
+    def _push_frame(self, frame: bytes, blocks: List[SpeechBlock]):
+        is_speech = self.vad.is_speech(frame, self.sample_rate)
+        index = self._frame_index
+        self._frame_index += 1
+
+        if not self._triggered:
+            self._preroll.append((index, frame))
+            self._voiced_run = self._voiced_run + 1 if is_speech else 0
+            if self._voiced_run >= self.trigger_frames:
+                # Open the gate, starting with the buffered pre-roll
+                self._triggered = True
+                self._silent_run = 0
+                self._block_start = self._preroll[0][0]
+                self._block = bytearray(b"".join(buffered for _, buffered in self._preroll))
+                self._preroll.clear()
+            return
+
+        self._block += frame
+        self._silent_run = 0 if is_speech else self._silent_run + 1
+        if self._silent_run >= self.hangover_frames:
+            self._triggered = False
+            self._voiced_run = 0
+            self._emit(blocks, utterance_end=True)
+        elif len(self._block) >= self.block_frames * self.frame_bytes:
+            self._emit(blocks, utterance_end=False)
+
+    def _emit(self, blocks: List[SpeechBlock], utterance_end: bool):
+        blocks.append(SpeechBlock(bytes(self._block), round(self._block_start * self.frame_sec, 3), utterance_end))
+        self._block_start += len(self._block) // self.frame_bytes
+        self._block = bytearray()
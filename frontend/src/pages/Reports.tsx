@@ -1,34 +1,61 @@
-import React, { useState } from 'react';
+import React, { useEffect, useState } from 'react';
 import { 
-  LineChart, Line, XAxis, YAxis, CartesianGrid, Tooltip, Legend, ResponsiveContainer,
-  BarChart, Bar, PieChart, Pie, Cell
+  XAxis, YAxis, CartesianGrid, Tooltip, Legend, ResponsiveContainer,
+  BarChart, Bar
 } from 'recharts';
 
+interface DailyAnimal {
+  id: number;
+  name: string | null;
+  species: string | null;
+  observations: number;
+  alerts: number;
+  latest_vitals: { temperature_c?: number; weight_kg?: number };
+}
+
+interface DailyReport {
+  date: string;
+  animals: DailyAnimal[];
+  summary: {
+    total_observations: number;
+    critical_alerts: number;
+    warnings: number;
+  };
+}
+
+const animalLabel = (animal: DailyAnimal) =>
+  `${animal.name || `#${animal.id}`}${animal.species ? ` (${animal.species})` : ''}`;
+
 const Reports: React.FC = () => {
-  const [selectedDate, setSelectedDate] = useState<string>('2025-08-30');
-  
-  // Mock data for charts
-  const animalTemperatureData = [
-    { animal: 'Жужа (Giraffe)', temperature: 37.7 },
-    { animal: 'Dima (Elephant)', temperature: 36.5 },
-    { animal: 'Sonya (Bear)', temperature: 38.2 },
-    { animal: 'Rita (Lion)', temperature: 39.1 },
-  ];
+  const [selectedDate, setSelectedDate] = useState<string>(new Date().toISOString().slice(0, 10));
+  const [report, setReport] = useState<DailyReport | null>(null);
+  const [isLoading, setIsLoading] = useState<boolean>(false);
   
-  const alertsData = [
-    { animal: 'Rita (Lion)', severity: 'High', message: 'Aggressive behavior detected', count: 3 },
-    { animal: 'Sonya (Bear)', severity: 'Medium', message: 'Slight weight loss', count: 1 },
-    { animal: 'Unknown Tiger', severity: 'High', message: 'Abnormal temperature: 41.2°C', count: 1 },
-  ];
+  // The report is one read of the server's daily rollups, cheap enough to
+  // refetch whenever the date changes
+  const loadReport = async () => {
+    setIsLoading(true);
+    try {
+      const response = await fetch(`/api/reports/daily?date=${selectedDate}`);
+      setReport(response.ok ? await response.json() : null);
+    } catch (error) {
+      console.error('Loading report failed:', error);
+    } finally {
+      setIsLoading(false);
+    }
+  };
   
-  const behaviorDistributionData = [
-    { name: 'Calm', value: 45 },
-    { name: 'Playful', value: 30 },
-    { name: 'Aggressive', value: 15 },
-    { name: 'Lethargic', value: 10 },
-  ];
+  useEffect(() => {
+    loadReport();
+  }, [selectedDate]);
   
-  const COLORS = ['#0088FE', '#00C49F', '#FFBB28', '#FF8042'];
+  const animals = report ? report.animals : [];
+  const animalTemperatureData = animals
+    .filter((animal) => animal.latest_vitals.temperature_c !== undefined)
+    .map((animal) => ({ animal: animalLabel(animal), temperature: animal.latest_vitals.temperature_c }));
+  const alertsData = animals.filter((animal) => animal.alerts > 0);
+  const observationsData = animals.map((animal) => ({ animal: animalLabel(animal), observations: animal.observations }));
+  const exportUrl = `/api/observations/export?format=csv&start_date=${selectedDate}T00:00:00&end_date=${selectedDate}T23:59:59.999999`;
 
   return (
     <div className="px-4 py-6 sm:px-0">
@@ -46,18 +73,38 @@ const Reports: React.FC = () => {
             onChange={(e) => setSelectedDate(e.target.value)}
             className="border border-gray-300 rounded px-3 py-2"
           />
-          <button className="bg-blue-500 hover:bg-blue-700 text-white font-bold py-2 px-4 rounded">
-            Generate Report
+          <button 
+            onClick={loadReport}
+            disabled={isLoading}
+            className="bg-blue-500 hover:bg-blue-700 text-white font-bold py-2 px-4 rounded disabled:opacity-50"
+          >
+            {isLoading ? 'Loading...' : 'Generate Report'}
           </button>
-          <button className="bg-green-500 hover:bg-green-700 text-white font-bold py-2 px-4 rounded">
+          <a href={exportUrl} className="bg-green-500 hover:bg-green-700 text-white font-bold py-2 px-4 rounded">
             Export CSV
-          </button>
+          </a>
           <button className="bg-red-500 hover:bg-red-700 text-white font-bold py-2 px-4 rounded">
             Export PDF
           </button>
         </div>
       </div>
       
+      {/* Summary */}
+      <div className="grid grid-cols-1 md:grid-cols-3 gap-4 mb-8">
+        <div className="bg-white shadow rounded-lg p-6">
+          <div className="text-sm text-gray-500">Observations</div>
+          <div className="text-2xl font-bold">{report ? report.summary.total_observations : 0}</div>
+        </div>
+        <div className="bg-white shadow rounded-lg p-6">
+          <div className="text-sm text-gray-500">Critical Alerts</div>
+          <div className="text-2xl font-bold text-red-600">{report ? report.summary.critical_alerts : 0}</div>
+        </div>
+        <div className="bg-white shadow rounded-lg p-6">
+          <div className="text-sm text-gray-500">Warnings</div>
+          <div className="text-2xl font-bold text-yellow-600">{report ? report.summary.warnings : 0}</div>
+        </div>
+      </div>
+      
       {/* Temperature Overview */}
       <div className="bg-white shadow rounded-lg p-6 mb-8">
         <h3 className="text-lg font-semibold mb-4">Animal Temperature Overview</h3>
@@ -81,26 +128,20 @@ const Reports: React.FC = () => {
             <thead className="bg-gray-50">
               <tr>
                 <th className="px-6 py-3 text-left text-xs font-medium text-gray-500 uppercase tracking-wider">Animal</th>
-                <th className="px-6 py-3 text-left text-xs font-medium text-gray-500 uppercase tracking-wider">Severity</th>
-                <th className="px-6 py-3 text-left text-xs font-medium text-gray-500 uppercase tracking-wider">Message</th>
-                <th className="px-6 py-3 text-left text-xs font-medium text-gray-500 uppercase tracking-wider">Count</th>
+                <th className="px-6 py-3 text-left text-xs font-medium text-gray-500 uppercase tracking-wider">Observations</th>
+                <th className="px-6 py-3 text-left text-xs font-medium text-gray-500 uppercase tracking-wider">Alerts</th>
               </tr>
             </thead>
             <tbody className="bg-white divide-y divide-gray-200">
-              {alertsData.map((alert, index) => (
-                <tr key={index}>
-                  <td className="px-6 py-4 whitespace-nowrap">{alert.animal}</td>
+              {alertsData.map((animal) => (
+                <tr key={animal.id}>
+                  <td className="px-6 py-4 whitespace-nowrap">{animalLabel(animal)}</td>
+                  <td className="px-6 py-4 whitespace-nowrap">{animal.observations}</td>
                   <td className="px-6 py-4 whitespace-nowrap">
-                    <span className={`inline-flex items-center px-2.5 py-0.5 rounded-full text-xs font-medium ${
-                      alert.severity === 'High' ? 'bg-red-100 text-red-800' : 
-                      alert.severity === 'Medium' ? 'bg-yellow-100 text-yellow-800' : 
-                      'bg-green-100 text-green-800'
-                    }`}>
-                      {alert.severity}
+                    <span className="inline-flex items-center px-2.5 py-0.5 rounded-full text-xs font-medium bg-red-100 text-red-800">
+                      {animal.alerts}
                     </span>
                   </td>
-                  <td className="px-6 py-4">{alert.message}</td>
-                  <td className="px-6 py-4 whitespace-nowrap">{alert.count}</td>
                 </tr>
               ))}
             </tbody>
@@ -108,27 +149,18 @@ const Reports: React.FC = () => {
         </div>
       </div>
       
-      {/* Behavior Distribution */}
+      {/* Observations per Animal */}
       <div className="bg-white shadow rounded-lg p-6">
-        <h3 className="text-lg font-semibold mb-4">Overall Behavior Distribution</h3>
+        <h3 className="text-lg font-semibold mb-4">Observations per Animal</h3>
         <ResponsiveContainer width="100%" height={300}>
-          <PieChart>
-            <Pie
-              data={behaviorDistributionData}
-              cx="50%"
-              cy="50%"
-              labelLine={false}
-              label={({ name, percent }) => `${name}: ${(percent * 100).toFixed(0)}%`}
-              outerRadius={80}
-              fill="#8884d8"
-              dataKey="value"
-            >
-              {behaviorDistributionData.map((entry, index) => (
-                <Cell key={`cell-${index}`} fill={COLORS[index % COLORS.length]} />
-              ))}
-            </Pie>
+          <BarChart data={observationsData}>
+            <CartesianGrid strokeDasharray="3 3" />
+            <XAxis dataKey="animal" />
+            <YAxis allowDecimals={false} />
             <Tooltip />
-          </PieChart>
+            <Legend />
+            <Bar dataKey="observations" fill="#00C49F" name="Observations" />
+          </BarChart>
         </ResponsiveContainer>
       </div>
     </div>
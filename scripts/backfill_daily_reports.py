@@ -0,0 +1,39 @@
+#!/usr/bin/env python3
+
+"""
+Rebuild the daily_reports rollups from the stored observations.
+
+New observations update their rollup as they are written; run this once after
+the migration that adds the table, or again for days whose observations were
+edited or deleted. Each day is recomputed in its own transaction from a
+streamed read of its observations, so memory stays flat on large histories.
+Today's rollup is best rebuilt while no uploads are being written.
+
+Usage: python scripts/backfill_daily_reports.py [start YYYY-MM-DD] [end YYYY-MM-DD]
+"""
+
+import os
+import sys
+import time
+from datetime import date
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# The backend modules import each other by their flat names
+sys.path[:0] = [os.path.join(ROOT, "backend"), ROOT]
+
+from database import SessionLocal
+from repositories import DailyReportRepository
+
+def backfill(start: date = None, end: date = None) -> int:
+    db = SessionLocal()
+    try:
+        return DailyReportRepository(db).rebuild(start, end)
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    start = date.fromisoformat(sys.argv[1]) if len(sys.argv) > 1 else None
+    end = date.fromisoformat(sys.argv[2]) if len(sys.argv) > 2 else start
+    started = time.perf_counter()
+    days = backfill(start, end)
+    print(f"Rebuilt daily reports for {days} day(s) in {time.perf_counter() - started:.1f}s")
@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+
+"""
+Micro-benchmark for the audio front-end: NumPy polyphase resampling and
+down-mixing versus piping the same PCM through an ffmpeg subprocess.
+"""
+
+import shutil
+import subprocess
+import sys
+import time
+import numpy as np
+from engine.audio import StreamingAudioConverter, normalize_audio
+
+def make_audio(seconds: float, sample_rate: int, channels: int) -> np.ndarray:
+    """Speech-like test signal: noise shaped by a slow envelope"""
+    rng = np.random.default_rng(0)
+    frames = int(seconds * sample_rate)
+    envelope = 0.5 + 0.5 * np.sin(np.linspace(0, 40 * np.pi, frames))
+    noise = rng.standard_normal((frames, channels)) * envelope[:, None] * 4000
+    return noise.astype(np.int16)
+
+def bench_numpy(samples: np.ndarray, sample_rate: int) -> float:
+    start_time = time.perf_counter()
+    normalize_audio(samples, sample_rate)
+    return time.perf_counter() - start_time
+
+def bench_streaming(samples: np.ndarray, sample_rate: int, chunk_ms: int = 20) -> float:
+    converter = StreamingAudioConverter(sample_rate, samples.shape[1])
+    data = samples.tobytes()
+    chunk_size = sample_rate * chunk_ms // 1000 * samples.shape[1] * 2
+    start_time = time.perf_counter()
+    for offset in range(0, len(data), chunk_size):
+        converter.convert(data[offset:offset + chunk_size])
+    converter.flush()
+    return time.perf_counter() - start_time
+
+def bench_ffmpeg(samples: np.ndarray, sample_rate: int) -> float:
+    command = [
+        "ffmpeg", "-loglevel", "error",
+        "-f", "s16le", "-ar", str(sample_rate), "-ac", str(samples.shape[1]), "-i", "pipe:0",
+        "-f", "s16le", "-ar", "16000", "-ac", "1", "pipe:1"
+    ]
+    start_time = time.perf_counter()
+    subprocess.run(command, input=samples.tobytes(), capture_output=True, check=True)
+    return time.perf_counter() - start_time
+
+if __name__ == "__main__":
+    seconds = float(sys.argv[1]) if len(sys.argv) > 1 else 300.0
+    
+    for sample_rate, channels in [(44100, 2), (48000, 2), (48000, 1), (16000, 2)]:
+        samples = make_audio(seconds, sample_rate, channels)
+        label = f"{sample_rate} Hz x{channels}"
+        
+        numpy_sec = bench_numpy(samples, sample_rate)
+        streaming_sec = bench_streaming(samples, sample_rate)
+        line = f"{label:>14}: numpy {numpy_sec:.3f}s ({seconds / numpy_sec:.0f}x RT), streaming {streaming_sec:.3f}s"
+        
+        if shutil.which("ffmpeg"):
+            ffmpeg_sec = bench_ffmpeg(samples, sample_rate)
+            line += f", ffmpeg {ffmpeg_sec:.3f}s ({ffmpeg_sec / numpy_sec:.1f}x slower)"
+        print(line)
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+
+"""
+Latency of each NER profile on the labelled fixtures and unit-test phrases,
+and whether its entities match the reference profile's output.
+
+With --backfill N, compares extract_entities in a loop against
+extract_entities_batch on N synthetic keeper notes.
+"""
+
+import itertools
+import json
+import os
+import statistics
+import sys
+import time
+from engine.ner import NER_PROFILES, EntityExtractor
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "..", "tests", "fixtures", "labels.json")
+
+# Phrases used by tests/test_ner.py
+TEST_TEXTS = [
+    "Самка жирафа Жужа ела 700 грамм люцерны",
+    "температура 37.8",
+    "вес 850 кг",
+    "ела 700 грамм люцерны",
+]
+
+def load_texts() -> list:
+    with open(FIXTURES, 'r') as f:
+        samples = json.load(f)["audio_samples"]
+    return [sample["reference_text"] for sample in samples] + TEST_TEXTS
+
+# Animals from scripts/seed.py, indexed by the gazetteer
+SEED_ANIMALS = [(1, "Жужа", "giraffe"), (2, "Dima", "elephant"), (3, "Sonya", "bear"), (4, "Rita", "lion"), (5, "Amur", "tiger")]
+
+# Building blocks for synthetic notes in the style of the fixtures
+NAMES = ["Жужа", "Борис", "Соня", "Маша", "Дима", ""]
+NOTES = [
+    "Самка жирафа {name} ела {amount} грамм люцерны, температура {temp} °C",
+    "Медведь {name} весит {weight} кг и показывает игривое поведение",
+    "У слона {name} вес {weight} кг, съел {amount} г сена",
+    "Утренний обход {day}.0{month}, вольер чистый, поведение спокойное",
+]
+
+def make_notes(count: int) -> list:
+    notes = []
+    for index, template in zip(range(count), itertools.cycle(NOTES)):
+        notes.append(template.format(
+            name=NAMES[index % len(NAMES)], amount=100 + index % 900, temp=f"{36 + index % 4}.{index % 10}",
+            weight=200 + index % 3000, day=10 + index % 18, month=1 + index % 9
+        ))
+    return notes
+
+def bench_backfill(profile: str, count: int):
+    extractor = EntityExtractor(profile)
+    extractor.gazetteer.sync_animals(SEED_ANIMALS)
+    extractor.warmup()
+    notes = make_notes(count)
+    resolved = sum(not extractor._needs_ner(extractor.gazetteer.match(note)) for note in notes)
+    print(f"{profile}: {resolved}/{count} notes resolved by the gazetteer without neural NER")
+    
+    start_time = time.perf_counter()
+    single = [extractor.extract_entities(note) for note in notes]
+    single_sec = time.perf_counter() - start_time
+    
+    start_time = time.perf_counter()
+    batch = list(extractor.extract_entities_batch(notes))
+    batch_sec = time.perf_counter() - start_time
+    
+    same = sum(a == b for a, b in zip(single, batch))
+    print(f"{profile}: {count} notes, loop {count / single_sec:.0f}/s, batch {count / batch_sec:.0f}/s "
+          f"({single_sec / batch_sec:.1f}x), identical results {same}/{count}")
+
+def bench_profile(profile: str, texts: list, rounds: int):
+    try:
+        extractor = EntityExtractor(profile)
+        extractor.gazetteer.sync_animals(SEED_ANIMALS)
+    except (OSError, ImportError) as e:
+        # e.g. the full profile without the spaCy model installed
+        return None, str(e)
+    extractor.warmup()
+    
+    timings = []
+    results = []
+    for _ in range(rounds):
+        results = []
+        for text in texts:
+            start_time = time.perf_counter()
+            results.append(extractor.extract_entities(text))
+            timings.append(time.perf_counter() - start_time)
+    return results, timings
+
+if __name__ == "__main__":
+    if len(sys.argv) > 2 and sys.argv[1] == "--backfill":
+        for profile in sys.argv[3:] or ["default"]:
+            bench_backfill(profile, int(sys.argv[2]))
+        sys.exit(0)
+    
+    rounds = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    profiles = sys.argv[2:] or list(NER_PROFILES)
+    texts = load_texts()
+    
+    reference = None
+    print(f"{'profile':<10} {'mean ms':>8} {'p95 ms':>8} {'same entities':>14}")
+    for profile in profiles:
+        results, timings = bench_profile(profile, texts, rounds)
+        if results is None:
+            print(f"{profile:<10} skipped: {timings}")
+            continue
+        if reference is None:
+            reference = results
+        timings_ms = sorted(t * 1000 for t in timings)
+        p95 = timings_ms[int(len(timings_ms) * 0.95) - 1]
+        same = sum(result == expected for result, expected in zip(results, reference))
+        print(f"{profile:<10} {statistics.mean(timings_ms):>8.2f} {p95:>8.2f} {same:>8}/{len(texts)}")
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+
+"""
+Memory per Celery worker child with models loaded per child versus loaded once
+in the parent before fork, each with the Natasha embedding read into memory or
+memory-mapped (NER_MMAP_EMBEDDING).
+
+Children are forked the way the prefork pool does it, run the task models on a
+few keeper notes, and are measured together from /proc/<pid>/smaps_rollup.
+RSS counts shared pages in full, so it barely moves; PSS (shared pages split
+between the processes using them) and USS (private pages) show what a child
+really costs.
+
+Usage: python scripts/bench_worker_memory.py [workers] [model ...]
+"""
+
+import gc
+import os
+import signal
+import subprocess
+import sys
+from typing import Dict, List
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# backend/worker.py WORKER_MODELS; models that cannot load here are skipped
+DEFAULT_MODELS = ["asr", "normalizer", "gazetteer", "ner"]
+NOTES = [
+    "Самка жирафа Жужа ела 700 грамм люцерны",
+    "Лев Симба, температура 38.5, вес 190 кг. Вольер 3, саванна.",
+    "Слон Дамбо агрессивно трубил десять минут, вес 4200 кг",
+]
+
+def memory_usage(pid: int) -> Dict[str, int]:
+    """RSS, PSS and USS of a process in kB"""
+    fields = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) == 3 and parts[2] == "kB":
+                fields[parts[0].rstrip(":")] = int(parts[1])
+    return {
+        "rss": fields["Rss"],
+        "pss": fields["Pss"],
+        "uss": fields["Private_Clean"] + fields["Private_Dirty"],
+    }
+
+def run_task():
+    """Entity extraction and validation on a few notes, as process_wav_file does after ASR"""
+    from engine.registry import registry
+    if registry.is_loaded("ner"):
+        for note in NOTES:
+            entities = registry.get("ner").extract_entities(note)
+            registry.get("normalizer").validate_entities(registry.get("normalizer").normalize_entities(entities))
+
+def measure(mode: str, workers: int, models: List[str]) -> Dict[str, float]:
+    """Fork the children, let them load/warm up and run a task, then measure them together"""
+    from engine.asr import preload_models
+    from engine.registry import registry
+    if mode == "fork":
+        preload_models(models, warmup=False)
+        gc.freeze()
+
+    children = []
+    for _ in range(workers):
+        ready_r, ready_w = os.pipe()
+        pid = os.fork()
+        if pid == 0:
+            os.close(ready_r)
+            if mode == "child":
+                preload_models(models, warmup=False)
+            registry.warmup(models)
+            run_task()
+            os.write(ready_w, b"1")
+            signal.pause()
+            os._exit(0)
+        os.close(ready_w)
+        children.append((pid, ready_r))
+
+    for pid, ready_r in children:
+        os.read(ready_r, 1)
+        os.close(ready_r)
+    usage = [memory_usage(pid) for pid, _ in children]
+    parent = memory_usage(os.getpid())
+    for pid, _ in children:
+        os.kill(pid, signal.SIGTERM)
+        os.waitpid(pid, 0)
+
+    result = {key: sum(child[key] for child in usage) / len(usage) / 1024 for key in ("rss", "pss", "uss")}
+    result["total_pss"] = (sum(child["pss"] for child in usage) + parent["pss"]) / 1024
+    return result
+
+def run_config(mode: str, mmap: bool, workers: int, models: List[str]) -> str:
+    """Measure one configuration in a fresh interpreter (the embedding flag is read at import)"""
+    env = dict(os.environ, NER_MMAP_EMBEDDING="1" if mmap else "0")
+    env["PYTHONPATH"] = os.pathsep.join(path for path in (ROOT, env.get("PYTHONPATH")) if path)
+    result = subprocess.run(
+        [sys.executable, __file__, "--run", mode, str(workers), *models],
+        capture_output=True, text=True, env=env, cwd=ROOT, check=True
+    )
+    return result.stdout.strip().splitlines()[-1]
+
+if __name__ == "__main__":
+    if len(sys.argv) > 3 and sys.argv[1] == "--run":
+        usage = measure(sys.argv[2], int(sys.argv[3]), sys.argv[4:])
+        print(f"{usage['rss']:>8.0f} {usage['pss']:>8.0f} {usage['uss']:>8.0f} {usage['total_pss']:>10.0f}")
+        sys.exit(0)
+
+    workers = int(sys.argv[1]) if len(sys.argv) > 1 else 4
+    models = sys.argv[2:] or DEFAULT_MODELS
+
+    print(f"{workers} workers, models: {', '.join(models)} (MB per child; total = parent + children)")
+    print(f"{'loaded in':<10} {'embedding':<10} {'RSS':>8} {'PSS':>8} {'USS':>8} {'total PSS':>10}")
+    for mode in ("child", "fork"):
+        for mmap in (False, True):
+            line = run_config(mode, mmap, workers, models)
+            print(f"{mode:<10} {'mmap' if mmap else 'in memory':<10} {line}")
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+
+"""
+Import-time budget for the API and worker entry points.
+
+Each entry point is imported in a fresh interpreter under `python -X importtime`.
+The check fails when a model library (torch, Whisper, Vosk, Natasha, spaCy, ...)
+is imported at startup instead of on first use, or when the whole import takes
+longer than the budget.
+
+Usage: python scripts/check_import_time.py [budget_ms] [module ...]
+"""
+
+import os
+import subprocess
+import sys
+from typing import List, NamedTuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ENTRY_POINTS = ["backend.main", "backend.worker"]
+# Libraries that must only be imported by the model registry's loaders
+HEAVY_MODULES = ("torch", "whisper", "vosk", "natasha", "slovnet", "navec", "pymorphy2", "spacy", "webrtcvad")
+# Importing FastAPI and SQLAlchemy alone takes ~0.95 s on a typical dev machine;
+# the budget leaves room for the app on top of that, not for model libraries
+IMPORT_BUDGET_MS = float(os.getenv("IMPORT_BUDGET_MS", "1500"))
+
+class ImportTime(NamedTuple):
+    module: str
+    depth: int
+    self_us: int
+    cumulative_us: int
+
+def measure_imports(module: str) -> List[ImportTime]:
+    """Import a module in a fresh interpreter and parse the -X importtime report"""
+    env = dict(os.environ)
+    # The backend uses flat imports (`from services import ...`)
+    env["PYTHONPATH"] = os.pathsep.join(
+        path for path in (os.path.join(ROOT, "backend"), ROOT, env.get("PYTHONPATH")) if path
+    )
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True, text=True, env=env, cwd=ROOT
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{result.stderr.strip().splitlines()[-1]}")
+
+    entries = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        # Nesting is shown as two extra spaces per level
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        entries.append(ImportTime(name.strip(), depth, int(self_us), int(cumulative_us)))
+    return entries
+
+def heavy_imports(entries: List[ImportTime]) -> List[str]:
+    return sorted({entry.module for entry in entries if entry.module.split(".")[0] in HEAVY_MODULES})
+
+def total_ms(entries: List[ImportTime]) -> float:
+    return sum(entry.cumulative_us for entry in entries if entry.depth == 0) / 1000
+
+def check_module(module: str, budget_ms: float) -> List[str]:
+    """Print the import profile of one entry point and return what breaks the budget"""
+    entries = measure_imports(module)
+    total = total_ms(entries)
+    print(f"{module}: {total:.0f} ms (budget {budget_ms:.0f} ms)")
+    for entry in sorted(entries, key=lambda entry: entry.self_us, reverse=True)[:10]:
+        print(f"  {entry.self_us / 1000:8.1f} ms  {entry.module}")
+
+    problems = [f"{module} imports {name} at startup" for name in heavy_imports(entries)]
+    if total > budget_ms:
+        problems.append(f"{module} takes {total:.0f} ms to import, over the {budget_ms:.0f} ms budget")
+    return problems
+
+if __name__ == "__main__":
+    budget_ms = float(sys.argv[1]) if len(sys.argv) > 1 else IMPORT_BUDGET_MS
+    modules = sys.argv[2:] or ENTRY_POINTS
+
+    problems = []
+    for module in modules:
+        try:
+            problems.extend(check_module(module, budget_ms))
+        except RuntimeError as e:
+            problems.append(str(e))
+    for problem in problems:
+        print(f"FAIL: {problem}")
+    sys.exit(1 if problems else 0)
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+
+"""
+Script to compare batch ASR backends on speed, memory and accuracy.
+
+Each backend runs in a fresh process so peak RSS is measured per backend.
+Reports real-time factor (processing time / audio duration), peak RSS and
+WER against the same references used by eval_wer.py.
+"""
+
+import json
+import multiprocessing
+import os
+import resource
+import sys
+import time
+
+def _run_backend(backend: str, model_size: str, threads: int, audio_dir: str, reference_file: str, results):
+    import jiwer
+    from engine.asr import create_asr_backend
+    from engine.audio import load_wav
+
+    with open(reference_file, 'r') as f:
+        references = json.load(f)
+
+    load_start = time.perf_counter()
+    asr = create_asr_backend(backend, model_size, workers=1, threads=threads or None)
+    load_sec = time.perf_counter() - load_start
+    asr.warmup()
+
+    audio_sec = 0.0
+    processing_sec = 0.0
+    wers = []
+    for filename in sorted(os.listdir(audio_dir)):
+        if not filename.endswith(".wav") or filename not in references:
+            continue
+        samples, sample_rate = load_wav(os.path.join(audio_dir, filename))
+        start_time = time.perf_counter()
+        result = asr.transcribe_audio(samples, sample_rate)
+        processing_sec += time.perf_counter() - start_time
+        audio_sec += len(samples) / sample_rate
+        wers.append(jiwer.wer(references[filename], result["text"] or "<empty>"))
+
+    # ru_maxrss is reported in kilobytes on Linux
+    results.put({
+        "backend": asr.name,
+        "files": len(wers),
+        "load_sec": round(load_sec, 2),
+        "rtf": round(processing_sec / audio_sec, 3) if audio_sec else None,
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        "wer": round(sum(wers) / len(wers), 4) if wers else None
+    })
+
+def compare_backends(audio_dir: str, reference_file: str, backends, model_size: str = "base", threads: int = 0):
+    """Run every backend on the same files and return one row per backend"""
+    context = multiprocessing.get_context("spawn")
+    rows = []
+    for backend in backends:
+        results = context.Queue()
+        process = context.Process(
+            target=_run_backend, args=(backend, model_size, threads, audio_dir, reference_file, results)
+        )
+        process.start()
+        process.join()
+        if process.exitcode != 0:
+            rows.append({"backend": f"{backend}-{model_size}", "error": f"exit code {process.exitcode}"})
+        else:
+            rows.append(results.get())
+    return rows
+
+if __name__ == "__main__":
+    if len(sys.argv) < 3:
+        print("Usage: python compare_backends.py <audio_dir> <reference_file> [model_size] [threads] [backend ...]")
+        sys.exit(1)
+
+    from engine.asr import ASR_BACKENDS
+
+    audio_dir = sys.argv[1]
+    reference_file = sys.argv[2]
+    model_size = sys.argv[3] if len(sys.argv) > 3 else "base"
+    threads = int(sys.argv[4]) if len(sys.argv) > 4 else 0
+    backends = sys.argv[5:] or list(ASR_BACKENDS)
+
+    print(f"{'backend':<22} {'files':>5} {'load s':>7} {'RTF':>7} {'peak RSS MB':>12} {'WER':>7}")
+    for row in compare_backends(audio_dir, reference_file, backends, model_size, threads):
+        if "error" in row:
+            print(f"{row['backend']:<22} failed: {row['error']}")
+            continue
+        print(f"{row['backend']:<22} {row['files']:>5} {row['load_sec']:>7} {row['rtf']:>7} "
+              f"{row['peak_rss_mb']:>12} {row['wer']:>7}")
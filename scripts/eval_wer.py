@@ -5,18 +5,20 @@ Script to evaluate Word Error Rate (WER) for the ASR system.
 """
 
 import jiwer
-from engine.asr import WhisperASR
+from engine.asr import create_asr_backend
 import os
 import json
 
-def evaluate_wer(audio_dir: str, reference_file: str):
+def evaluate_wer(audio_dir: str, reference_file: str, backend: str = "whisper", model_size: str = "base",
+                 asr=None):
     """Evaluate WER for all WAV files in a directory"""
     # Load reference transcriptions
     with open(reference_file, 'r') as f:
         references = json.load(f)
     
-    # Initialize Whisper ASR
-    asr = WhisperASR("base")  # or "tiny" for faster processing
+    # Initialize the ASR backend ("tiny" model size for faster processing)
+    if asr is None:
+        asr = create_asr_backend(backend, model_size)
     
     # Process each WAV file
     total_wer = 0.0
@@ -54,11 +56,13 @@ def evaluate_wer(audio_dir: str, reference_file: str):
 
 if __name__ == "__main__":
     import sys
-    if len(sys.argv) != 3:
-        print("Usage: python eval_wer.py <audio_dir> <reference_file>")
+    if len(sys.argv) not in (3, 4, 5):
+        print("Usage: python eval_wer.py <audio_dir> <reference_file> [backend] [model_size]")
         sys.exit(1)
     
     audio_dir = sys.argv[1]
     reference_file = sys.argv[2]
+    backend = sys.argv[3] if len(sys.argv) > 3 else "whisper"
+    model_size = sys.argv[4] if len(sys.argv) > 4 else "base"
     
-    evaluate_wer(audio_dir, reference_file)
\ No newline at end of file
+    evaluate_wer(audio_dir, reference_file, backend, model_size)
\ No newline at end of file
@@ -1,11 +1,53 @@
+import asyncio
+import os
+import tempfile
+import threading
 import unittest
 from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from starlette.websockets import WebSocketDisconnect
 from backend.main import app
+from database import get_async_db, get_db
+from engine.entity_config import CompiledEntityConfig
+from engine.registry import registry
+from models import Base
+from services import apply_entity_config
 
 class TestAPI(unittest.TestCase):
     def setUp(self):
+        # Every test gets a throwaway database instead of DATABASE_URL
+        handle, self.path = tempfile.mkstemp(suffix=".db")
+        os.close(handle)
+        self.engine = create_engine(f"sqlite:///{self.path}", connect_args={"check_same_thread": False})
+        Base.metadata.create_all(self.engine)
+        self.async_engine = create_async_engine(f"sqlite+aiosqlite:///{self.path}")
+        sessions = sessionmaker(bind=self.engine, autoflush=False)
+        async_sessions = async_sessionmaker(self.async_engine, autoflush=False, expire_on_commit=False)
+        
+        def get_test_db():
+            db = sessions()
+            try:
+                yield db
+            finally:
+                db.close()
+        
+        async def get_test_async_db():
+            async with async_sessions() as db:
+                yield db
+        
+        app.dependency_overrides = {get_db: get_test_db, get_async_db: get_test_async_db}
         self.client = TestClient(app)
     
+    def tearDown(self):
+        app.dependency_overrides = {}
+        # Configs saved by a test must not stay in effect for the rest of the run
+        apply_entity_config(CompiledEntityConfig())
+        asyncio.run(self.async_engine.dispose())
+        self.engine.dispose()
+        os.remove(self.path)
+    
     def test_health_check(self):
         response = self.client.get("/api/health")
         self.assertEqual(response.status_code, 200)
@@ -23,14 +65,73 @@ class TestAPI(unittest.TestCase):
                 {"name": "alert", "fields": ["severity", "message"]}
             ],
             "rules": {
-                "dates": "регэкспы/парсеры дат",
-                "numbers": "регэкспы для температур/весов/количеств"
-            }
+                "weight": "(?:вес|масса)\\s*(?P<value>\\d+(?:[.,]\\d+)?)\\s*(?P<unit>кг|kg)",
+                "location.enclosure": "вольер\\s*(?P<value>\\w+)"
+            },
+            "normalization": {"animal.species": {"зебра": "zebra"}}
         }
         
         response = self.client.post("/api/entities/config", json=config)
         self.assertEqual(response.status_code, 200)
-        self.assertEqual(response.json(), config)
+        saved = response.json()
+        self.assertGreaterEqual(saved["version"], 1)
+        self.assertEqual(saved["rules"], config["rules"])
+        self.assertEqual(saved["normalization"], config["normalization"])
+        self.assertEqual([entity["name"] for entity in saved["entities"]], [entity["name"] for entity in config["entities"]])
+        
+        # The saved version is the one in effect
+        self.assertEqual(self.client.get("/api/entities/config").json(), saved)
+    
+    def test_entity_config_rejects_bad_validators(self):
+        config = {
+            "entities": [{"name": "vitals", "fields": ["temperature_c"], "validators": {"temperature_c": "normal"}}],
+            "rules": {}
+        }
+        response = self.client.post("/api/entities/config", json=config)
+        self.assertEqual(response.status_code, 400)
+    
+    def test_config_reload_waits_for_running_extraction(self):
+        extractor = registry.get("ner")
+        config = CompiledEntityConfig([{"name": "vitals", "fields": ["weight_kg"]}], version=5)
+        reload = threading.Thread(target=apply_entity_config, args=(config,))
+        
+        with registry.acquire("ner"):
+            reload.start()
+            reload.join(0.2)
+            # An extraction holding the lock keeps seeing one config throughout
+            self.assertEqual(set(extractor.entity_types), set(CompiledEntityConfig().entity_types))
+        reload.join(5)
+        
+        self.assertEqual(extractor.enabled_types, {"vitals"})
+        self.assertIs(extractor.rule_engine, config.rule_engine)
+    
+    def test_stream_rejects_bad_format(self):
+        for params in ("channels=0", "sample_rate=0", "sample_rate=1000000"):
+            with self.client.websocket_connect(f"/ws/transcribe?{params}") as websocket:
+                self.assertEqual(websocket.receive_json()["event"], "error")
+                with self.assertRaises(WebSocketDisconnect) as closed:
+                    websocket.receive_json()
+                self.assertEqual(closed.exception.code, 1003)
+    
+    def test_failed_job_keeps_its_upload(self):
+        from worker import process_audio_task
+        with tempfile.TemporaryDirectory() as upload_dir:
+            path = os.path.join(upload_dir, "job.wav")
+            with open(path, "wb") as f:
+                f.write(b"not a wav file")
+            with self.assertRaises(ValueError):
+                process_audio_task(path, 1, {}, cleanup=True)
+            self.assertFalse(os.path.exists(path))
+            self.assertTrue(os.path.exists(os.path.join(upload_dir, "failed", "job.wav")))
+    
+    def test_observation_export(self):
+        response = self.client.get("/api/observations/export", params={"format": "csv"})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.headers["content-type"].startswith("text/csv"))
+        self.assertTrue(response.text.startswith("id,ts,animal_id,watcher_id,confidence,text,entities"))
+        
+        response = self.client.get("/api/observations/export", params={"start_date": "yesterday"})
+        self.assertEqual(response.status_code, 400)
 
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
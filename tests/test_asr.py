@@ -0,0 +1,65 @@
+import importlib.util
+import os
+import unittest
+from unittest import mock
+from engine.asr import QuantizedWhisperASR, WhisperASR, create_asr_backend, quantize_linear_layers
+
+class TestBackendSelection(unittest.TestCase):
+    def setUp(self):
+        # Model weights are never loaded; only the chosen class matters here
+        for backend_class in (WhisperASR, QuantizedWhisperASR):
+            patcher = mock.patch.object(backend_class, "_load_model", return_value=None)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+    
+    def test_backend_by_name(self):
+        for name, backend_class in [("whisper", WhisperASR), ("whisper-int8", QuantizedWhisperASR)]:
+            asr = create_asr_backend(name, "tiny", use_vad=False)
+            
+            self.assertIs(type(asr), backend_class)
+            self.assertEqual(asr.name, f"{name}-tiny")
+    
+    def test_backend_from_environment(self):
+        with mock.patch.dict(os.environ, {"ASR_BACKEND": "whisper-int8", "WHISPER_MODEL_SIZE": "small"}):
+            asr = create_asr_backend(use_vad=False)
+        
+        self.assertIs(type(asr), QuantizedWhisperASR)
+        self.assertEqual(asr.model_size, "small")
+    
+    def test_default_backend(self):
+        with mock.patch.dict(os.environ):
+            os.environ.pop("ASR_BACKEND", None)
+            os.environ.pop("WHISPER_MODEL_SIZE", None)
+            asr = create_asr_backend(use_vad=False)
+        
+        self.assertEqual(asr.name, "whisper-base")
+    
+    def test_unknown_backend(self):
+        with self.assertRaises(ValueError) as raised:
+            create_asr_backend("whisper-fp8", use_vad=False)
+        
+        self.assertIn("whisper-int8", str(raised.exception))
+
+@unittest.skipUnless(importlib.util.find_spec("torch"), "torch is not installed")
+class TestQuantization(unittest.TestCase):
+    def test_linear_subclasses_are_quantized(self):
+        import torch
+        
+        class CastingLinear(torch.nn.Linear):
+            """Shaped like Whisper's Linear, which casts weights to the input dtype"""
+            
+            def forward(self, x):
+                return torch.nn.functional.linear(x, self.weight.to(x.dtype), self.bias.to(x.dtype))
+        
+        torch.manual_seed(0)
+        model = torch.nn.Sequential(CastingLinear(16, 32), torch.nn.ReLU(), CastingLinear(32, 4))
+        inputs = torch.randn(8, 16)
+        expected = model(inputs)
+        
+        quantized = quantize_linear_layers(model)
+        
+        self.assertFalse(any(isinstance(module, torch.nn.Linear) for module in quantized.modules()))
+        self.assertTrue(torch.allclose(quantized(inputs), expected, atol=0.1))
+
+if __name__ == "__main__":
+    unittest.main()
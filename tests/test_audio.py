@@ -0,0 +1,144 @@
+import asyncio
+import io
+import os
+import tempfile
+import unittest
+import wave
+import numpy as np
+from engine.audio import (
+    Resampler,
+    StreamingAudioConverter,
+    downmix,
+    load_wav,
+    normalize_audio,
+    parse_wav_header,
+    pcm_to_float32,
+    read_wav_upload,
+    resample,
+    save_wav
+)
+
+def make_wav(samples: np.ndarray, sample_rate: int = 16000) -> bytes:
+    buffer = io.BytesIO()
+    with wave.open(buffer, 'wb') as wf:
+        wf.setnchannels(samples.shape[1])
+        wf.setsampwidth(2)
+        wf.setframerate(sample_rate)
+        wf.writeframes(samples.astype('<i2').tobytes())
+    return buffer.getvalue()
+
+class FakeUpload:
+    def __init__(self, data: bytes):
+        self.stream = io.BytesIO(data)
+
+    async def read(self, size: int = -1) -> bytes:
+        return self.stream.read(size)
+
+class TestWavIngestion(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.samples = rng.integers(-32768, 32767, size=(16000, 2), dtype=np.int16)
+        self.data = make_wav(self.samples, 44100)
+    
+    def test_header_parsing(self):
+        wav_format = parse_wav_header(self.data[:64])
+        
+        self.assertEqual(wav_format.channels, 2)
+        self.assertEqual(wav_format.sample_rate, 44100)
+        self.assertEqual(wav_format.data_size, self.samples.nbytes)
+        self.assertIsNone(parse_wav_header(self.data[:20]))
+    
+    def test_rejects_non_wav(self):
+        with self.assertRaises(ValueError):
+            parse_wav_header(b"ID3\x03" + bytes(60))
+    
+    def test_upload_is_read_in_chunks(self):
+        for chunk_size in (7, 1000, 1 << 20):
+            samples, sample_rate = asyncio.run(read_wav_upload(FakeUpload(self.data), 1 << 24, chunk_size))
+            self.assertEqual(sample_rate, 44100)
+            np.testing.assert_array_equal(samples, self.samples)
+    
+    def test_upload_with_unknown_data_size(self):
+        data = bytearray(self.data)
+        data[40:44] = b"\xff\xff\xff\xff"
+        samples, _ = asyncio.run(read_wav_upload(FakeUpload(bytes(data)), 1 << 24, 4096))
+        
+        np.testing.assert_array_equal(samples, self.samples)
+    
+    def test_upload_size_limit(self):
+        with self.assertRaises(ValueError):
+            asyncio.run(read_wav_upload(FakeUpload(self.data), 1000, 4096))
+    
+    def test_load_wav_is_memory_mapped(self):
+        with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as f:
+            f.write(self.data)
+        try:
+            samples, sample_rate = load_wav(f.name)
+            self.assertIsInstance(samples, np.memmap)
+            np.testing.assert_array_equal(samples, self.samples)
+            del samples
+        finally:
+            os.remove(f.name)
+    
+    def test_saved_upload_matches_original_file(self):
+        samples, sample_rate = asyncio.run(read_wav_upload(FakeUpload(self.data), 1 << 24))
+        with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as f:
+            path = f.name
+        try:
+            save_wav(path, samples, sample_rate)
+            with open(path, 'rb') as f:
+                self.assertEqual(f.read(), self.data)
+        finally:
+            os.remove(path)
+    
+    def test_float_conversion(self):
+        audio = pcm_to_float32(np.array([-32768, 0, 16384], dtype=np.int16))
+        
+        self.assertEqual(audio.dtype, np.float32)
+        np.testing.assert_allclose(audio, [-1.0, 0.0, 0.5])
+
+class TestAudioNormalization(unittest.TestCase):
+    def tone(self, sample_rate: int, seconds: float = 1.0, freq: float = 1000.0) -> np.ndarray:
+        t = np.arange(int(sample_rate * seconds)) / sample_rate
+        return (0.5 * np.sin(2 * np.pi * freq * t)).astype(np.float32)
+    
+    def test_resample_keeps_frequency(self):
+        for sample_rate in (8000, 22050, 44100, 48000):
+            audio = resample(self.tone(sample_rate), sample_rate, 16000)
+            self.assertEqual(len(audio), 16000)
+            
+            spectrum = np.abs(np.fft.rfft(audio[1000:-1000]))
+            peak_hz = np.argmax(spectrum) * 16000 / len(audio[1000:-1000])
+            self.assertAlmostEqual(peak_hz, 1000.0, delta=5.0)
+            np.testing.assert_allclose(audio[1000:-1000], self.tone(16000)[1000:-1000], atol=2e-3)
+    
+    def test_streaming_matches_batch(self):
+        audio = np.random.default_rng(1).standard_normal(44100).astype(np.float32)
+        resampler = Resampler(44100, 16000)
+        chunks = [resampler.process(audio[i:i + 882]) for i in range(0, len(audio), 882)]
+        chunks.append(resampler.flush())
+        
+        np.testing.assert_allclose(np.concatenate(chunks), resample(audio, 44100), atol=1e-5)
+    
+    def test_downmix_and_passthrough(self):
+        stereo = np.array([[1000, 3000], [-2000, 0]], dtype=np.int16)
+        np.testing.assert_allclose(downmix(stereo), [2000 / 32768, -1000 / 32768])
+        
+        mono = np.arange(320, dtype=np.int16).reshape(-1, 1)
+        self.assertTrue(np.shares_memory(normalize_audio(mono, 16000), mono))
+    
+    def test_streaming_converter_handles_split_frames(self):
+        stereo = np.random.default_rng(2).integers(-3000, 3000, size=(4800, 2), dtype=np.int16)
+        data = stereo.tobytes()
+        converter = StreamingAudioConverter(48000, channels=2)
+        
+        # Chunk boundaries deliberately fall inside sample frames
+        pieces = [converter.convert(data[i:i + 1001]) for i in range(0, len(data), 1001)]
+        pieces.append(converter.flush())
+        streamed = np.concatenate(pieces)
+        
+        self.assertEqual(len(streamed), 1600)
+        np.testing.assert_allclose(streamed, normalize_audio(stereo, 48000), atol=1)
+
+if __name__ == "__main__":
+    unittest.main()
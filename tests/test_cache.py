@@ -0,0 +1,56 @@
+import unittest
+import numpy as np
+from engine.asr import ASRBackend
+from engine.cache import LRUCache, TranscriptionCache
+
+class TestTranscriptionCache(unittest.TestCase):
+    def setUp(self):
+        self.cache = TranscriptionCache(max_bytes=1024)
+        self.samples = np.arange(16000, dtype=np.int16).reshape(-1, 1)
+    
+    def test_key_depends_on_audio_and_model(self):
+        key = TranscriptionCache.make_key(self.samples, 16000, "whisper-base")
+        
+        self.assertEqual(key, TranscriptionCache.make_key(self.samples.copy(), 16000, "whisper-base"))
+        self.assertNotEqual(key, TranscriptionCache.make_key(self.samples, 16000, "whisper-tiny"))
+        self.assertNotEqual(key, TranscriptionCache.make_key(self.samples, 16000, "whisper-base", "en"))
+        self.assertNotEqual(key, TranscriptionCache.make_key(self.samples[:-1], 16000, "whisper-base"))
+    
+    def test_key_depends_on_vad_and_chunking(self):
+        settings = [
+            ASRBackend(use_vad=True, chunk_sec=120.0).settings,
+            ASRBackend(use_vad=False, chunk_sec=120.0).settings,
+            ASRBackend(use_vad=False, chunk_sec=60.0).settings,
+            ASRBackend(use_vad=False, chunk_sec=60.0, overlap_sec=2.0).settings,
+        ]
+        keys = {TranscriptionCache.make_key(self.samples, 16000, "whisper-base", "ru", setting) for setting in settings}
+        
+        self.assertEqual(len(keys), len(settings))
+        self.assertEqual(ASRBackend(use_vad=True, chunk_sec=120.0).settings, settings[0])
+    
+    def test_hit_returns_independent_copy(self):
+        key = TranscriptionCache.make_key(self.samples, 16000, "whisper-base")
+        self.assertIsNone(self.cache.get(key))
+        
+        self.cache.put(key, {"text": "вес 850 кг", "segments": []})
+        result = self.cache.get(key)
+        result["text"] = "changed"
+        
+        self.assertEqual(self.cache.get(key)["text"], "вес 850 кг")
+        self.assertEqual(self.cache.stats()["memory"]["hits"], 2)
+        self.assertAlmostEqual(self.cache.stats()["hit_rate"], 2 / 3)
+    
+    def test_lru_evicts_by_size(self):
+        lru = LRUCache(max_bytes=100)
+        lru.put("a", b"x" * 40)
+        lru.put("b", b"x" * 40)
+        lru.get("a")
+        lru.put("c", b"x" * 40)
+        
+        self.assertIsNotNone(lru.get("a"))
+        self.assertIsNone(lru.get("b"))
+        self.assertEqual(lru.stats()["bytes"], 80)
+        self.assertEqual(lru.stats()["evictions"], 1)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,55 @@
+import unittest
+from engine.entity_config import CompiledEntityConfig, compile_validator
+from engine.normalization import EntityNormalizer
+
+class TestCompileValidator(unittest.TestCase):
+    def test_range(self):
+        check = compile_validator(">= 25 & <= 45")
+        self.assertTrue(check(25))
+        self.assertTrue(check(37.8))
+        self.assertFalse(check(24.9))
+        self.assertFalse(check(45.1))
+    
+    def test_alternatives_and_decimal_comma(self):
+        check = compile_validator("< 0,5 | > 100")
+        self.assertTrue(check(0.4))
+        self.assertTrue(check(101))
+        self.assertFalse(check(50))
+    
+    def test_invalid_expressions(self):
+        for expression in ["", "normal", ">= 25 &", "== abs(1)", "> 1; import os"]:
+            with self.assertRaises(ValueError):
+                compile_validator(expression)
+
+class TestCompiledEntityConfig(unittest.TestCase):
+    def test_default_config_keeps_builtin_bounds(self):
+        normalizer = EntityNormalizer()
+        validated = normalizer.validate_entities({"vitals": {"temperature_c": 46.0, "weight_kg": 850.0}})
+        
+        self.assertEqual(validated["alert"]["message"], "Abnormal temperature: 46.0°C")
+        self.assertNotIn("alert", normalizer.validate_entities({"vitals": {"temperature_c": 38.0}}))
+    
+    def test_apply_config(self):
+        normalizer = EntityNormalizer()
+        normalizer.apply_config(CompiledEntityConfig(
+            [{"name": "vitals", "fields": ["temperature_c"], "validators": {"temperature_c": ">= 36 & <= 40"}}],
+            normalization={"animal.species": {"Зебра": "zebra"}},
+            version=3
+        ))
+        entities = normalizer.normalize_entities({"animal": {"species": "зебра"}, "vitals": {"temperature_c": "41,5"}})
+        validated = normalizer.validate_entities(entities)
+        
+        self.assertEqual(normalizer.config.version, 3)
+        self.assertEqual(validated["animal"]["species"], "zebra")
+        self.assertEqual(validated["alert"]["message"], "Abnormal temperature: 41.5°C")
+        # Built-in tables still apply
+        self.assertEqual(normalizer.normalize_entities({"animal": {"species": "Жираф"}})["animal"]["species"], "giraffe")
+    
+    def test_invalid_config(self):
+        with self.assertRaises(ValueError):
+            CompiledEntityConfig(rules={"weight": "("})
+        with self.assertRaises(ValueError):
+            CompiledEntityConfig(normalization={"species": {"зебра": "zebra"}})
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,48 @@
+import unittest
+from engine.gazetteer import Gazetteer, GazetteerEntry, build_gazetteer, cyrillic_variant
+
+class TestGazetteer(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.gazetteer = build_gazetteer()
+        cls.gazetteer.sync_animals([(1, "Жужа", "giraffe"), (3, "Sonya", "bear")])
+    
+    def test_matches_inflected_forms_with_spans(self):
+        text = "У Жужи вялое поведение, съела сено"
+        matches = self.gazetteer.match(text)
+        
+        self.assertEqual([(match.field, match.value, match.animal_id) for match in matches], [
+            ("name", "Жужа", 1), ("type", "вялое", None), ("food", "сено", None)
+        ])
+        for match in matches:
+            self.assertEqual(text[match.start:match.end], match.text)
+    
+    def test_latin_names_match_cyrillic_transcripts(self):
+        self.assertEqual(cyrillic_variant("Sonya"), "соня")
+        self.assertEqual(self.gazetteer.match("соня спит")[0].animal_id, 3)
+    
+    def test_multi_word_phrases(self):
+        gazetteer = Gazetteer(self.gazetteer.morph_vocab)
+        gazetteer.add("белый медведь", GazetteerEntry("animal", "species", "белый медведь"))
+        gazetteer.add("медведь", GazetteerEntry("animal", "species", "медведь"))
+        
+        matches = gazetteer.match("видели белого медведя")
+        self.assertEqual([match.value for match in matches], ["белый медведь", "медведь"])
+        self.assertEqual(matches[0].text, "белого медведя")
+    
+    def test_sync_applies_only_changes(self):
+        gazetteer = build_gazetteer(morph_vocab=self.gazetteer.morph_vocab)
+        gazetteer.sync_animals([(1, "Жужа", "giraffe"), (2, "Dima", "elephant")])
+        version = gazetteer.version
+        
+        self.assertEqual(gazetteer.sync_animals([(1, "Жужа", "giraffe"), (2, "Dima", "elephant")]), 0)
+        self.assertEqual(gazetteer.version, version)
+        
+        gazetteer.sync_animals([(1, "Жужа", "giraffe"), (2, "Рома", "elephant")])
+        self.assertEqual(gazetteer.match("дима и рома")[0].value, "Рома")
+        
+        gazetteer.sync_animals([(2, "Рома", "elephant")])
+        self.assertEqual(gazetteer.match("жужа"), [])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,50 @@
+import unittest
+from engine.metrics import MetricsRegistry
+
+class TestMetrics(unittest.TestCase):
+    def setUp(self):
+        self.metrics = MetricsRegistry()
+    
+    def test_histogram_buckets_are_cumulative(self):
+        histogram = self.metrics.histogram("stage_seconds", "Stage latency", ["stage"], buckets=(0.1, 1.0))
+        histogram.observe(0.05, stage="asr")
+        histogram.observe(0.5, stage="asr")
+        histogram.observe(5.0, stage="asr")
+        
+        text = self.metrics.render()
+        self.assertIn("# TYPE stage_seconds histogram", text)
+        self.assertIn('stage_seconds_bucket{stage="asr",le="0.1"} 1', text)
+        self.assertIn('stage_seconds_bucket{stage="asr",le="1"} 2', text)
+        self.assertIn('stage_seconds_bucket{stage="asr",le="+Inf"} 3', text)
+        self.assertIn('stage_seconds_sum{stage="asr"} 5.55', text)
+        self.assertIn('stage_seconds_count{stage="asr"} 3', text)
+    
+    def test_time_records_on_exception(self):
+        histogram = self.metrics.histogram("stage_seconds", "Stage latency", ["stage"])
+        with self.assertRaises(RuntimeError):
+            with histogram.time(stage="db_write"):
+                raise RuntimeError("db down")
+        
+        self.assertEqual(histogram.count(stage="db_write"), 1)
+    
+    def test_collectors_refresh_gauges_before_render(self):
+        depth = self.metrics.gauge("queue_depth", "Pending items", ["queue"])
+        self.metrics.add_collector(lambda: depth.set(7, queue="celery"))
+        self.metrics.add_collector(lambda: 1 / 0)
+        
+        self.assertIn('queue_depth{queue="celery"} 7', self.metrics.render())
+    
+    def test_same_name_returns_same_metric(self):
+        counter = self.metrics.counter("hits_total", "Hits", ["tier"])
+        self.assertIs(counter, self.metrics.counter("hits_total", "Hits", ["tier"]))
+        with self.assertRaises(ValueError):
+            self.metrics.gauge("hits_total", "Hits")
+    
+    def test_label_values_are_escaped(self):
+        counter = self.metrics.counter("errors_total", "Errors", ["message"])
+        counter.inc(message='bad "quote"\n')
+        
+        self.assertIn('errors_total{message="bad \\"quote\\"\\n"} 1', self.metrics.render())
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,5 +1,8 @@
 import unittest
-from engine.ner import EntityExtractor
+import numpy as np
+from types import SimpleNamespace
+from natasha import NewsEmbedding
+from engine.ner import EntityExtractor, IncrementalExtractor, load_news_embedding
 from engine.normalization import EntityNormalizer
 
 class TestEntityExtractor(unittest.TestCase):
@@ -58,15 +61,206 @@ class TestEntityExtractor(unittest.TestCase):
         self.assertEqual(normalized["behavior"]["type"], "calm")
     
     def test_entity_validation(self):
-        entities = {
-            "vitals": {"temperature_c": 42.0, "weight_kg": 850.0}
-        }
+        # 42 °C is inside the 30-45 °C bounds, so it passes without an alert
+        validated = self.normalizer.validate_entities({"vitals": {"temperature_c": 42.0, "weight_kg": 850.0}})
+        self.assertNotIn("alert", validated)
         
-        validated = self.normalizer.validate_entities(entities)
+        validated = self.normalizer.validate_entities({"vitals": {"temperature_c": 46.0, "weight_kg": 850.0}})
         
         # Check that high temperature generates an alert
         self.assertIn("alert", validated)
         self.assertEqual(validated["alert"]["severity"], "warning")
 
+class TestNERProfiles(unittest.TestCase):
+    def test_fast_profile_matches_default_on_nominative_names(self):
+        default = EntityExtractor("default")
+        fast = EntityExtractor("fast")
+        
+        for text in ["Самка жирафа Жужа ела 700 грамм люцерны", "вес 850 кг"]:
+            self.assertEqual(fast.extract_entities(text), default.extract_entities(text))
+    
+    def test_spacy_person_spans_keep_names_as_spoken(self):
+        extractor = EntityExtractor("default", cache_bytes=0)
+        text = "Кормили Бориса морковью"
+        self.assertEqual(extractor.extract_entities(text)["animal"]["name"], "Борис")
+        
+        # Stand-in for ru_core_news_sm, which tags people PER
+        extractor.nlp = lambda text: SimpleNamespace(ents=[SimpleNamespace(label_="PER", text="Бориса")])
+        self.assertEqual(extractor.extract_entities(text)["animal"]["name"], "Бориса")
+    
+    def test_disabled_types_skip_natasha(self):
+        extractor = EntityExtractor("default", enabled_types=["vitals"])
+        entities = extractor.extract_entities("Жужа ела 700 грамм, вес 850 кг")
+        
+        self.assertFalse(hasattr(extractor, "ner_tagger"))
+        self.assertEqual(list(entities), ["vitals"])
+        self.assertEqual(entities["vitals"]["weight_kg"], 850.0)
+    
+    def test_batch_matches_single_calls(self):
+        extractor = EntityExtractor("default")
+        texts = [
+            "Самка жирафа Жужа ела 700 грамм люцерны",
+            "",
+            "Медведь Sonya весит 850 кг, вес 850 кг",
+            "осмотр 12.03.2024, ела 300 г",
+            "Смотритель Анна Иванова пришла. Потом пришел Олег Сидоров.",
+        ]
+        
+        batch = list(extractor.extract_entities_batch(iter(texts), batch_size=3))
+        self.assertEqual(batch, [extractor.extract_entities(text) for text in texts])
+        self.assertEqual(batch[-1]["animal"]["name"], "Олег Сидоров")
+    
+    def test_batch_is_lazy(self):
+        extractor = EntityExtractor("fast")
+        consumed = []
+        
+        def texts():
+            for index in range(10):
+                consumed.append(index)
+                yield f"вес {index} кг"
+        
+        results = extractor.extract_entities_batch(texts(), batch_size=4)
+        self.assertEqual(next(results)["vitals"]["weight_kg"], 0.0)
+        self.assertEqual(len(consumed), 4)
+    
+    def test_batch_rescans_rules_crossing_documents(self):
+        extractor = EntityExtractor("fast", enabled_types=["feeding", "location"],
+                                    rules={"location.zone": r"зона(?P<value>[^,]*)"})
+        texts = ["ела 300 г, зона", "Б 12"]
+        
+        batch = list(extractor.extract_entities_batch(texts))
+        self.assertEqual(batch, [extractor.extract_entities(text) for text in texts])
+    
+    def test_known_animals_resolve_without_neural_ner(self):
+        extractor = EntityExtractor("default")
+        extractor.gazetteer.sync_animals([(1, "Жужа", "giraffe")])
+        entities = extractor.extract_entities("у жужи вялое поведение")
+        
+        self.assertFalse(extractor._needs_ner(extractor.gazetteer.match("у жужи вялое поведение")))
+        self.assertEqual(entities["animal"]["name"], "Жужа")
+        self.assertEqual(entities["animal"]["id"], 1)
+        self.assertEqual(entities["animal"]["species"], "giraffe")
+        self.assertEqual(entities["behavior"]["type"], "вялое")
+    
+    def test_sentence_cache_reuses_fragments(self):
+        extractor = EntityExtractor("default")
+        text = "Вес 850 кг. Спокойное поведение, температура 37.8."
+        first = extractor.extract_entities(text)
+        first["vitals"]["weight_kg"] = 0
+        second = extractor.extract_entities("Ела 300 г.  Спокойное поведение, температура 37.8.")
+        
+        self.assertEqual(extractor.extract_entities(text)["vitals"]["weight_kg"], 850.0)
+        self.assertEqual(extractor.cache_stats()["hits"], 3)
+        mention = second["vitals"]["mentions"][0]
+        self.assertEqual(mention["text"], "температура 37.8")
+        self.assertEqual((mention["start"], mention["end"]), (33, 49))
+        self.assertEqual(extractor.extract_entities(text), extractor._extract_text(text))
+    
+    def test_sentence_cache_keeps_whole_text_name_precedence(self):
+        extractor = EntityExtractor("default")
+        extractor.gazetteer.sync_animals([(1, "Жужа", "giraffe")])
+        for text in [
+            "Смотритель Анна Иванова пришла. Потом пришел Олег Сидоров.",
+            "Жужа спокойна. Потом пришел Олег Сидоров.",
+            "Пришел Олег Сидоров. У жужи вялое поведение.",
+        ]:
+            self.assertEqual(extractor.extract_entities(text), extractor._extract_text(text), text)
+    
+    def test_sentence_cache_follows_gazetteer(self):
+        extractor = EntityExtractor("fast")
+        self.assertNotIn("id", extractor.extract_entities("у Жужи вялое поведение")["animal"])
+        
+        extractor.gazetteer.sync_animals([(7, "Жужа", "жираф")])
+        entities = extractor.extract_entities("у Жужи вялое поведение")
+        self.assertEqual(entities["animal"]["id"], 7)
+        self.assertEqual(extractor.cache_stats()["invalidations"], 1)
+    
+    def test_sentence_cache_disabled(self):
+        extractor = EntityExtractor("fast", cache_bytes=0)
+        extractor.extract_entities("вес 850 кг")
+        self.assertEqual(extractor.cache_stats(), {"enabled": False})
+    
+    def test_apply_config(self):
+        from engine.entity_config import CompiledEntityConfig
+        extractor = EntityExtractor("fast")
+        extractor.extract_entities("Жужа, вольер 12, вес 850 кг")
+        extractor.apply_config(CompiledEntityConfig(
+            [{"name": "location", "fields": ["enclosure"]}, {"name": "vitals", "fields": ["weight_kg"]}],
+            rules={"location.enclosure": r"вольер\s*(?P<value>\w+)"}
+        ))
+        entities = extractor.extract_entities("Жужа, вольер 12, вес 850 кг")
+        
+        self.assertEqual(entities, {
+            "location": {"enclosure": "12", "mentions": [
+                {"field": "enclosure", "value": "12", "start": 6, "end": 15, "text": "вольер 12"}
+            ]},
+            "vitals": {"weight_kg": 850.0, "mentions": [
+                {"field": "weight_kg", "value": 850.0, "start": 17, "end": 27, "text": "вес 850 кг"}
+            ]},
+        })
+        self.assertEqual(extractor.cache_stats()["invalidations"], 1)
+    
+    def test_registry_extractor_keeps_built_in_rule_types(self):
+        from engine.registry import registry
+        # The registry applies the built-in entity config, which must keep the rule types
+        try:
+            entities = registry.get("ner").extract_entities("осмотр 12.03.2024, ела 300 г")
+        finally:
+            registry.unload("ner")
+        self.assertEqual(entities["observation"]["date"], "2024-03-12T00:00:00")
+        self.assertEqual(entities["feeding"]["amount_g"], 300.0)
+    
+    def test_unknown_profile(self):
+        with self.assertRaises(ValueError):
+            EntityExtractor("turbo")
+    
+    def test_mapped_embedding_matches_natasha(self):
+        mapped, loaded = load_news_embedding(), NewsEmbedding()
+        
+        self.assertIsInstance(mapped.pq.codes, np.memmap)
+        self.assertFalse(mapped.pq.codes.flags.writeable)
+        self.assertEqual(mapped.meta, loaded.meta)
+        self.assertTrue(np.array_equal(mapped.pq.indexes, loaded.pq.indexes))
+        self.assertTrue(np.array_equal(mapped.pq.codes, loaded.pq.codes))
+        self.assertTrue(np.array_equal(mapped["жираф"], loaded["жираф"]))
+
+class TestIncrementalExtractor(unittest.TestCase):
+    def setUp(self):
+        self.extractor = EntityExtractor("default")
+    
+    def test_state_matches_whole_transcript(self):
+        finals = ["самка жирафа жужа ела семьсот грамм", "температура 37.8", "вес 850 кг", "температура 38.2"]
+        tracker = IncrementalExtractor(self.extractor)
+        for text in finals:
+            tracker.add_final(text)
+        
+        self.assertEqual(tracker.entities, self.extractor.extract_entities("\n".join(finals)))
+    
+    def test_deltas_only_carry_new_information(self):
+        tracker = IncrementalExtractor(self.extractor)
+        first = tracker.add_final("температура 37.8")
+        second = tracker.add_final("температура 38.2")
+        
+        self.assertEqual(first["vitals"]["temperature_c"], 37.8)
+        self.assertEqual(list(second["vitals"]), ["mentions"])
+        self.assertEqual(second["vitals"]["mentions"][0]["start"], len("температура 37.8") + 1)
+        self.assertEqual(tracker.add_final("   "), {})
+    
+    def test_annotate_stream_events(self):
+        tracker = IncrementalExtractor(self.extractor)
+        events = tracker.annotate([
+            {"event": "partial", "text": "вес 850"},
+            {"event": "partial", "text": "вес 850 кг"},
+            {"event": "final", "text": "вес 850 кг", "segment": {"start": 0.0, "end": 1.2}},
+        ])
+        
+        self.assertNotIn("entities", events[0])
+        self.assertEqual(events[1]["entities"]["vitals"]["weight_kg"], 850.0)
+        self.assertEqual(events[2]["event"], "final")
+        self.assertEqual(events[3], {"event": "entity_update", "entities": tracker.entities})
+        # Previews are not part of the session state
+        tracker.preview("температура 40")
+        self.assertNotIn("temperature_c", tracker.entities["vitals"])
+
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
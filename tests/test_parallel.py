@@ -0,0 +1,117 @@
+import multiprocessing
+import unittest
+import numpy as np
+from engine.asr import ASRBackend
+from engine.parallel import merge_region_segments, pack_windows, plan_chunks, shutdown_pools, split_regions
+
+class FakeDecoderASR(ASRBackend):
+    """Decoder stand-in that reports every non-silent run of samples as a segment"""
+
+    name = backend = "fake"
+
+    def __init__(self, model_size: str = "base", **kwargs):
+        kwargs.setdefault("use_vad", False)
+        super().__init__(model_size, **kwargs)
+        self.decoded_sec = []
+
+    def _decode(self, audio):
+        self.decoded_sec.append(len(audio) / 16000)
+        voiced = np.flatnonzero(audio)
+        runs = np.split(voiced, np.flatnonzero(np.diff(voiced) > 1) + 1) if len(voiced) else []
+        return [{"start": run[0] / 16000, "end": (run[-1] + 1) / 16000, "text": "речь"} for run in runs]
+
+def utterances(starts, length_sec=1.0, total_sec=35.0):
+    """Silent int16 clip with one second of constant "speech" at each start"""
+    audio = np.zeros(int(total_sec * 16000), dtype=np.int16)
+    for start in starts:
+        audio[int(start * 16000):int((start + length_sec) * 16000)] = 1000
+    return audio
+
+class TestParallelChunking(unittest.TestCase):
+    def test_long_regions_are_split_with_overlap(self):
+        pieces = split_regions([(0.0, 250.0), (260.0, 270.0)], max_sec=100.0, overlap_sec=2.0)
+        
+        self.assertEqual(pieces, [(0.0, 100.0), (98.0, 198.0), (196.0, 250.0), (260.0, 270.0)])
+    
+    def test_chunks_group_consecutive_regions(self):
+        regions = [(0.0, 10.0), (20.0, 50.0), (55.0, 70.0), (130.0, 140.0)]
+        
+        self.assertEqual(plan_chunks(regions, chunk_sec=60.0), [[0, 1], [2], [3]])
+    
+    def test_overlap_words_are_deduplicated(self):
+        regions = [(0.0, 30.0), (28.0, 40.0)]
+        region_segments = [
+            [{"start": 0.0, "end": 29.5, "text": "Самка жирафа Жужа ела 700 грамм"}],
+            [{"start": 28.0, "end": 33.0, "text": "700 грамм люцерны."}]
+        ]
+        
+        merged = merge_region_segments(region_segments, regions)
+        
+        self.assertEqual(" ".join(segment["text"] for segment in merged), "Самка жирафа Жужа ела 700 грамм люцерны.")
+    
+    def test_disjoint_regions_are_kept(self):
+        regions = [(0.0, 5.0), (10.0, 15.0)]
+        region_segments = [
+            [{"start": 0.0, "end": 5.0, "text": "вес 850 кг"}],
+            [{"start": 10.0, "end": 15.0, "text": "вес 850 кг"}]
+        ]
+        
+        self.assertEqual(len(merge_region_segments(region_segments, regions)), 2)
+    
+    def test_short_regions_are_packed_into_windows(self):
+        regions = [(0.0, 5.0), (10.0, 25.0), (28.0, 40.0), (41.0, 100.0)]
+        
+        self.assertEqual(pack_windows(regions, window_sec=30.0), [(0.0, 25.0), (28.0, 40.0), (41.0, 100.0)])
+
+class TestWindowDecoding(unittest.TestCase):
+    def test_each_window_is_decoded_once(self):
+        starts = [index * 3.5 for index in range(10)]
+        asr = FakeDecoderASR(workers=1, chunk_sec=120.0)
+        
+        result = asr.transcribe_regions(utterances(starts), [(start, start + 1.0) for start in starts])
+        
+        self.assertEqual(asr.decoded_sec, [29.0, 1.0])
+        self.assertEqual([segment["start"] for segment in result["segments"]], starts)
+        self.assertEqual([segment["end"] for segment in result["segments"]], [start + 1.0 for start in starts])
+        self.assertEqual(result["speech_sec"], 10.0)
+
+class TestProcessPool(unittest.TestCase):
+    # Spawned workers import this module to rebuild FakeDecoderASR
+    starts = [index * 10.0 for index in range(12)]
+    
+    def tearDown(self):
+        shutdown_pools()
+    
+    def transcribe(self, workers: int):
+        asr = FakeDecoderASR(workers=workers, chunk_sec=30.0)
+        result = asr.transcribe_regions(utterances(self.starts, total_sec=125.0), [(start, start + 1.0) for start in self.starts])
+        return asr, result
+    
+    def test_pool_matches_sequential_decoding(self):
+        _, sequential = self.transcribe(workers=1)
+        asr, parallel = self.transcribe(workers=2)
+        
+        # Every window went to a worker process
+        self.assertEqual(asr.decoded_sec, [])
+        self.assertEqual(parallel, sequential)
+        self.assertEqual([segment["start"] for segment in parallel["segments"]], self.starts)
+    
+    def test_daemonic_process_decodes_sequentially(self):
+        context = multiprocessing.get_context("fork")
+        results = context.Queue()
+        
+        def run():
+            asr, result = self.transcribe(workers=2)
+            results.put((len(asr.decoded_sec), [segment["start"] for segment in result["segments"]]))
+        
+        # Like a Celery prefork child, which may not start pool workers
+        process = context.Process(target=run, daemon=True)
+        process.start()
+        decoded, starts = results.get(timeout=30)
+        process.join()
+        
+        self.assertEqual(decoded, 4)
+        self.assertEqual(starts, self.starts)
+
+if __name__ == "__main__":
+    unittest.main()
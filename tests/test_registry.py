@@ -0,0 +1,54 @@
+import threading
+import unittest
+from engine.registry import ModelRegistry
+
+class DummyModel:
+    def __init__(self):
+        self.warmed = False
+
+    def warmup(self):
+        self.warmed = True
+
+class TestModelRegistry(unittest.TestCase):
+    def setUp(self):
+        self.loads = 0
+        self.registry = ModelRegistry()
+        self.registry.register("dummy", self._load_dummy)
+
+    def _load_dummy(self):
+        self.loads += 1
+        return DummyModel()
+
+    def test_model_loaded_once(self):
+        threads = [threading.Thread(target=self.registry.get, args=("dummy",)) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        
+        self.assertEqual(self.loads, 1)
+        self.assertIs(self.registry.get("dummy"), self.registry.get("dummy"))
+    
+    def test_preload_and_warmup_status(self):
+        self.assertFalse(self.registry.status()["dummy"]["loaded"])
+        
+        self.registry.preload()
+        self.registry.warmup()
+        
+        status = self.registry.status()["dummy"]
+        self.assertTrue(status["loaded"])
+        self.assertTrue(status["warm"])
+        self.assertTrue(self.registry.get("dummy").warmed)
+    
+    def test_failed_load_is_reported(self):
+        def broken():
+            raise FileNotFoundError("model missing")
+        self.registry.register("broken", broken)
+        
+        self.registry.preload(ignore_errors=True)
+        
+        self.assertEqual(self.registry.status()["broken"]["error"], "model missing")
+        self.assertTrue(self.registry.is_loaded("dummy"))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,299 @@
+import asyncio
+import csv
+import io
+import json
+import os
+import tempfile
+import unittest
+from datetime import date, datetime, timedelta
+from sqlalchemy import create_engine, create_mock_engine, event
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session, sessionmaker
+from models import Animal, Base, DailyAnimalReport, Observation, ObservationEntity
+from repositories import (
+    DailyReportRepository, ObservationEntityRepository, ObservationUnitOfWork, AsyncObservationUnitOfWork
+)
+from engine.ner import EntityExtractor
+from engine.registry import registry
+from services import AsyncReportService, AsyncTranscriptionService, TranscriptionService, run_cpu
+
+class DatabaseTestCase(unittest.TestCase):
+    def setUp(self):
+        self.engine = create_engine("sqlite://")
+        Base.metadata.create_all(self.engine)
+        self.db = sessionmaker(bind=self.engine)()
+        self.statements = []
+        event.listen(self.engine, "before_cursor_execute",
+                     lambda conn, cursor, statement, *args: self.statements.append(statement))
+
+    def tearDown(self):
+        self.db.close()
+
+    def observation(self, text: str) -> dict:
+        return {"animal_id": 1, "watcher_id": 7, "raw_text": text, "confidence": 0.0}
+
+class TestObservationUnitOfWork(DatabaseTestCase):
+    def test_one_observation_in_one_transaction(self):
+        commits = []
+        event.listen(self.db, "after_commit", lambda session: commits.append(session))
+        unit_of_work = ObservationUnitOfWork(self.db)
+        unit_of_work.add(self.observation("жираф ел"), {
+            "animal": {"species": "giraffe"},
+            "feeding": {"food": "alfalfa", "amount_g": 700},
+            "vitals": {"temperature_c": 37.8},
+        })
+
+        observation_id, = unit_of_work.commit()
+        self.assertEqual(len(commits), 1)
+        # One INSERT per table plus the daily rollup upsert, no SELECTs to refresh rows
+        self.assertEqual(len(self.statements), 3)
+        entities = ObservationEntityRepository(self.db).get_entities_by_observation(observation_id)
+        self.assertEqual({entity.type: entity.payload_json for entity in entities}["feeding"],
+                         {"food": "alfalfa", "amount_g": 700})
+        self.assertIsNotNone(self.db.get(Observation, observation_id).ts)
+
+    def test_bulk_keeps_entities_with_their_observation(self):
+        unit_of_work = ObservationUnitOfWork(self.db)
+        for i in range(50):
+            unit_of_work.add(self.observation(f"note {i}"), {"vitals": {"weight_kg": i}} if i % 2 else {})
+
+        observation_ids = unit_of_work.commit()
+        self.assertEqual(len(observation_ids), 50)
+        for i, observation_id in enumerate(observation_ids):
+            self.assertEqual(self.db.get(Observation, observation_id).raw_text, f"note {i}")
+        rows = self.db.query(ObservationEntity).all()
+        self.assertEqual(len(rows), 25)
+        for row in rows:
+            self.assertEqual(observation_ids.index(row.observation_id), row.payload_json["weight_kg"])
+        self.assertEqual(unit_of_work.commit(), [])
+
+    def test_failure_rolls_back_everything(self):
+        unit_of_work = ObservationUnitOfWork(self.db)
+        unit_of_work.add(self.observation("ok"), {"animal": {"name": "Жужа"}})
+        # Fails on the entity insert, after the observations were written
+        unit_of_work.add(self.observation("bad payload"), {"alert": {"message": object()}})
+
+        with self.assertRaises(Exception):
+            unit_of_work.commit()
+        self.assertEqual(self.db.query(Observation).count(), 0)
+        self.assertEqual(self.db.query(ObservationEntity).count(), 0)
+        self.assertEqual(self.db.query(DailyAnimalReport).count(), 0)
+
+class TestGazetteerSync(DatabaseTestCase):
+    def setUp(self):
+        super().setUp()
+        self.gazetteer = registry.get("gazetteer")
+
+    def tearDown(self):
+        super().tearDown()
+        registry.unload("gazetteer")
+
+    def test_only_committed_animals_are_indexed(self):
+        self.db.add(Animal(id=41, species="зебра", name="Марта"))
+        self.db.flush()
+        self.assertIsNone(self.gazetteer.animal_species(41))
+        self.db.rollback()
+        self.assertIsNone(self.gazetteer.animal_species(41))
+
+        self.db.add(Animal(id=41, species="зебра", name="Марта"))
+        self.db.commit()
+        self.assertEqual(self.gazetteer.animal_species(41), "зебра")
+        self.db.delete(self.db.get(Animal, 41))
+        self.db.flush()
+        self.assertEqual(self.gazetteer.animal_species(41), "зебра")
+        self.db.commit()
+        self.assertIsNone(self.gazetteer.animal_species(41))
+
+class TestDailyReports(DatabaseTestCase):
+    def day_rows(self, day: date) -> dict:
+        return {
+            report.animal_id: (report.observations, report.critical_alerts, report.warnings, report.latest_vitals)
+            for report, _, _ in DailyReportRepository(self.db).get_day(day)
+        }
+
+    def test_rollup_follows_each_commit(self):
+        # Real extractor output, mentions included
+        extractor = EntityExtractor("fast", enabled_types=["vitals"])
+        for entities in [
+            extractor.extract_entities("температура 37.8, вес 850 кг"),
+            dict(extractor.extract_entities("температура 41.5"),
+                 alert={"severity": "warning", "message": "Abnormal temperature"}),
+            {"alert": {"severity": "critical", "message": "Не встаёт"}},
+        ]:
+            unit_of_work = ObservationUnitOfWork(self.db)
+            unit_of_work.add(self.observation("note"), entities)
+            unit_of_work.add(dict(self.observation("other"), animal_id=2), {})
+            unit_of_work.commit()
+
+        rows = self.day_rows(datetime.utcnow().date())
+        # Vitals merge field by field, newest value first, without the mentions
+        self.assertEqual(rows[1], (3, 1, 1, {"temperature_c": 41.5, "weight_kg": 850.0}))
+        self.assertEqual(rows[2], (3, 0, 0, {}))
+
+    def test_rebuild_matches_incremental_rollups(self):
+        unit_of_work = ObservationUnitOfWork(self.db)
+        for i in range(12):
+            unit_of_work.add(dict(self.observation(f"note {i}"), animal_id=1 + i % 3,
+                                  ts=datetime(2026, 10, 1 + i // 6, i)),
+                             {"vitals": {"weight_kg": i}, "alert": {"severity": "high"}} if i % 4 else {})
+        unit_of_work.commit()
+        days = [date(2026, 10, 1), date(2026, 10, 2)]
+        incremental = [self.day_rows(day) for day in days]
+        self.assertEqual(incremental[0][2], (2, 1, 0, {"weight_kg": 1}))
+
+        self.db.query(DailyAnimalReport).delete()
+        self.db.commit()
+        self.assertEqual(DailyReportRepository(self.db).rebuild(), 2)
+        self.assertEqual([self.day_rows(day) for day in days], incremental)
+
+    def test_upsert_rejects_other_databases(self):
+        db = Session(bind=create_mock_engine("mysql://", lambda *args, **kwargs: None))
+        rollups = {(1, date(2026, 10, 1)): {"observations": 1, "critical_alerts": 0, "warnings": 0, "latest_vitals": {}}}
+
+        with self.assertRaisesRegex(ValueError, "postgresql and sqlite, not mysql"):
+            DailyReportRepository(db).add(rollups)
+
+class TestTranscriptionListing(DatabaseTestCase):
+    def setUp(self):
+        super().setUp()
+        unit_of_work = ObservationUnitOfWork(self.db)
+        for i in range(25):
+            unit_of_work.add(dict(self.observation(f"note {i}"), animal_id=1 + i % 2),
+                             {"vitals": {"weight_kg": i}, "animal": {"id": 1 + i % 2}})
+        self.ids = unit_of_work.commit()
+        # Groups of five share a timestamp so pages have to break ties on id
+        start = datetime(2026, 10, 1)
+        for i, observation_id in enumerate(self.ids):
+            self.db.get(Observation, observation_id).ts = start + timedelta(minutes=i // 5)
+        self.db.commit()
+        self.service = TranscriptionService(self.db)
+
+    def list_all(self, limit: int, **filters) -> list:
+        pages, cursor = [], None
+        while True:
+            page = self.service.get_transcriptions(cursor=cursor, limit=limit, **filters)
+            pages.append(page.items)
+            cursor = page.next_cursor
+            if cursor is None:
+                return pages
+
+    def test_pages_cover_every_observation_newest_first(self):
+        pages = self.list_all(10)
+        self.assertEqual([len(page) for page in pages], [10, 10, 5])
+        listed = [int(item.id[4:]) for page in pages for item in page]
+        self.assertEqual(listed, sorted(self.ids, reverse=True))
+        self.assertEqual(pages[0][0].entities["vitals"], {"weight_kg": 24})
+
+    def test_filters_and_exact_last_page(self):
+        pages = self.list_all(4, animal_id=2)
+        listed = [int(item.id[4:]) for page in pages for item in page]
+        self.assertEqual(listed, sorted(self.ids[1::2], reverse=True))
+        self.assertEqual([len(page) for page in pages], [4, 4, 4])
+
+    def test_entities_load_without_a_query_per_row(self):
+        self.statements.clear()
+        self.service.get_transcriptions(limit=20)
+        # The page and its entities, however many rows
+        self.assertEqual(len([s for s in self.statements if s.lstrip().startswith("SELECT")]), 2)
+
+    def test_export_ndjson_streams_in_order(self):
+        self.db.add(Observation(animal_id=3, watcher_id=7, raw_text="без сущностей", confidence=0.0,
+                                ts=datetime(2026, 11, 1)))
+        self.db.commit()
+        chunks = self.service.export_observations("ndjson")
+        self.assertNotIsInstance(chunks, list)
+        records = [json.loads(line) for line in "".join(chunks).splitlines()]
+        self.assertEqual([int(record["id"][4:]) for record in records[:25]], self.ids)
+        self.assertEqual(records[3]["entities"], {"vitals": {"weight_kg": 3}, "animal": {"id": 2}})
+        self.assertEqual(records[-1]["entities"], {})
+        self.assertEqual(records[-1]["text"], "без сущностей")
+
+    def test_export_csv_uses_listing_filters(self):
+        text = "".join(self.service.export_observations("csv", animal_id=1, end_date="2026-10-01T00:02:00"))
+        rows = list(csv.DictReader(io.StringIO(text)))
+        # Animal 1 has the even notes; the first three minutes hold notes 0-14
+        self.assertEqual([row["text"] for row in rows], [f"note {i}" for i in range(0, 15, 2)])
+        self.assertEqual(json.loads(rows[1]["entities"])["vitals"], {"weight_kg": 2})
+
+    def test_export_rejects_unknown_format(self):
+        with self.assertRaises(ValueError):
+            self.service.export_observations("xlsx")
+
+    def test_invalid_cursor(self):
+        with self.assertRaises(ValueError):
+            self.service.get_transcriptions(cursor="not-a-cursor")
+
+class TestAsyncRequestPath(unittest.TestCase):
+    def setUp(self):
+        handle, self.path = tempfile.mkstemp(suffix=".db")
+        os.close(handle)
+        Base.metadata.create_all(create_engine(f"sqlite:///{self.path}"))
+        self.engine = create_async_engine(f"sqlite+aiosqlite:///{self.path}")
+        self.sessions = async_sessionmaker(self.engine, expire_on_commit=False)
+
+    def tearDown(self):
+        asyncio.run(self.engine.dispose())
+        os.remove(self.path)
+
+    def test_unit_of_work_and_listing(self):
+        async def scenario():
+            async with self.sessions() as db:
+                unit_of_work = AsyncObservationUnitOfWork(db)
+                for i in range(5):
+                    unit_of_work.add({"animal_id": 4, "watcher_id": 1, "raw_text": f"note {i}", "confidence": 0.0},
+                                     {"vitals": {"weight_kg": i}})
+                ids = await unit_of_work.commit()
+            async with self.sessions() as db:
+                service = AsyncTranscriptionService(db)
+                first = await service.get_transcriptions(animal_id=4, limit=3)
+                rest = await service.get_transcriptions(animal_id=4, cursor=first.next_cursor, limit=3)
+                single = await service.get_transcription(ids[2])
+            return ids, first, rest, single
+
+        ids, first, rest, single = asyncio.run(scenario())
+        listed = [int(item.id[4:]) for item in first.items + rest.items]
+        self.assertEqual(listed, ids[::-1])
+        self.assertIsNone(rest.next_cursor)
+        self.assertEqual(single.entities, {"vitals": {"weight_kg": 2}})
+
+    def test_daily_report(self):
+        async def scenario():
+            async with self.sessions() as db:
+                db.add(Animal(id=4, species="жираф", name="Жужа"))
+                await db.commit()
+                unit_of_work = AsyncObservationUnitOfWork(db)
+                unit_of_work.add({"animal_id": 4, "watcher_id": 1, "raw_text": "жар", "confidence": 0.0},
+                                 {"vitals": {"temperature_c": 41.0}, "alert": {"severity": "warning"}})
+                await unit_of_work.commit()
+                service = AsyncReportService(db)
+                return await service.daily_report(), await service.daily_report("2020-01-01")
+
+        today, empty = asyncio.run(scenario())
+        self.assertEqual(today.date, datetime.utcnow().date().isoformat())
+        animal, = today.animals
+        self.assertEqual((animal.name, animal.observations, animal.alerts), ("Жужа", 1, 1))
+        self.assertEqual(animal.latest_vitals, {"temperature_c": 41.0})
+        self.assertEqual(today.summary.model_dump(), {"total_observations": 1, "critical_alerts": 0, "warnings": 1})
+        self.assertEqual((empty.animals, empty.summary.total_observations), ([], 0))
+        with self.assertRaises(ValueError):
+            asyncio.run(AsyncReportService(None).daily_report("yesterday"))
+
+    def test_cpu_work_leaves_the_event_loop_free(self):
+        def count(n: int) -> int:
+            total = 0
+            for i in range(n):
+                total += i
+            return total
+
+        async def scenario():
+            busy = asyncio.ensure_future(run_cpu(count, 5_000_000))
+            ticks = 0
+            while not busy.done():
+                await asyncio.sleep(0.001)
+                ticks += 1
+            return ticks
+
+        self.assertGreater(asyncio.run(scenario()), 10)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,64 @@
+import unittest
+from engine.rules import RuleEngine, parse_date
+
+class TestRuleEngine(unittest.TestCase):
+    def setUp(self):
+        self.engine = RuleEngine()
+    
+    def test_returns_every_match_with_offsets(self):
+        text = "ела 700 грамм люцерны, вечером ещё 300 г сена"
+        matches = self.engine.scan(text)
+        
+        self.assertEqual([match.value for match in matches], [700.0, 300.0])
+        for match in matches:
+            self.assertEqual(text[match.start:match.end], match.text)
+    
+    def test_rules_do_not_double_count(self):
+        matches = self.engine.scan("Температура тела 38,5 °C, вес 850 кг")
+        
+        self.assertEqual([(match.field, match.value) for match in matches],
+                         [("temperature_c", 38.5), ("weight_kg", 850.0)])
+    
+    def test_temperature_unit_is_optional(self):
+        self.assertEqual(self.engine.scan("температура 37.8")[0].value, 37.8)
+    
+    def test_body_weight_is_not_food(self):
+        for text, expected in [
+            ("Слон весил 4000 кг", [("weight_kg", 4000.0)]),
+            ("масса тела 200 кг", [("weight_kg", 200.0)]),
+            ("Слониха весила около 3900 кг, ела 30 кг сена", [("weight_kg", 3900.0), ("amount_g", 30000.0)]),
+        ]:
+            self.assertEqual([(match.field, match.value) for match in self.engine.scan(text)], expected)
+    
+    def test_kilograms_of_food_are_converted(self):
+        self.assertEqual(self.engine.scan("съел 2 кг моркови")[0].value, 2000.0)
+    
+    def test_dates_are_validated(self):
+        self.assertEqual(parse_date("12", "03", "2024"), "2024-03-12T00:00:00")
+        self.assertEqual(parse_date("29", "02", "2024"), "2024-02-29T00:00:00")
+        self.assertIsNone(parse_date("31", "04", "2024"))
+        self.assertIsNone(parse_date("37", "8", None))
+        self.assertEqual([match.value for match in self.engine.scan("осмотр 12.03.2024, потом 31.04")],
+                         ["2024-03-12T00:00:00"])
+    
+    def test_config_overrides_and_adds_rules(self):
+        engine = RuleEngine.from_config({
+            "weight": r"(?i)масса\s*(?P<value>\d+)\s*кг",
+            "location.enclosure": r"вольер\s*(?P<value>\w+)",
+            "vitals.pulse_count": r"пульс\s*(?P<value>\d+)"
+        })
+        matches = engine.scan("масса 900 кг, вольер Б12, пульс 60")
+        
+        self.assertEqual([(match.field, match.value) for match in matches],
+                         [("weight_kg", 900.0), ("enclosure", "Б12"), ("pulse_count", 60.0)])
+    
+    def test_invalid_config(self):
+        with self.assertRaises(ValueError):
+            RuleEngine.from_config({"numbers": r"\d+"})
+        with self.assertRaises(ValueError):
+            RuleEngine.from_config({"vitals.pulse_count": r"пульс (\d+"})
+        with self.assertRaises(ValueError):
+            RuleEngine.from_config({"vitals.pulse_count": r"(\d)\1"})
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,17 @@
+import unittest
+from scripts.check_import_time import IMPORT_BUDGET_MS, heavy_imports, measure_imports, total_ms
+
+class TestStartupImports(unittest.TestCase):
+    def test_api_defers_model_libraries(self):
+        runs = [measure_imports("backend.main") for _ in range(3)]
+        
+        self.assertEqual(heavy_imports(runs[0]), [])
+        # Best of three, so a busy machine does not fail the budget on its own
+        self.assertLess(min(total_ms(entries) for entries in runs), IMPORT_BUDGET_MS)
+    
+    def test_engine_modules_are_cheap_to_import(self):
+        entries = measure_imports("engine.asr, engine.registry, engine.normalization")
+        self.assertEqual(heavy_imports(entries), [])
+
+if __name__ == "__main__":
+    unittest.main()
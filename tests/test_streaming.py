@@ -0,0 +1,206 @@
+import asyncio
+import json
+import threading
+import unittest
+from unittest import mock
+import numpy as np
+from fastapi import WebSocketDisconnect
+import streaming
+from engine.asr import RecognizerPool, VoskASR
+from engine.ner import IncrementalExtractor
+from engine.registry import _load_vosk, registry
+from streaming import StreamingTranscriber
+
+class FakeRecognizer:
+    """KaldiRecognizer stand-in that finalizes every block it is fed"""
+
+    def __init__(self):
+        self.fail = False
+        self.resets = 0
+
+    def AcceptWaveform(self, data: bytes) -> bool:
+        if self.fail:
+            raise RuntimeError("decoder crashed")
+        return True
+
+    def Result(self) -> str:
+        return json.dumps({"text": "жираф ест"})
+
+    def FinalResult(self) -> str:
+        return json.dumps({"text": ""})
+
+    def PartialResult(self) -> str:
+        return json.dumps({"partial": ""})
+
+    def Reset(self):
+        self.resets += 1
+
+class FakeRecognizerPool(RecognizerPool):
+    def _create(self):
+        return FakeRecognizer()
+
+class FakeVoskASR(VoskASR):
+    """VoskASR without a model; sessions run on fake recognizers"""
+
+    def __init__(self, pool_size: int = 1):
+        self.vad_mode = 2
+        self.partial_interval_sec = 0.3
+        self.recognizers = FakeRecognizerPool(None, pool_size)
+
+class FakeWebSocket:
+    """Client that sends the given messages, then waits; endless sends raw audio forever"""
+
+    def __init__(self, messages=(), endless: bytes = None, gone: bool = False):
+        self.messages = list(messages)
+        self.endless = endless
+        self.gone = gone
+        self.received = 0
+        self.sent = []
+        self.close_code = None
+
+    async def receive(self) -> dict:
+        self.received += 1
+        if self.messages:
+            return self.messages.pop(0)
+        if self.endless is not None:
+            return {"type": "websocket.receive", "bytes": self.endless}
+        await asyncio.Future()
+
+    async def send_json(self, data: dict):
+        if self.gone:
+            raise WebSocketDisconnect(1001)
+        self.sent.append(data)
+
+    async def close(self, code: int = 1000):
+        self.close_code = code
+
+def speech(seconds: float = 1.0) -> bytes:
+    """A noisy tone the VAD gate passes on as speech"""
+    rng = np.random.default_rng(0)
+    t = np.arange(int(seconds * 16000))
+    return (np.sin(t * 2 * np.pi * 220 / 16000) * 8000 + rng.normal(0, 2000, len(t))).astype(np.int16).tobytes()
+
+class FakeSession:
+    """Vosk session stand-in that finalizes one utterance per accepted chunk"""
+
+    def __init__(self, texts):
+        self.texts = list(texts)
+        self.closed = False
+        self.rtf = 0.0
+
+    def accept(self, chunk: bytes):
+        return [{"event": "final", "text": self.texts.pop(0)}] if self.texts else []
+
+    def finish(self):
+        self.closed = True
+        return [{"event": "final", "text": "конец"}]
+
+class TestStreamingEntities(unittest.TestCase):
+    def setUp(self):
+        self.transcriber = StreamingTranscriber(websocket=None)
+        self.transcriber.session = FakeSession(["вес 850 кг"])
+        self.transcriber.entities = IncrementalExtractor(registry.get("ner"))
+
+    def test_final_utterances_get_entity_updates(self):
+        events = self.transcriber._accept(b"\x00\x00" * 160)
+
+        self.assertEqual([event["event"] for event in events], ["final", "entity_update"])
+        self.assertEqual(events[1]["entities"]["vitals"]["weight_kg"], 850.0)
+
+    def test_extraction_holds_the_ner_lock(self):
+        results = []
+        worker = threading.Thread(target=lambda: results.append(self.transcriber._accept(b"")))
+
+        with registry.acquire("ner"):
+            worker.start()
+            worker.join(0.2)
+            # Batch analysis holds the extractor, so the stream has to wait
+            self.assertTrue(worker.is_alive())
+            self.assertEqual(results, [])
+        worker.join(5)
+
+        self.assertEqual(results[0][1]["event"], "entity_update")
+
+class TestRecognizerPool(unittest.TestCase):
+    def test_times_out_when_no_recognizer_is_free(self):
+        pool = FakeRecognizerPool(None, size=1)
+        pool.acquire()
+
+        with self.assertRaises(TimeoutError):
+            pool.acquire(timeout=0.05)
+
+    def test_released_recognizers_are_reset_and_reused(self):
+        pool = FakeRecognizerPool(None, size=2)
+        rec = pool.acquire()
+        pool.release(rec)
+
+        self.assertIs(pool.acquire(), rec)
+        self.assertEqual(rec.resets, 1)
+        self.assertEqual(pool.stats()["created"], 1)
+
+class TestStreamingSessions(unittest.TestCase):
+    def setUp(self):
+        self.asr = FakeVoskASR(pool_size=1)
+        registry.register("vosk", lambda: self.asr)
+
+    def tearDown(self):
+        registry.unload("vosk")
+        registry.register("vosk", _load_vosk)
+
+    def run_stream(self, websocket: FakeWebSocket):
+        asyncio.run(StreamingTranscriber(websocket, entities=False).run())
+
+    def test_stream_returns_its_recognizer(self):
+        websocket = FakeWebSocket([{"type": "websocket.receive", "bytes": speech()}, {"type": "websocket.receive", "text": "end"}])
+
+        self.run_stream(websocket)
+
+        self.assertIn("жираф ест", [event.get("text") for event in websocket.sent])
+        self.assertEqual(self.asr.recognizers.stats(), {"size": 1, "created": 1, "idle": 1})
+
+    def test_disconnect_returns_the_recognizer(self):
+        # The client goes away while results are being sent back
+        self.run_stream(FakeWebSocket([{"type": "websocket.receive", "bytes": speech()}], gone=True))
+
+        self.assertEqual(self.asr.recognizers.stats()["idle"], 1)
+
+    def test_decoding_error_returns_the_recognizer(self):
+        rec = self.asr.recognizers.acquire()
+        rec.fail = True
+        self.asr.recognizers.release(rec)
+
+        with self.assertRaises(RuntimeError):
+            self.run_stream(FakeWebSocket([{"type": "websocket.receive", "bytes": speech()}]))
+
+        self.assertEqual(self.asr.recognizers.stats()["idle"], 1)
+        self.assertEqual(rec.resets, 2)
+
+    def test_stream_is_refused_when_the_pool_is_exhausted(self):
+        self.asr.recognizers.acquire()
+        websocket = FakeWebSocket()
+
+        with mock.patch.object(streaming, "STREAM_ACQUIRE_TIMEOUT", 0.05):
+            self.run_stream(websocket)
+
+        self.assertEqual(websocket.sent[0]["event"], "error")
+        self.assertEqual(websocket.close_code, 1013)
+
+    def test_slow_recognition_stops_reading_the_socket(self):
+        websocket = FakeWebSocket(endless=b"\x00\x00" * 1600)
+
+        async def receive_without_processing():
+            with mock.patch.object(streaming, "STREAM_QUEUE_CHUNKS", 2):
+                transcriber = StreamingTranscriber(websocket, entities=False)
+            receiver = asyncio.create_task(transcriber._receive())
+            await asyncio.sleep(0.1)
+            receiver.cancel()
+            return transcriber.chunks.qsize()
+
+        queued = asyncio.run(receive_without_processing())
+
+        # Two chunks fill the queue and the third waits for room
+        self.assertEqual(queued, 2)
+        self.assertEqual(websocket.received, 3)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,66 @@
+import unittest
+import numpy as np
+import webrtcvad
+from engine.vad import SpeechSegmenter, StreamingVADGate
+
+def tone(seconds: float, sample_rate: int = 16000) -> np.ndarray:
+    t = np.arange(int(seconds * sample_rate)) / sample_rate
+    # Voiced-like signal: harmonics of 150 Hz with a slow amplitude envelope
+    signal = sum(np.sin(2 * np.pi * 150 * k * t) / k for k in range(1, 8))
+    return (signal * 6000).astype(np.int16)
+
+def silence(seconds: float, sample_rate: int = 16000) -> np.ndarray:
+    return np.zeros(int(seconds * sample_rate), dtype=np.int16)
+
+class TestSpeechSegmenter(unittest.TestCase):
+    def setUp(self):
+        self.segmenter = SpeechSegmenter(aggressiveness=2, padding_ms=200, min_silence_ms=500)
+    
+    def test_silence_has_no_segments(self):
+        self.assertEqual(self.segmenter.segments(silence(3.0), 16000), [])
+    
+    def test_speech_regions_are_padded_and_offset(self):
+        pcm = np.concatenate([silence(2.0), tone(1.5), silence(3.0), tone(1.0), silence(1.0)])
+        segments = self.segmenter.segments(pcm, 16000)
+        
+        self.assertEqual(len(segments), 2)
+        self.assertAlmostEqual(segments[0][0], 1.8, delta=0.1)
+        self.assertAlmostEqual(segments[0][1], 3.7, delta=0.1)
+        self.assertAlmostEqual(segments[1][0], 6.3, delta=0.1)
+    
+    def test_short_gaps_are_merged(self):
+        pcm = np.concatenate([tone(1.0), silence(0.3), tone(1.0)])
+        self.assertEqual(len(self.segmenter.segments(pcm, 16000)), 1)
+
+class TestStreamingVADGate(unittest.TestCase):
+    def setUp(self):
+        self.pcm = np.concatenate([silence(1.0), tone(1.0), silence(1.5)]).tobytes()
+    
+    def run_gate(self, chunk_size: int):
+        gate = StreamingVADGate(webrtcvad.Vad(2), preroll_ms=300, hangover_ms=600, block_ms=240)
+        blocks = []
+        for offset in range(0, len(self.pcm), chunk_size):
+            blocks.extend(gate.push(self.pcm[offset:offset + chunk_size]))
+        blocks.extend(gate.flush())
+        return blocks
+    
+    def test_arbitrary_chunk_sizes_are_reframed(self):
+        # 4410 bytes is not a multiple of any webrtcvad frame size
+        self.assertEqual(self.run_gate(4410), self.run_gate(960))
+    
+    def test_preroll_and_hangover(self):
+        blocks = self.run_gate(3200)
+        
+        # The gate opens with pre-roll from before the detected onset
+        self.assertLess(blocks[0].start_sec, 1.0)
+        self.assertGreaterEqual(blocks[0].start_sec, 0.6)
+        # Silence after the hangover is dropped and the utterance is closed
+        self.assertTrue(blocks[-1].utterance_end)
+        self.assertEqual(sum(block.utterance_end for block in blocks), 1)
+        speech_sec = sum(len(block.pcm) for block in blocks) / 32000
+        self.assertLess(speech_sec, 2.3)
+        # Speech reaches the recognizer in batched blocks, not per frame
+        self.assertTrue(all(len(block.pcm) >= 960 * 8 for block in blocks[:-1]))
+
+if __name__ == "__main__":
+    unittest.main()